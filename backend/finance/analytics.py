@@ -0,0 +1,253 @@
+import hashlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, DecimalField, F, Max, Min, Sum, When
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+from django.utils.dateparse import parse_date
+from rest_framework import exceptions
+
+from . import usercache
+from .models import Category, MonthlyCategoryTotal, Transaction
+
+
+ANALYTICS_KEY = "finance:user:{user_id}:analytics:{digest}:{version}"
+
+BUCKETS = {
+	"day": TruncDay,
+	"week": TruncWeek,
+	"month": TruncMonth,
+	"quarter": TruncQuarter,
+	"year": TruncYear,
+}
+
+# Dimension -> ((output key, column), ...); the first column is the one sorted on.
+DIMENSIONS = {
+	"account": (("account", "account_id"), ("account_name", "account__name")),
+	"account_type": (("account_type", "account__account_type"),),
+	"category": (("category", "category_id"), ("category_name", "category__name")),
+	"type": (("type", "transaction_type"),),
+	"budget": (("budget", "budget_id"),),
+}
+
+# Filter -> (lookup, kind); list filters accept one value or a list.
+FILTERS = {
+	"account": ("account_id__in", "ids"),
+	"account_type": ("account__account_type__in", "strings"),
+	"category": ("category_id__in", "ids"),
+	"type": ("transaction_type", "type"),
+	"budget": ("budget_id__in", "ids"),
+	"date_after": ("date__gte", "date"),
+	"date_before": ("date__lte", "date"),
+}
+
+
+def signed(field):
+	"""``field`` as a signed flow: positive for income, negative for expenses."""
+	return Case(
+		When(transaction_type=Category.TYPE_INCOME, then=F(field)),
+		default=-F(field),
+		output_field=DecimalField(max_digits=14, decimal_places=2),
+	)
+
+
+# Measure -> (aggregate over Transaction, aggregate over MonthlyCategoryTotal or None).
+MEASURES = {
+	"total": (Sum("amount"), Sum("total")),
+	"net": (Sum(signed("amount")), Sum(signed("total"))),
+	"count": (Count("id"), Sum("count")),
+	"average": (Avg("amount"), None),
+	"min": (Min("amount"), None),
+	"max": (Max("amount"), None),
+}
+
+# What the monthly rollups can answer: these dimensions and filters, and month-aligned buckets and dates.
+ROLLUP_DIMENSIONS = {"account", "account_type", "category", "type"}
+ROLLUP_FILTERS = {"account", "account_type", "category", "type", "date_after", "date_before"}
+ROLLUP_BUCKETS = {None, "month", "quarter", "year"}
+
+SPEC_KEYS = {"dimensions", "measures", "bucket", "filters", "order", "limit"}
+
+
+def max_rows():
+	return getattr(settings, "FINANCE_ANALYTICS_MAX_ROWS", 5000)
+
+
+def _names(spec, key, allowed, default):
+	value = spec.get(key, default)
+	if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+		raise exceptions.ValidationError({key: "Expected a list of names."})
+	unknown = sorted(set(value) - set(allowed))
+	if unknown:
+		raise exceptions.ValidationError({key: f"Unknown: {', '.join(unknown)}. Expected any of: {', '.join(allowed)}."})
+	return list(dict.fromkeys(value))
+
+
+def _filter_value(name, kind, value):
+	if kind == "date":
+		parsed = parse_date(value) if isinstance(value, str) else None
+		if parsed is None:
+			raise exceptions.ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+		return parsed.isoformat()
+	if kind == "type":
+		if value not in dict(Category.TYPE_CHOICES):
+			raise exceptions.ValidationError({name: f"Expected one of: {', '.join(dict(Category.TYPE_CHOICES))}."})
+		return value
+	values = value if isinstance(value, list) else [value]
+	expected = int if kind == "ids" else str
+	if not values or not all(isinstance(item, expected) and not isinstance(item, bool) for item in values):
+		raise exceptions.ValidationError({name: "Expected an id or a list of ids." if kind == "ids" else "Expected a name or a list of names."})
+	return sorted(set(values))
+
+
+def normalize(spec):
+	"""Validate an analytics spec and return it in canonical form (defaults filled, lists de-duplicated).
+
+	Equal questions normalize to equal specs, which is what the cache is keyed on.
+	"""
+	if not isinstance(spec, dict):
+		raise exceptions.ValidationError({"detail": "Expected a JSON object."})
+	unknown = sorted(set(spec) - SPEC_KEYS)
+	if unknown:
+		raise exceptions.ValidationError({"detail": f"Unknown spec keys: {', '.join(unknown)}."})
+
+	dimensions = _names(spec, "dimensions", list(DIMENSIONS), [])
+	measures = _names(spec, "measures", list(MEASURES), ["total", "count"])
+	if not measures:
+		raise exceptions.ValidationError({"measures": "Name at least one measure."})
+	bucket = spec.get("bucket")
+	if bucket is not None and bucket not in BUCKETS:
+		raise exceptions.ValidationError({"bucket": f"Expected one of: {', '.join(BUCKETS)}."})
+
+	raw_filters = spec.get("filters") or {}
+	if not isinstance(raw_filters, dict):
+		raise exceptions.ValidationError({"filters": "Expected an object."})
+	unknown = sorted(set(raw_filters) - set(FILTERS))
+	if unknown:
+		raise exceptions.ValidationError({"filters": f"Unknown: {', '.join(unknown)}. Expected any of: {', '.join(FILTERS)}."})
+	filters = {name: _filter_value(name, FILTERS[name][1], raw_filters[name]) for name in sorted(raw_filters)}
+
+	keys = (["period"] if bucket else []) + [key for name in dimensions for key, _ in DIMENSIONS[name]] + measures
+	order = spec.get("order", [])
+	if not isinstance(order, list) or not all(isinstance(key, str) and key.lstrip("-") in keys for key in order):
+		raise exceptions.ValidationError({"order": f"Expected a list of output keys, each optionally prefixed with '-': {', '.join(keys)}."})
+
+	limit = spec.get("limit", max_rows())
+	if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= max_rows():
+		raise exceptions.ValidationError({"limit": f"Expected a number from 1 to {max_rows()}."})
+
+	return {
+		"dimensions": dimensions,
+		"measures": measures,
+		"bucket": bucket,
+		"filters": filters,
+		"order": list(dict.fromkeys(order)),
+		"limit": limit,
+	}
+
+
+def _month_aligned(filters):
+	after = filters.get("date_after")
+	before = filters.get("date_before")
+	if after and parse_date(after).day != 1:
+		return False
+	return not before or (parse_date(before) + timedelta(days=1)).day == 1
+
+
+def uses_rollups(spec):
+	"""Whether ``MonthlyCategoryTotal`` holds everything the spec asks for."""
+	return (
+		spec["bucket"] in ROLLUP_BUCKETS
+		and ROLLUP_DIMENSIONS.issuperset(spec["dimensions"])
+		and all(MEASURES[name][1] is not None for name in spec["measures"])
+		and ROLLUP_FILTERS.issuperset(spec["filters"])
+		and _month_aligned(spec["filters"])
+	)
+
+
+def compile_query(user_id, spec):
+	"""Build the spec's single ``GROUP BY`` query; returns ``(queryset, aggregates, source)``.
+
+	Without a bucket or dimensions there is nothing to group by: the queryset
+	is only filtered, and the caller runs ``aggregate(**aggregates)`` on it.
+
+	Month-aligned questions about accounts, categories and types are answered
+	from the monthly rollups, which the ledger keeps current, so the database
+	reads one row per account, category and month instead of one per
+	transaction. Everything else groups ``Transaction`` directly.
+	"""
+	rollups = uses_rollups(spec)
+	if rollups:
+		queryset = MonthlyCategoryTotal.objects.filter(user_id=user_id, count__gt=0)
+		date_field, measure_index = "month", 1
+	else:
+		queryset = Transaction.objects.filter(user_id=user_id)
+		date_field, measure_index = "date", 0
+
+	for name, value in spec["filters"].items():
+		lookup, kind = FILTERS[name]
+		if kind == "date":
+			value = parse_date(value)
+			if rollups:
+				# date_before is a month's last day here; its rollup row is keyed by the 1st.
+				lookup, value = lookup.replace("date", "month"), value.replace(day=1)
+		queryset = queryset.filter(**{lookup: value})
+
+	columns = {}
+	if spec["bucket"]:
+		queryset = queryset.annotate(period=BUCKETS[spec["bucket"]](date_field))
+		columns["period"] = "period"
+	for name in spec["dimensions"]:
+		columns.update(DIMENSIONS[name])
+	aggregates = {name: MEASURES[name][measure_index] for name in spec["measures"]}
+
+	source = "rollups" if rollups else "transactions"
+	if not columns:
+		return queryset, aggregates, source
+
+	ordering = [("-" if key.startswith("-") else "") + columns.get(key.lstrip("-"), key.lstrip("-")) for key in spec["order"]]
+	ordering += [column for column in dict.fromkeys(columns.values()) if column not in {item.lstrip("-") for item in ordering}]
+	queryset = queryset.values(*dict.fromkeys(columns.values())).annotate(**aggregates).order_by(*ordering)
+	return queryset, aggregates, source
+
+
+def _money(value):
+	# Averages come back as floats on SQLite.
+	return None if value is None else str(Decimal(str(value)).quantize(Decimal("0.01")))
+
+
+def run(user_id, spec):
+	"""Answer a normalized spec: ``{"rows": [...], "truncated": bool, "source": ...}``."""
+	queryset, aggregates, source = compile_query(user_id, spec)
+	columns = [pair for name in spec["dimensions"] for pair in DIMENSIONS[name]]
+	if columns or spec["bucket"]:
+		# One extra row tells a full result from a truncated one.
+		results = list(queryset[:spec["limit"] + 1])
+	else:
+		results = [queryset.aggregate(**aggregates)]
+	rows = []
+	for result in results[:spec["limit"]]:
+		row = {"period": result["period"].isoformat()} if spec["bucket"] else {}
+		for key, column in columns:
+			row[key] = result[column]
+		for name in spec["measures"]:
+			row[name] = (result[name] or 0) if name == "count" else _money(result[name])
+		rows.append(row)
+	return {"rows": rows, "truncated": len(results) > spec["limit"], "source": source}
+
+
+def answer(user_id, spec):
+	"""Normalize and answer a spec, cached per user data version when response caching is on."""
+	spec = normalize(spec)
+	if not usercache.enabled():
+		return {"spec": spec, **run(user_id, spec)}
+	digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:32]
+	key = ANALYTICS_KEY.format(user_id=user_id, digest=digest, version=usercache.data_version(user_id))
+	payload = cache.get(key)
+	if payload is None:
+		payload = {"spec": spec, **run(user_id, spec)}
+		cache.set(key, payload, getattr(settings, "FINANCE_ANALYTICS_CACHE_SECONDS", 300))
+	return payload
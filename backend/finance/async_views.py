@@ -0,0 +1,120 @@
+"""Async read paths for the busiest GET endpoints.
+
+Mounted in front of the DRF routes when ``FINANCE_ASYNC_READS`` is on (the
+default under ``main.asgi``). A GET awaits the async ORM, so a slow query
+parks a coroutine instead of a worker; every other method falls through to
+the synchronous DRF view. Responses match the DRF views byte for byte.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+
+from . import metrics, usercache
+from .authentication import CachedJWTAuthentication
+from .renderers import MessagePackRenderer, TimedJSONRenderer
+from .views import AccountViewSet, DashboardSummaryView, TransactionViewSet, _dashboard_payload, _dashboard_queries, _month_starts
+
+
+authenticator = CachedJWTAuthentication()
+# JSON first, so clients that ask for anything (or for HTML) get what the DRF views would send.
+renderers = [TimedJSONRenderer(), MessagePackRenderer()]
+negotiation = DefaultContentNegotiation()
+
+
+def render_response(request, data, status=200):
+	"""Render ``data`` as JSON or MessagePack, following the request's Accept header or ``?format=``."""
+	try:
+		renderer, _ = negotiation.select_renderer(request, renderers)
+	except (exceptions.NotFound, exceptions.NotAcceptable):
+		renderer = renderers[0]
+	response = HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+	patch_vary_headers(response, ("Accept",))
+	return response
+
+
+def error_response(request, exc):
+	data = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+	response = render_response(Request(request), data, exc.status_code)
+	if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+		response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+	return response
+
+
+def async_read(sync_view):
+	"""Serve GET with the decorated coroutine and hand every other method to ``sync_view``.
+
+	The coroutine receives a DRF ``Request`` whose user was resolved by
+	``CachedJWTAuthentication.aauthenticate``; API errors render as DRF would.
+	"""
+	fallback = sync_to_async(sync_view)
+
+	def decorator(handler):
+		@csrf_exempt
+		@wraps(handler)
+		async def view(request, *args, **kwargs):
+			if request.method != "GET":
+				return await fallback(request, *args, **kwargs)
+			try:
+				with metrics.timed("auth"):
+					result = await authenticator.aauthenticate(request)
+				if result is None:
+					raise exceptions.NotAuthenticated()
+				drf_request = Request(request)
+				drf_request.user, drf_request.auth = result
+				return await handler(drf_request, *args, **kwargs)
+			except exceptions.APIException as exc:
+				return error_response(request, exc)
+		# Lets the metrics middleware label a GET with the viewset action it replaces.
+		view.actions = getattr(sync_view, "actions", None)
+		return view
+	return decorator
+
+
+def list_view(viewset_class, request):
+	# A viewset instance gives us get_queryset and the fast serializer without its sync dispatch.
+	return viewset_class(request=request, action="list", format_kwarg=None, args=(), kwargs={})
+
+
+@async_read(TransactionViewSet.as_view({"get": "list", "post": "create"}, basename="transaction"))
+async def transaction_list(request):
+	view = list_view(TransactionViewSet, request)
+	rows = view.fast_serializer()
+	paginator = view.paginator
+	page = await paginator.apaginate_queryset(view.get_queryset().values(*view.fast_columns(rows)), request, view)
+	return render_response(request, paginator.get_paginated_response(rows.serialize(page)).data)
+
+
+@async_read(AccountViewSet.as_view({"get": "list", "post": "create"}, basename="account"))
+async def account_list(request):
+	view = list_view(AccountViewSet, request)
+	rows = view.fast_serializer()
+
+	async def load():
+		return rows.serialize([row async for row in view.get_queryset().values(*view.fast_columns(rows))])
+
+	if not usercache.enabled():
+		return render_response(request, await load())
+
+	status_code, data, etag = await usercache.acached_list(request, "account", view.list_cache_variant(), load, view.list_cache_timeout)
+	response = HttpResponse(status=status_code) if data is None else render_response(request, data)
+	response["ETag"] = etag
+	response["Cache-Control"] = "private, no-cache"
+	return response
+
+
+@async_read(DashboardSummaryView.as_view())
+async def dashboard_summary(request):
+	user = request.user
+	month_starts = _month_starts(DashboardSummaryView.months)
+
+	rows, aggregates = _dashboard_queries(user, month_starts, DashboardSummaryView.recent_count)
+	results = {name: [row async for row in queryset] for name, queryset in rows.items()}
+	for name, (queryset, exprs) in aggregates.items():
+		results[name] = await queryset.aaggregate(**exprs)
+	return render_response(request, _dashboard_payload(month_starts, results))
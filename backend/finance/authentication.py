@@ -0,0 +1,128 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from . import metrics
+
+
+USER_KEY = "finance:auth:user:{user_id}"
+REVOKED_KEY = "finance:auth:revoked:{user_id}"
+USER_FIELDS = ("id", "username", "first_name", "last_name", "email", "is_active", "is_staff", "is_superuser")
+
+
+def enabled():
+	return getattr(settings, "FINANCE_AUTH_CACHE", False)
+
+
+def user_ttl():
+	return getattr(settings, "FINANCE_AUTH_USER_TTL", 60)
+
+
+def forget_user(user_id):
+	"""Drop the cached copy of a user so the next request reloads it."""
+	cache.delete(USER_KEY.format(user_id=user_id))
+
+
+def revoke_tokens(user_id, token=None):
+	"""Reject ``token`` and every token issued to the user before this second; returns whether it did.
+
+	``iat`` has whole-second resolution, so a token issued in the same second
+	as the logout (a fresh login) stays valid; ``token`` itself is rejected by
+	its ``jti`` instead. The marker only needs to outlive the
+	longest-lived access token, after which those tokens have expired anyway.
+	Revocation lives in the shared cache, so it is only available when
+	``FINANCE_AUTH_CACHE`` is on.
+	"""
+	if not enabled():
+		return False
+	lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+	cache.set(REVOKED_KEY.format(user_id=user_id), {"at": int(time.time()), "jti": token.get(api_settings.JTI_CLAIM) if token else None}, lifetime)
+	forget_user(user_id)
+	return True
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+	"""JWT authentication that resolves the user from a short-TTL cache instead of the database.
+
+	The signature and expiry are verified as usual. The user row is cached for
+	``FINANCE_AUTH_USER_TTL`` seconds (without the password hash) and evicted
+	whenever the user is saved, so deactivation takes effect immediately.
+	Tokens revoked by ``revoke_tokens()`` are rejected.
+
+	Eviction and revocation must reach every worker, so all of this is only on
+	with ``FINANCE_AUTH_CACHE``, which defaults to on with a shared (Redis)
+	cache. Otherwise the user is loaded from the database as plain
+	``JWTAuthentication`` does.
+	"""
+
+	def authenticate(self, request):
+		with metrics.timed("auth"):
+			return super().authenticate(request)
+
+	def get_user(self, validated_token):
+		if not enabled():
+			return super().get_user(validated_token)
+		user_key, revoked_key = self.cache_keys(validated_token)
+		user = self.from_cache(validated_token, cache.get_many([user_key, revoked_key]), user_key, revoked_key)
+		if user is None:
+			user = super().get_user(validated_token)
+			cache.set(user_key, self.cached_fields(user), user_ttl())
+		return user
+
+	async def aauthenticate(self, request):
+		"""Async twin of ``authenticate`` for views running on the async ORM."""
+		header = self.get_header(request)
+		if header is None:
+			return None
+		raw_token = self.get_raw_token(header)
+		if raw_token is None:
+			return None
+		validated_token = self.get_validated_token(raw_token)
+		return await self.aget_user(validated_token), validated_token
+
+	async def aget_user(self, validated_token):
+		if not enabled():
+			return await sync_to_async(super().get_user)(validated_token)
+		user_key, revoked_key = self.cache_keys(validated_token)
+		user = self.from_cache(validated_token, await cache.aget_many([user_key, revoked_key]), user_key, revoked_key)
+		if user is None:
+			user = await sync_to_async(super().get_user)(validated_token)
+			await cache.aset(user_key, self.cached_fields(user), user_ttl())
+		return user
+
+	@staticmethod
+	def cache_keys(validated_token):
+		try:
+			user_id = validated_token[api_settings.USER_ID_CLAIM]
+		except KeyError:
+			raise AuthenticationFailed("Token contained no recognizable user identification", code="token_not_valid")
+		return USER_KEY.format(user_id=user_id), REVOKED_KEY.format(user_id=user_id)
+
+	@staticmethod
+	def cached_fields(user):
+		return {name: getattr(user, name) for name in USER_FIELDS}
+
+	@staticmethod
+	def from_cache(validated_token, cached, user_key, revoked_key):
+		"""Build the user from a cache hit; ``None`` means it must be loaded from the database."""
+		revoked = cached.get(revoked_key)
+		if revoked is not None and (
+			validated_token.get("iat", 0) < revoked["at"] or validated_token.get(api_settings.JTI_CLAIM) == revoked["jti"]
+		):
+			raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+
+		fields = cached.get(user_key)
+		if fields is None:
+			return None
+		user = get_user_model()(**fields)
+		user._state.adding = False
+		user._state.db = "default"
+		if not user.is_active:
+			raise AuthenticationFailed("User is inactive", code="user_inactive")
+		return user
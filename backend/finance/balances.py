@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DateField, DecimalField, F, Sum, Value, When, Window
+from django.db.models.functions import Least
+
+from .models import Account, BalanceCheckpoint, Category, Transaction
+
+
+INTERVALS = ("day", "month")
+
+SIGNED_AMOUNT = Case(
+	When(transaction_type=Category.TYPE_INCOME, then=F("amount")),
+	default=-F("amount"),
+	output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def earliest_days(entries):
+	"""Earliest transaction day per account among ledger entries."""
+	earliest = {}
+	for item in entries:
+		if item.account_id not in earliest or item.date < earliest[item.account_id]:
+			earliest[item.account_id] = item.date
+	return earliest
+
+
+def checkpoints_before(day):
+	"""``Account.checkpoints_through`` after a ledger write dated ``day``: checkpoints from ``day`` on are stale.
+
+	Applied in the ledger's balance ``UPDATE``, so invalidation costs no extra
+	statement; the next ``refresh`` deletes the stale rows. ``LEAST`` keeps NULL
+	on SQLite and drops it on PostgreSQL; either is right, since NULL only
+	occurs before the first checkpoint.
+	"""
+	return Least(F("checkpoints_through"), Value(day - timedelta(days=1), output_field=DateField()))
+
+
+def refresh(account_id):
+	"""Bring an account's checkpoints up to date; return ``(balance, net_total)``.
+
+	Checkpoints past ``checkpoints_through`` are replaced, and every
+	transaction day after it is checkpointed with one window query: rows of
+	the same day are peers in ``SUM() OVER (ORDER BY date)``, so each day comes
+	out once with its running total. The account row is locked like a ledger
+	write locks it, so a rebuild never interleaves with a write.
+	"""
+	with transaction.atomic():
+		balance, through = Account.objects.select_for_update().values_list("balance", "checkpoints_through").get(pk=account_id)
+		checkpoints = BalanceCheckpoint.objects.filter(account_id=account_id)
+		last = checkpoints.order_by("-day").values_list("day", "net_total").first()
+		rows = Transaction.objects.filter(account_id=account_id)
+		base = Decimal("0")
+		if last is not None and (through is None or last[0] > through):
+			stale = checkpoints if through is None else checkpoints.filter(day__gt=through)
+			stale.delete()
+			last = None if through is None else checkpoints.order_by("-day").values_list("day", "net_total").first()
+		if last is not None:
+			rows = rows.filter(date__gt=last[0])
+			base = last[1]
+		running = (
+			rows.annotate(running=Window(Sum(SIGNED_AMOUNT), order_by=F("date").asc()))
+			.values_list("date", "running")
+			.distinct()
+			.order_by("date")
+		)
+		created = [BalanceCheckpoint(account_id=account_id, day=day, net_total=base + total) for day, total in running]
+		if created:
+			BalanceCheckpoint.objects.bulk_create(created, batch_size=1000)
+			Account.objects.filter(pk=account_id).update(checkpoints_through=created[-1].day)
+	return balance, created[-1].net_total if created else base
+
+
+def _period_ends(start, end, interval):
+	if interval == "day":
+		return [(start + timedelta(days=n), start + timedelta(days=n)) for n in range((end - start).days + 1)]
+	periods = []
+	month = start.replace(day=1)
+	while month <= end:
+		following = (month + timedelta(days=32)).replace(day=1)
+		periods.append((month, min(following - timedelta(days=1), end)))
+		month = following
+	return periods
+
+
+def history(account_id, start, end, interval="day"):
+	"""Closing balance of each day or month from ``start`` to ``end``, as ``[(period start, balance)]``.
+
+	The opening balance (before any transaction) is the current balance less
+	the account's total net flow; each closing balance adds the net flow
+	through the period's last day, read from the checkpoints.
+	"""
+	balance, net_total = refresh(account_id)
+	opening = balance - net_total
+	checkpoints = BalanceCheckpoint.objects.filter(account_id=account_id)
+	carried = checkpoints.filter(day__lt=start).order_by("-day").values_list("net_total", flat=True).first() or Decimal("0")
+	days = iter(checkpoints.filter(day__range=(start, end)).order_by("day").values_list("day", "net_total"))
+
+	points = []
+	pending = next(days, None)
+	for period, closing in _period_ends(start, end, interval):
+		while pending is not None and pending[0] <= closing:
+			carried = pending[1]
+			pending = next(days, None)
+		points.append((period, opening + carried))
+	return points
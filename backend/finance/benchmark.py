@@ -0,0 +1,304 @@
+import platform
+import random
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import columnar, compression, ledger
+from .catalogue import categories
+from .fastserializers import row_serializer
+from .models import Account, Budget, Category, SavingsGoal, Transaction
+from .renderers import TimedJSONRenderer
+from .serializers import TransactionSerializer
+
+
+BENCH_PASSWORD = "bench-password-123"
+
+Dataset = namedtuple("Dataset", "user account_ids budget_ids goal_ids transaction_count")
+
+
+def percentile(sorted_values, pct):
+	"""Nearest-rank percentile of an already sorted list."""
+	if not sorted_values:
+		return 0.0
+	index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+	return sorted_values[index]
+
+
+def generate(users=1, accounts=3, budgets=5, goals=3, transactions=1000, days=365, seed=0, batch_size=5000):
+	"""Create benchmark users with synthetic accounts, budgets, goals and transactions.
+
+	Transactions go through ``ledger.post`` batch by batch, so balances, budget
+	spend and the monthly rollups are consistent with the rows, exactly as after
+	a statement import.
+	"""
+	rng = random.Random(seed)
+	income = list(categories.lookup(Category.TYPE_INCOME).values())
+	expense = list(categories.lookup(Category.TYPE_EXPENSE).values())
+	today = timezone.localdate()
+	datasets = []
+
+	for n in range(users):
+		user = get_user_model().objects.create_user(username=f"bench-{seed}-{n}", password=BENCH_PASSWORD)
+		account_ids = [
+			Account.objects.create(user=user, name=f"Account {i + 1}", account_type=rng.choice(["checking", "savings", "credit"])).pk
+			for i in range(accounts)
+		]
+		budget_by_category = {}
+		for category in rng.sample(expense, min(budgets, len(expense))):
+			budget = Budget.objects.create(user=user, category=category, allocated_amount=Decimal(rng.randrange(100, 2000)))
+			budget_by_category[category.pk] = budget.pk
+		goal_ids = [
+			SavingsGoal.objects.create(
+				user=user, name=f"Goal {i + 1}", current_amount=Decimal(rng.randrange(0, 500)), target_amount=Decimal(rng.randrange(500, 10000)),
+			).pk
+			for i in range(goals)
+		]
+
+		for start in range(0, transactions, batch_size):
+			batch = []
+			for i in range(start, min(start + batch_size, transactions)):
+				is_income = rng.random() < 0.2
+				category = rng.choice(income if is_income else expense)
+				amount = Decimal(rng.randrange(50000, 300000) if is_income else rng.randrange(500, 50000)) / 100
+				batch.append(Transaction(
+					user=user,
+					account_id=rng.choice(account_ids),
+					category=category,
+					budget_id=None if is_income else budget_by_category.get(category.pk),
+					transaction_type=category.type,
+					amount=amount,
+					description=f"{category.name} #{i}",
+					date=today - timedelta(days=rng.randrange(days)),
+				))
+			with transaction.atomic():
+				Transaction.objects.bulk_create(batch)
+				ledger.post(ledger.entry(row) for row in batch)
+
+		datasets.append(Dataset(user, account_ids, list(budget_by_category.values()), goal_ids, transactions))
+	return datasets
+
+
+class QueryCounter:
+	"""``connection.execute_wrapper`` hook counting the queries a request runs."""
+
+	def __init__(self):
+		self.count = 0
+
+	def __call__(self, execute, sql, params, many, context):
+		self.count += 1
+		return execute(sql, params, many, context)
+
+
+class Scenario:
+	"""A named request against the real API; ``request(run, i)`` returns the response."""
+
+	def __init__(self, name, request):
+		self.name = name
+		self.request = request
+
+
+class BenchmarkRun:
+	"""State shared by the scenarios of one run: the client, the dataset and created rows."""
+
+	def __init__(self, dataset):
+		self.dataset = dataset
+		self.anonymous = APIClient()
+		self.client = APIClient()
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(dataset.user)}")
+		self.created = []
+		self.category_id = next(iter(categories.lookup(Category.TYPE_EXPENSE)))
+		# Generated descriptions start with the category name; search by a prefix of one.
+		self.search_term = categories.lookup()[self.category_id].name[:3]
+
+	def transaction_payload(self, i):
+		return {
+			"account_id": self.dataset.account_ids[i % len(self.dataset.account_ids)],
+			"category_id": self.category_id,
+			"description": f"Benchmark {i}",
+			"date": timezone.localdate().isoformat(),
+			"amount": f"{1 + i % 100}.25",
+		}
+
+
+def _login(run, i):
+	return run.anonymous.post(reverse("login"), {"username": run.dataset.user.username, "password": BENCH_PASSWORD}, format="json")
+
+
+def _create(run, i):
+	response = run.client.post(reverse("transaction-list"), run.transaction_payload(i), format="json")
+	if response.status_code == 201:
+		run.created.append(response.json()["id"])
+	return response
+
+
+def _update(run, i):
+	pk = run.created[i % len(run.created)]
+	return run.client.patch(reverse("transaction-detail", args=[pk]), {"amount": f"{2 + i % 100}.50"}, format="json")
+
+
+def _delete(run, i):
+	return run.client.delete(reverse("transaction-detail", args=[run.created.pop()]))
+
+
+def _savings_add(run, i):
+	goal_id = run.dataset.goal_ids[i % len(run.dataset.goal_ids)]
+	return run.client.post(reverse("savingsgoal-add", args=[goal_id]), {"amount": "1.00"}, format="json")
+
+
+# Order matters: update and delete work on the rows that create made.
+SCENARIOS = [
+	Scenario("login", _login),
+	Scenario("dashboard", lambda run, i: run.client.get(reverse("dashboard-summary"))),
+	Scenario("account_list", lambda run, i: run.client.get(reverse("account-list"))),
+	Scenario("transaction_list", lambda run, i: run.client.get(reverse("transaction-list"))),
+	Scenario("transaction_search", lambda run, i: run.client.get(reverse("transaction-search"), {"q": run.search_term})),
+	Scenario("transaction_create", _create),
+	Scenario("transaction_update", _update),
+	Scenario("transaction_delete", _delete),
+	Scenario("savings_add", _savings_add),
+	Scenario("savings_projection", lambda run, i: run.client.get(reverse("savingsgoal-projection"))),
+]
+
+
+def measure(scenario, run, iterations, memory_iterations=3):
+	"""Time ``iterations`` requests, then re-run a few under tracemalloc for peak memory.
+
+	Memory is sampled separately because tracemalloc slows every allocation and
+	would distort the latency figures.
+	"""
+	latencies = []
+	queries = []
+	errors = 0
+	for i in range(iterations):
+		counter = QueryCounter()
+		with connection.execute_wrapper(counter):
+			started = time.perf_counter()
+			response = scenario.request(run, i)
+			latencies.append(time.perf_counter() - started)
+		queries.append(counter.count)
+		errors += response.status_code >= 400
+
+	tracemalloc.start()
+	try:
+		peak = 0
+		for i in range(iterations, iterations + memory_iterations):
+			tracemalloc.reset_peak()
+			scenario.request(run, i)
+			peak = max(peak, tracemalloc.get_traced_memory()[1])
+	finally:
+		tracemalloc.stop()
+
+	latencies.sort()
+	return {
+		"requests": iterations,
+		"errors": errors,
+		"p50_ms": round(percentile(latencies, 50) * 1000, 3),
+		"p95_ms": round(percentile(latencies, 95) * 1000, 3),
+		"p99_ms": round(percentile(latencies, 99) * 1000, 3),
+		"queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0,
+		"max_queries": max(queries, default=0),
+		"peak_memory_kb": round(peak / 1024, 1),
+	}
+
+
+def run_scenarios(dataset, iterations=50, names=None, memory_iterations=3):
+	run = BenchmarkRun(dataset)
+	results = {}
+	for scenario in SCENARIOS:
+		if names and scenario.name not in names:
+			continue
+		if scenario.name == "transaction_update" and not run.created:
+			_create(run, 0)
+		if scenario.name == "transaction_delete":
+			# Make sure there is one row to delete per request.
+			for i in range(len(run.created), iterations + memory_iterations):
+				_create(run, i)
+		results[scenario.name] = measure(scenario, run, iterations, memory_iterations)
+	return results
+
+
+def _best(function, repeat):
+	timings = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		function()
+		timings.append(time.perf_counter() - started)
+	return min(timings)
+
+
+def serializer_microbenchmark(user, rows=1000, repeat=5):
+	"""Best-of-``repeat`` time for DRF's TransactionSerializer vs the fast row serializer on one page."""
+	ordering = ("-date", "-created_at", "-id")
+	queryset = Transaction.objects.filter(user=user).order_by(*ordering)
+	instances = list(queryset.select_related("account", "category", "budget")[:rows])
+	fast = row_serializer(TransactionSerializer)
+	values = list(queryset.values(*fast.columns)[:rows])
+
+	drf = _best(lambda: TransactionSerializer(instances, many=True).data, repeat)
+	rows_seconds = _best(lambda: fast.serialize(values), repeat)
+	return {
+		"rows": len(values),
+		"drf_ms": round(drf * 1000, 3),
+		"fast_ms": round(rows_seconds * 1000, 3),
+		"speedup": round(drf / rows_seconds, 2) if rows_seconds else None,
+	}
+
+
+def format_microbenchmark(user, rows=1000, repeat=5):
+	"""Encode time and wire size of one transaction page as JSON vs columnar MessagePack, raw and compressed."""
+	fast = row_serializer(TransactionSerializer)
+	page = {"results": fast.serialize(Transaction.objects.filter(user=user).order_by("-date", "-created_at", "-id").values(*fast.columns)[:rows])}
+	encoders = {"json": TimedJSONRenderer().render, "msgpack": columnar.packb}
+	report = {"rows": len(page["results"])}
+	for name, encode in encoders.items():
+		body = encode(page)
+		report[name] = {
+			"encode_ms": round(_best(lambda: encode(page), repeat) * 1000, 3),
+			"bytes": len(body),
+			"gzip_bytes": len(compression.compress_body("gzip", body)),
+			"br_bytes": len(compression.compress_body("br", body)),
+		}
+	return report
+
+
+def environment():
+	return {
+		"python": platform.python_version(),
+		"django": django.get_version(),
+		"database": connection.vendor,
+	}
+
+
+def compare(baseline, current, latency_tolerance=0.25, names=None):
+	"""Return human-readable regressions of ``current`` against ``baseline``.
+
+	Query counts are deterministic and may not grow at all; p95 latency may grow
+	by ``latency_tolerance`` (a fraction) before it counts. ``names`` limits the
+	diff to the scenarios that were run.
+	"""
+	regressions = []
+	for name, base in baseline.get("scenarios", {}).items():
+		if names and name not in names:
+			continue
+		now = current["scenarios"].get(name)
+		if now is None:
+			regressions.append(f"{name}: missing from this run")
+			continue
+		if now["max_queries"] > base["max_queries"]:
+			regressions.append(f"{name}: queries {base['max_queries']} -> {now['max_queries']}")
+		if now["errors"] > base["errors"]:
+			regressions.append(f"{name}: errors {base['errors']} -> {now['errors']}")
+		if base["p95_ms"] and now["p95_ms"] > base["p95_ms"] * (1 + latency_tolerance):
+			regressions.append(f"{name}: p95 {base['p95_ms']:.1f} ms -> {now['p95_ms']:.1f} ms")
+	return regressions
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FilteredRelation, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Budget, BudgetPeriod, Category
+
+
+# Budgets moved onto the new month per transaction by ``roll_all``.
+ROLL_BATCH_SIZE = 500
+
+
+def month_start(value):
+	return value.replace(day=1)
+
+
+def budget_deltas(entries):
+	"""Fold ledger entries into ``{(budget_id, month): spend delta}``; only expenses count as spend."""
+	deltas = defaultdict(Decimal)
+	for item in entries:
+		if item.budget_id is not None and item.transaction_type == Category.TYPE_EXPENSE:
+			deltas[(item.budget_id, month_start(item.date))] += item.sign * item.amount
+	return deltas
+
+
+def apply_budget_deltas(deltas):
+	"""Add spend deltas to the matching budget periods, and to the budget itself for its current period.
+
+	Must run inside the caller's atomic block. Budgets are visited in a fixed
+	order so concurrent writers lock them consistently.
+	"""
+	now = timezone.now()
+	for budget_id, month in sorted(deltas):
+		delta = deltas[(budget_id, month)]
+		if not delta:
+			continue
+		periods = BudgetPeriod.objects.filter(budget_id=budget_id, month=month)
+		if not periods.update(spent_amount=F("spent_amount") + delta):
+			allocated = Budget.objects.filter(pk=budget_id).values_list("allocated_amount", flat=True).first()
+			if allocated is None:
+				continue
+			try:
+				with transaction.atomic():
+					BudgetPeriod.objects.create(budget_id=budget_id, month=month, allocated_amount=allocated, spent_amount=delta)
+			except IntegrityError:
+				periods.update(spent_amount=F("spent_amount") + delta)
+		Budget.objects.filter(pk=budget_id, current_period=month).update(
+			spent_amount=F("spent_amount") + delta,
+			remaining_amount=F("remaining_amount") - delta,
+			updated_at=now,
+		)
+
+
+def roll_forward(budgets, today=None):
+	"""Move budgets whose current period has ended onto this month and close their old periods.
+
+	This writes, so it runs on budget writes and from ``roll_budgets``, never
+	on reads; reads use ``current_rows`` and friends instead. A no-op single
+	query unless a month boundary has passed since the budgets were last
+	touched. The new month's spend comes from its period row, which
+	transactions dated in that month have already been updating.
+	"""
+	month = month_start(today or timezone.localdate())
+	stale = list(budgets.filter(current_period__lt=month).values_list("pk", flat=True))
+	if not stale:
+		return 0
+	now = timezone.now()
+	with transaction.atomic():
+		for budget in Budget.objects.filter(pk__in=stale, current_period__lt=month).select_for_update().order_by("pk"):
+			BudgetPeriod.objects.filter(budget=budget, month__lt=month, closed_at__isnull=True).update(closed_at=now)
+			period, _ = BudgetPeriod.objects.get_or_create(budget=budget, month=month, defaults={"allocated_amount": budget.allocated_amount})
+			budget.current_period = month
+			budget.spent_amount = period.spent_amount
+			budget.save(update_fields=["current_period", "spent_amount", "remaining_amount", "updated_at"])
+	return len(stale)
+
+
+def roll_all(today=None, batch_size=ROLL_BATCH_SIZE):
+	"""Roll every stale budget forward, ``batch_size`` per transaction; returns how many moved."""
+	month = month_start(today or timezone.localdate())
+	rolled = 0
+	while True:
+		ids = list(Budget.objects.filter(current_period__lt=month).order_by("pk").values_list("pk", flat=True)[:batch_size])
+		if not ids:
+			return rolled
+		rolled += roll_forward(Budget.objects.filter(pk__in=ids), today)
+
+
+def _this_month_spend(stale_ids, month):
+	if not stale_ids:
+		return {}
+	return dict(BudgetPeriod.objects.filter(budget_id__in=stale_ids, month=month).values_list("budget_id", "spent_amount"))
+
+
+def current_rows(rows, today=None):
+	"""Budget ``.values()`` rows as of this month, without writing anything.
+
+	A budget still on an ended period shows this month's spend, from the period
+	row transactions have opened (or nothing), against its allocation, as
+	``roll_forward`` would store it. Costs one query, and only when a row is stale.
+	"""
+	month = month_start(today or timezone.localdate())
+	rows = list(rows)
+	stale = [row for row in rows if row["current_period"] < month]
+	spend = _this_month_spend([row["id"] for row in stale], month)
+	for row in stale:
+		row["current_period"] = month
+		row["spent_amount"] = spend.get(row["id"], Decimal("0"))
+		row["remaining_amount"] = row["allocated_amount"] - row["spent_amount"]
+	return rows
+
+
+def current_budget(budget, today=None):
+	"""``current_rows`` for a single ``Budget`` instance, updated in memory only."""
+	month = month_start(today or timezone.localdate())
+	if budget.current_period < month:
+		budget.current_period = month
+		budget.spent_amount = _this_month_spend([budget.pk], month).get(budget.pk, Decimal("0"))
+		budget.remaining_amount = budget.allocated_amount - budget.spent_amount
+	return budget
+
+
+def with_current_spend(budgets, today=None):
+	"""Annotate ``current_spent``, each budget's spend this month, for aggregating without rolling anything."""
+	month = month_start(today or timezone.localdate())
+	return budgets.annotate(
+		this_month=FilteredRelation("periods", condition=Q(periods__month=month)),
+		current_spent=Case(
+			When(current_period__lt=month, then=Coalesce(F("this_month__spent_amount"), Value(Decimal("0")))),
+			default=F("spent_amount"),
+		),
+	)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import time
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .models import Category
+
+
+VERSION_KEY = "finance:categories:version"
+ROWS_KEY = "finance:categories:rows:{version}"
+FIELDS = ("id", "name", "type")
+
+# How long a process trusts its own copy before re-reading the shared version.
+LOCAL_TTL = 5.0
+# Upper bound on staleness when the cache is not shared between processes (e.g. LocMemCache):
+# the version token expires and the next reader reloads from the database.
+VERSION_TTL = 300
+
+Snapshot = namedtuple("Snapshot", "version rows by_id by_type etag checked_at")
+
+
+class CategoryCatalogue:
+	"""Two-level cache of the category table.
+
+	A process-local snapshot answers lookups without any I/O; it is re-checked
+	against a version token in the Django cache every ``LOCAL_TTL`` seconds, and
+	the rows themselves are shared between processes under that version. Writes
+	replace the version token (see ``finance.signals``), which retires every
+	copy at once.
+	"""
+
+	def __init__(self):
+		self._snapshot = None
+
+	def snapshot(self):
+		current = self._snapshot
+		now = time.monotonic()
+		if current is not None and now - current.checked_at < LOCAL_TTL:
+			return current
+
+		version = cache.get(VERSION_KEY)
+		if version is None:
+			cache.add(VERSION_KEY, uuid.uuid4().hex, VERSION_TTL)
+			version = cache.get(VERSION_KEY)
+		if current is not None and current.version == version:
+			self._snapshot = current._replace(checked_at=now)
+			return self._snapshot
+
+		key = ROWS_KEY.format(version=version)
+		rows = cache.get(key)
+		if rows is None:
+			rows = list(Category.objects.order_by("id").values(*FIELDS))
+			cache.set(key, rows, VERSION_TTL)
+		self._snapshot = self._build(version, rows, now)
+		return self._snapshot
+
+	def lookup(self, category_type=None):
+		"""Return ``{id: Category}``, optionally limited to one type."""
+		snapshot = self.snapshot()
+		if category_type is None:
+			return snapshot.by_id
+		return snapshot.by_type.get(category_type, {})
+
+	def invalidate(self):
+		cache.set(VERSION_KEY, uuid.uuid4().hex, VERSION_TTL)
+		self._snapshot = None
+
+	@staticmethod
+	def _build(version, rows, checked_at):
+		by_id = {row["id"]: Category.from_db("default", FIELDS, [row[name] for name in FIELDS]) for row in rows}
+		by_type = {}
+		for pk, category in by_id.items():
+			by_type.setdefault(category.type, {})[pk] = category
+		body = json.dumps(rows, separators=(",", ":"), sort_keys=True).encode("utf-8")
+		return Snapshot(version, rows, by_id, by_type, hashlib.sha1(body).hexdigest(), checked_at)
+
+
+categories = CategoryCatalogue()
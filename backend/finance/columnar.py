@@ -0,0 +1,90 @@
+import msgpack
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# MessagePack extension type holding one columnar block.
+COLUMNAR_EXT = 1
+
+# Decimals, dates and other non-native values are converted the way the JSON renderer does.
+_default = JSONEncoder().default
+
+
+def _table_key(value):
+	try:
+		return tuple(value.items()), True
+	except TypeError:
+		return id(value), False
+
+
+def columnar(rows):
+	"""Turn a list of objects sharing the same keys into a column block, or return ``None``.
+
+	The block is ``{"keys": [...], "columns": [[...], ...], "tables": {key: [...]}}``.
+	A column named in ``tables`` is dictionary-encoded: the nested objects (the
+	account and category on every transaction) are stored once in the table and
+	the column holds their positions, with ``None`` left as is.
+	"""
+	if len(rows) < 2 or not all(isinstance(row, dict) for row in rows):
+		return None
+	keys = rows[0].keys()
+	if any(row.keys() != keys for row in rows):
+		return None
+	keys = list(keys)
+	columns = []
+	tables = {}
+	for key in keys:
+		values = [row[key] for row in rows]
+		if not any(isinstance(value, dict) for value in values) or not all(value is None or isinstance(value, dict) for value in values):
+			columns.append(values)
+			continue
+		table = []
+		positions = {}
+		column = []
+		for value in values:
+			if value is None:
+				column.append(None)
+				continue
+			marker = _table_key(value)
+			position = positions.get(marker)
+			if position is None:
+				position = positions[marker] = len(table)
+				table.append(value)
+			column.append(position)
+		tables[key] = table
+		columns.append(column)
+	return {"keys": keys, "columns": columns, "tables": tables}
+
+
+def _encode(data):
+	if isinstance(data, dict):
+		return {key: _encode(value) for key, value in data.items()}
+	if isinstance(data, list):
+		block = columnar(data)
+		if block is not None:
+			return msgpack.ExtType(COLUMNAR_EXT, msgpack.packb(block, default=_default))
+		return [_encode(value) for value in data]
+	return data
+
+
+def _ext_hook(code, data):
+	if code != COLUMNAR_EXT:
+		return msgpack.ExtType(code, data)
+	block = msgpack.unpackb(data, ext_hook=_ext_hook)
+	try:
+		keys, columns, tables = block["keys"], block["columns"], block["tables"]
+		for key, table in tables.items():
+			column = columns[keys.index(key)]
+			columns[keys.index(key)] = [None if position is None else table[position] for position in column]
+		return [dict(zip(keys, values)) for values in zip(*columns)]
+	except (KeyError, IndexError, TypeError, ValueError, AttributeError) as exc:
+		raise ValueError(f"malformed columnar block: {exc}")
+
+
+def packb(data):
+	"""Encode API data as MessagePack, packing every list of uniform objects as a column block."""
+	return msgpack.packb(_encode(data), default=_default)
+
+
+def unpackb(content):
+	"""Decode ``packb`` output (or plain MessagePack) back into lists and dicts."""
+	return msgpack.unpackb(content, ext_hook=_ext_hook)
@@ -0,0 +1,109 @@
+import re
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "application/x-ndjson", "text/")
+# Random gzip filename padding, as in django.middleware.gzip, against BREACH-style length probes.
+MAX_RANDOM_BYTES = 100
+
+_accept_encoding_re = re.compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def choose_encoding(header):
+	"""Pick ``"br"`` or ``"gzip"`` from an Accept-Encoding header, preferring brotli on equal weight."""
+	weights = {}
+	for part in header.split(","):
+		match = _accept_encoding_re.match(part)
+		if match:
+			try:
+				weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+			except ValueError:
+				continue
+	wildcard = weights.get("*", 0.0)
+	best = max(("br", "gzip"), key=lambda name: weights.get(name, wildcard))
+	return best if weights.get(best, wildcard) > 0 else None
+
+
+def brotli_quality():
+	return getattr(settings, "FINANCE_BROTLI_QUALITY", 4)
+
+
+def _brotli_sequence(sequence):
+	compressor = brotli.Compressor(quality=brotli_quality())
+	for chunk in sequence:
+		data = compressor.process(chunk)
+		if data:
+			yield data
+	yield compressor.finish()
+
+
+async def _abrotli_sequence(sequence):
+	compressor = brotli.Compressor(quality=brotli_quality())
+	async for chunk in sequence:
+		data = compressor.process(chunk)
+		if data:
+			yield data
+	yield compressor.finish()
+
+
+def _gzip_sequence(sequence):
+	return compress_sequence(sequence, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+async def _agzip_sequence(sequence):
+	# compress_sequence only takes sync iterables.
+	compressor = zlib.compressobj(wbits=31)
+	async for chunk in sequence:
+		data = compressor.compress(chunk)
+		if data:
+			yield data
+	yield compressor.flush()
+
+
+def compress_body(encoding, content):
+	if encoding == "br":
+		return brotli.compress(content, quality=brotli_quality())
+	return compress_string(content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def compress(request, response):
+	"""Compress a large API response with brotli or gzip, following the request's Accept-Encoding.
+
+	Bodies under ``FINANCE_COMPRESS_MIN_BYTES`` are left alone: the framing
+	costs more than it saves. Strong ETags are weakened, since the bytes now
+	depend on the encoding.
+	"""
+	content_type = response.get("Content-Type", "")
+	if response.has_header("Content-Encoding") or not content_type.startswith(COMPRESSIBLE_TYPES):
+		return response
+	patch_vary_headers(response, ("Accept-Encoding",))
+	encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+	if encoding is None:
+		return response
+
+	if response.streaming:
+		if response.is_async:
+			stream = _abrotli_sequence if encoding == "br" else _agzip_sequence
+		else:
+			stream = _brotli_sequence if encoding == "br" else _gzip_sequence
+		response.streaming_content = stream(response.streaming_content)
+		del response["Content-Length"]
+	else:
+		if len(response.content) < getattr(settings, "FINANCE_COMPRESS_MIN_BYTES", 1024):
+			return response
+		compressed = compress_body(encoding, response.content)
+		if len(compressed) >= len(response.content):
+			return response
+		response.content = compressed
+		response["Content-Length"] = str(len(compressed))
+
+	etag = response.get("ETag")
+	if etag and etag.startswith('"'):
+		response["ETag"] = "W/" + etag
+	response["Content-Encoding"] = encoding
+	return response
@@ -0,0 +1,63 @@
+import csv
+import json
+
+from .models import Transaction
+
+
+EXPORT_COLUMNS = (
+	("id", "id"),
+	("date", "date"),
+	("description", "description"),
+	("amount", "amount"),
+	("type", "transaction_type"),
+	("account_id", "account_id"),
+	("account", "account__name"),
+	("category", "category__name"),
+	("category_type", "category__type"),
+	("budget_id", "budget_id"),
+)
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+	"""File-like object whose ``write`` just hands the line back to the caller."""
+
+	def write(self, value):
+		return value
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+	"""Yield flat tuples for ``EXPORT_COLUMNS`` using a server-side cursor where available."""
+	lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+	return queryset.order_by("date", "created_at", "id").values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows):
+	writer = csv.writer(_Echo())
+	yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+	for row in rows:
+		yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+	names = [name for name, _ in EXPORT_COLUMNS]
+	for row in rows:
+		yield json.dumps(dict(zip(names, row)), default=str, separators=(",", ":")) + "\n"
+
+
+EXPORT_FORMATS = {
+	"csv": (stream_csv, "text/csv"),
+	"ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+def transactions_for_export(user, account=None, date_after=None, date_before=None):
+	queryset = Transaction.objects.filter(user=user)
+	if account is not None:
+		queryset = queryset.filter(account_id=account)
+	if date_after is not None:
+		queryset = queryset.filter(date__gte=date_after)
+	if date_before is not None:
+		queryset = queryset.filter(date__lte=date_before)
+	return queryset
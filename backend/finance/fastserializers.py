@@ -0,0 +1,203 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .metrics import timed
+from .serializers import TransactionSerializer
+
+
+def _decimal(field):
+	# Same result as DecimalField.to_representation for values that fit the column.
+	if not getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING) or field.localize:
+		return field.to_representation
+	exponent = Decimal(1).scaleb(-field.decimal_places)
+
+	def formatter(value):
+		if not isinstance(value, Decimal):
+			value = Decimal(str(value).strip())
+		return "{:f}".format(value.quantize(exponent))
+	return formatter
+
+
+def _date(field):
+	if getattr(field, "format", api_settings.DATE_FORMAT).lower() != "iso-8601":
+		return field.to_representation
+	return lambda value: value.isoformat()
+
+
+def _big_integer(field):
+	if getattr(field, "coerce_to_string", api_settings.COERCE_BIGINT_TO_STRING):
+		return str
+	return None
+
+
+def _identity(field):
+	return None
+
+
+def _iso_datetime(field):
+	# ISO datetimes in the current timezone are rendered inline (kind DATETIME); anything else goes through DRF.
+	return getattr(field, "format", api_settings.DATETIME_FORMAT).lower() == "iso-8601" and not hasattr(field, "timezone")
+
+
+# Formatter factories by exact DRF field class; ``None`` means the DB value is already the output.
+FORMATTERS = {
+	serializers.DecimalField: _decimal,
+	serializers.DateField: _date,
+	serializers.BigIntegerField: _big_integer,
+	serializers.IntegerField: _identity,
+	serializers.CharField: _identity,
+	serializers.ChoiceField: _identity,
+}
+
+
+def _budget_summary(row):
+	# Mirrors TransactionSerializer.get_budget, raw Decimals included.
+	if row["budget__id"] is None:
+		return None
+	return {
+		"id": row["budget__id"],
+		"category": row["budget__category"],
+		"allocated_amount": row["budget__allocated_amount"],
+		"remaining_amount": row["budget__remaining_amount"],
+		"spent_amount": row["budget__spent_amount"],
+	}
+
+
+# SerializerMethodFields have no declarative shape; each needs its columns and a row function.
+METHOD_FIELDS = {
+	(TransactionSerializer, "budget"): (
+		("budget__id", "budget__category", "budget__allocated_amount", "budget__remaining_amount", "budget__spent_amount"),
+		_budget_summary,
+	),
+}
+
+
+# Step kinds: copy the column, format it, render an ISO datetime, render a nested serializer, or call a row function.
+RAW, FORMAT, DATETIME, NESTED, METHOD = range(5)
+
+
+def _zulu(text):
+	return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _getter(column, kind, function):
+	"""``get(row, tz)`` for one plan step."""
+	if kind == RAW:
+		return lambda row, tz: row[column]
+	if kind == FORMAT:
+		return lambda row, tz: None if (value := row[column]) is None else function(value)
+	if kind == DATETIME:
+		return lambda row, tz: None if (value := row[column]) is None else _zulu(value.astimezone(tz).isoformat())
+	if kind == NESTED:
+		render = RowSerializer._build(function)
+		return lambda row, tz: None if row[column] is None else render(row, tz)
+	return lambda row, tz: function(row)
+
+
+class RowSerializer:
+	"""Read-only twin of a ``ModelSerializer`` that renders ``.values()`` rows.
+
+	The serializer's readable fields are compiled once into a plan of
+	``(key, column, kind, function)`` steps, nested serializers becoming ``__``
+	columns, and each step into a small getter closed over its column and
+	formatter. Rendering a row is one pass over those getters instead of DRF's
+	per-field ``get_attribute`` / ``to_representation`` walk. The output is identical to the serializer's,
+	which ``FastSerializerParityTests`` checks.
+	"""
+
+	def __init__(self, serializer_class, fields=None):
+		serializer = serializer_class()
+		self.columns = []
+		self.steps = self._compile(serializer_class, serializer, "", fields)
+		self.render = self._build(self.steps)
+
+	def _compile(self, serializer_class, serializer, prefix, only):
+		steps = []
+		for name, field in serializer.fields.items():
+			if field.write_only or (only is not None and name not in only):
+				continue
+			column = prefix + field.source.replace(".", "__")
+			if isinstance(field, serializers.ModelSerializer):
+				pk_column = f"{column}__{field.Meta.model._meta.pk.name}"
+				self._use(pk_column)
+				nested = self._compile(type(field), field, column + "__", None)
+				steps.append((name, pk_column, NESTED, nested))
+			elif isinstance(field, serializers.SerializerMethodField):
+				try:
+					columns, function = METHOD_FIELDS[(serializer_class, name)]
+				except KeyError:
+					raise TypeError(f"{serializer_class.__name__}.{name} has no row implementation in METHOD_FIELDS")
+				for method_column in columns:
+					self._use(method_column)
+				steps.append((name, None, METHOD, function))
+			else:
+				self._use(column)
+				if type(field) is serializers.DateTimeField and _iso_datetime(field):
+					steps.append((name, column, DATETIME, None))
+					continue
+				factory = FORMATTERS.get(type(field))
+				formatter = factory(field) if factory else field.to_representation
+				steps.append((name, column, RAW if formatter is None else FORMAT, formatter))
+		return steps
+
+	def _use(self, column):
+		if column not in self.columns:
+			self.columns.append(column)
+
+	@staticmethod
+	def _build(steps):
+		"""Turn a plan into ``render(row, tz)``, a loop over a tuple of ``(key, getter)`` pairs."""
+		getters = tuple((key, _getter(column, kind, function)) for key, column, kind, function in steps)
+
+		def render(row, tz):
+			return {key: get(row, tz) for key, get in getters}
+		return render
+
+	def to_representation(self, row):
+		return self.render(row, timezone.get_current_timezone())
+
+	def serialize(self, rows):
+		with timed("serialize"):
+			render = self.render
+			tz = timezone.get_current_timezone()
+			return [render(row, tz) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def row_serializer(serializer_class, fields=None):
+	"""Compiled ``RowSerializer`` for a serializer class and optional field projection (a tuple)."""
+	return RowSerializer(serializer_class, fields)
+
+
+class FastListMixin:
+	"""Serve ``list`` from ``.values()`` rows through a compiled ``RowSerializer``."""
+
+	def list(self, request, *args, **kwargs):
+		rows = self.fast_serializer()
+		queryset = self.filter_queryset(self.get_queryset()).values(*self.fast_columns(rows))
+		page = self.paginate_queryset(queryset)
+		if page is not None:
+			return self.get_paginated_response(rows.serialize(self.list_rows(page)))
+		return Response(rows.serialize(self.list_rows(queryset)))
+
+	def fast_serializer(self):
+		fields = self.list_fields()
+		return row_serializer(self.get_serializer_class(), tuple(fields) if fields is not None else None)
+
+	def fast_columns(self, rows):
+		# Keyset pagination reads its cursor from the row, so it needs the sort columns too.
+		ordering = getattr(self.paginator, "ordering", ())
+		return rows.columns + [name.lstrip("-") for name in ordering if name.lstrip("-") not in rows.columns]
+
+	def list_rows(self, rows):
+		"""Hook to adjust the ``.values()`` rows before they are rendered."""
+		return rows
+
+	def list_fields(self):
+		"""Readable fields to render, or ``None`` for all of them."""
+		return None
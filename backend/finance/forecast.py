@@ -0,0 +1,273 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+
+import django
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .balances import SIGNED_AMOUNT
+from .models import Account, CashFlowForecast, Transaction
+from .recurring import add_months
+
+
+# Recurring cadences: (name, days between occurrences, allowed drift in days). Months run 28-31 days.
+CADENCES = (("week", 7, 1), ("2 weeks", 14, 1), ("month", 30, 3))
+MIN_OCCURRENCES = 3
+# Recurring amounts are detected over this recent window; the level is the average of the last LEVEL_DAYS.
+RECURRING_DAYS = 180
+LEVEL_DAYS = 90
+# Seasonal offsets need this many observations before they count; month-of-year offsets need a year of history.
+MIN_WEEKDAY_DAYS = 4
+MIN_MONTH_DAYS = 28
+MIN_SEASON_DAYS = 365
+
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday; numpy day numbers start there.
+
+
+def horizon():
+	return getattr(settings, "FINANCE_FORECAST_DAYS", 90)
+
+
+def history_days():
+	return getattr(settings, "FINANCE_FORECAST_HISTORY_DAYS", 730)
+
+
+def _calendar(first, days):
+	"""Weekday (Monday 0) and month (January 0) index of ``days`` consecutive dates from ``first``."""
+	numbers = np.arange(days) + np.datetime64(first, "D").astype(np.int64)
+	months = numbers.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+	return (numbers + _EPOCH_WEEKDAY) % 7, months
+
+
+def _occurrences(last, cadence, step, until):
+	"""Projected dates of a recurring amount after ``last`` up to ``until``."""
+	dates = []
+	n = 1
+	while True:
+		day = add_months(last, n) if cadence == "month" else last + timedelta(days=step * n)
+		if day > until:
+			return dates
+		dates.append(day)
+		n += 1
+
+
+def _recurring(account_index, days, cents, today_index):
+	"""Find amounts repeating on a regular cadence in the recent window.
+
+	Rows are grouped by (account, amount in cents); a group of at least
+	``MIN_OCCURRENCES`` whose every gap fits one cadence, and which is not
+	overdue, is recurring. Returns ``[(account index, cents, cadence, step, last day index)]``.
+	"""
+	recent = days > today_index - RECURRING_DAYS
+	account_index, days, cents = account_index[recent], days[recent], cents[recent]
+	if not len(days):
+		return []
+	order = np.lexsort((days, cents, account_index))
+	account_index, days, cents = account_index[order], days[order], cents[order]
+	starts = np.flatnonzero(np.r_[True, (account_index[1:] != account_index[:-1]) | (cents[1:] != cents[:-1])])
+	sizes = np.diff(np.r_[starts, len(days)])
+
+	found = []
+	for start, size in zip(starts[sizes >= MIN_OCCURRENCES], sizes[sizes >= MIN_OCCURRENCES]):
+		group = np.unique(days[start:start + size])
+		gaps = np.diff(group)
+		for cadence, step, drift in CADENCES:
+			if len(gaps) >= MIN_OCCURRENCES - 1 and np.all(np.abs(gaps - step) <= drift) and today_index - group[-1] <= step + drift:
+				found.append((int(account_index[start]), int(cents[start]), cadence, step, int(group[-1])))
+				break
+	return found
+
+
+def _mean(values, mask, axis=1):
+	counts = mask.sum(axis=axis)
+	return np.where(counts > 0, (values * mask).sum(axis=axis) / np.maximum(counts, 1), 0.0)
+
+
+def project(balances, rows, as_of, days=None, history=None):
+	"""Project account balances ``days`` ahead from their recent daily flows.
+
+	``balances`` are the current balances (one per account) and ``rows`` the
+	``(account index, date, signed amount)`` transactions from ``history``
+	days back onwards, future-dated ones included. Each account's daily flow
+	is projected as:
+
+	- recurring amounts (same amount on a weekly, fortnightly or monthly
+	  cadence) on their next dates; ones due today or overdue on the first day,
+	- transactions already entered for future dates, on their dates,
+	- everything else as the average daily flow of the last ``LEVEL_DAYS``,
+	  shifted by the account's weekday and month-of-year offsets.
+
+	Returns ``(points, lowest, level, recurring)``: an ``accounts x days``
+	balance matrix, each account's lowest projected balance, the daily level
+	and the recurring amounts found.
+	"""
+	days = days or horizon()
+	history = history or history_days()
+	count = len(balances)
+	first = as_of - timedelta(days=history - 1)
+	today = history - 1
+
+	account_index = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+	day_index = np.fromiter(((row[1] - first).days for row in rows), dtype=np.int64, count=len(rows))
+	amounts = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+	cents = np.rint(amounts * 100).astype(np.int64)
+	past = day_index <= today
+
+	recurring = _recurring(account_index[past], day_index[past], cents[past], today)
+	# Recurring amounts are projected on their own; keep them out of the level and the seasonal offsets.
+	keys = account_index * (1 << 40) + cents
+	repeating = np.isin(keys, [index * (1 << 40) + amount for index, amount, *_ in recurring]) & past
+	flows = np.zeros((count, history))
+	np.add.at(flows, (account_index[past & ~repeating], day_index[past & ~repeating]), amounts[past & ~repeating])
+
+	# Days before an account's first transaction are not zero-flow days; leave them out of every average.
+	opened = np.full(count, today + 1)
+	np.minimum.at(opened, account_index[past], day_index[past])
+	seen = np.arange(history)[None, :] >= opened[:, None]
+
+	weekday, month = _calendar(first, history)
+	weekdays = np.eye(7)[weekday]
+	months = np.eye(12)[month]
+	overall = _mean(flows, seen)
+	weekday_counts = seen @ weekdays
+	weekday_offset = np.where(weekday_counts >= MIN_WEEKDAY_DAYS, (flows * seen) @ weekdays / np.maximum(weekday_counts, 1) - overall[:, None], 0.0)
+	month_counts = seen @ months
+	month_offset = np.where(
+		(month_counts >= MIN_MONTH_DAYS) & (seen.sum(axis=1) >= MIN_SEASON_DAYS)[:, None],
+		(flows * seen) @ months / np.maximum(month_counts, 1) - overall[:, None],
+		0.0,
+	)
+
+	# The recent average already carries the recent days' seasonal offsets; take them out before adding the future's.
+	window = seen & (np.arange(history) > today - LEVEL_DAYS)[None, :]
+	seasonal = weekday_offset[:, weekday] + month_offset[:, month]
+	level = _mean(flows, window) - _mean(seasonal, window)
+
+	future_weekday, future_month = _calendar(as_of + timedelta(days=1), days)
+	daily = level[:, None] + weekday_offset[:, future_weekday] + month_offset[:, future_month]
+
+	# Entered future transactions are already in the balance; start from before them and add each on its day.
+	future = ~past
+	start = np.asarray(balances, dtype=np.float64)
+	np.subtract.at(start, account_index[future], amounts[future])
+	ahead = future & (day_index <= today + days)
+	np.add.at(daily, (account_index[ahead], day_index[ahead] - today - 1), amounts[ahead])
+
+	found = []
+	for index, amount, cadence, step, last in recurring:
+		last_day = first + timedelta(days=last)
+		upcoming = _occurrences(last_day, cadence, step, as_of + timedelta(days=days))
+		for day in upcoming:
+			# An occurrence due today or a few days overdue has not landed yet; expect it on the first projected day.
+			daily[index, max((day - as_of).days - 1, 0)] += amount / 100
+		ahead = [day for day in upcoming if day > as_of]
+		found.append((index, amount / 100, cadence, ahead[0] if ahead else None))
+
+	points = start[:, None] + np.cumsum(daily, axis=1)
+	lowest = points.argmin(axis=1)
+	return points, lowest, level, found
+
+
+def _money(value):
+	return f"{value:.2f}"
+
+
+def stamp(user_id):
+	"""Fingerprint of the user's accounts: ledger writes and account edits all move ``updated_at``."""
+	summary = Account.objects.filter(user_id=user_id).aggregate(count=Count("id"), latest=Max("updated_at"))
+	latest = summary["latest"].isoformat() if summary["latest"] else "-"
+	return f"{summary['count']}:{latest}"
+
+
+def build(user_id, as_of=None):
+	"""Compute a user's forecast payload with two queries."""
+	as_of = as_of or timezone.localdate()
+	days, history = horizon(), history_days()
+	accounts = list(Account.objects.filter(user_id=user_id).order_by("id").values_list("id", "name", "balance"))
+	positions = {account_id: index for index, (account_id, _, _) in enumerate(accounts)}
+	rows = [
+		(positions[account_id], day, amount)
+		for account_id, day, amount in Transaction.objects.filter(user_id=user_id, date__gt=as_of - timedelta(days=history))
+		.annotate(signed=SIGNED_AMOUNT)
+		.values_list("account_id", "date", "signed")
+		.iterator(chunk_size=5000)
+		if account_id in positions
+	]
+	points, lowest, level, recurring = project([balance for _, _, balance in accounts], rows, as_of, days, history)
+
+	dates = [(as_of + timedelta(days=n + 1)).isoformat() for n in range(days)]
+	payload = []
+	for index, (account_id, name, balance) in enumerate(accounts):
+		payload.append({
+			"account": account_id,
+			"name": name,
+			"balance": _money(balance),
+			"daily_average": _money(level[index]),
+			"recurring": [
+				{"amount": _money(amount), "every": cadence, "next": upcoming.isoformat() if upcoming else None}
+				for found, amount, cadence, upcoming in recurring if found == index
+			],
+			"lowest": {"date": dates[lowest[index]], "balance": _money(points[index, lowest[index]])},
+			"points": [{"date": day, "balance": _money(value)} for day, value in zip(dates, points[index].tolist())],
+		})
+	return {"as_of": as_of.isoformat(), "days": days, "accounts": payload}
+
+
+def _computed(user_id, as_of):
+	# Fingerprint first: a write landing during the build leaves a stale stamp, so the next read recomputes.
+	current = stamp(user_id)
+	return CashFlowForecast(user_id=user_id, as_of=as_of, stamp=current, payload=build(user_id, as_of))
+
+
+def _save(forecasts):
+	CashFlowForecast.objects.bulk_create(
+		forecasts,
+		update_conflicts=True,
+		unique_fields=["user"],
+		update_fields=["as_of", "stamp", "payload", "generated_at"],
+	)
+
+
+def store(user_id, as_of=None):
+	"""Compute and save a user's forecast; returns the payload."""
+	forecast = _computed(user_id, as_of or timezone.localdate())
+	_save([forecast])
+	return forecast.payload
+
+
+def for_user(user_id):
+	"""The user's forecast for today: the stored one while their accounts are unchanged, else a fresh one."""
+	as_of = timezone.localdate()
+	stored = CashFlowForecast.objects.filter(user_id=user_id, as_of=as_of, stamp=stamp(user_id)).values_list("payload", flat=True).first()
+	return stored if stored is not None else store(user_id, as_of)
+
+
+def _compute_users(user_ids, as_of):
+	return [_computed(user_id, as_of) for user_id in user_ids]
+
+
+def run_batch(workers=None, chunk_size=200, as_of=None):
+	"""Precompute every account holder's forecast, ``chunk_size`` users per task, in a process pool.
+
+	Workers only read and compute; this process saves each finished chunk
+	with one upsert, so the database sees a single writer. With one worker
+	(or one chunk) everything runs in this process. Pool workers set Django
+	up themselves and open their own database connections.
+	"""
+	as_of = as_of or timezone.localdate()
+	user_ids = list(Account.objects.order_by("user_id").values_list("user_id", flat=True).distinct())
+	chunks = [user_ids[n:n + chunk_size] for n in range(0, len(user_ids), chunk_size)]
+	if workers == 1 or len(chunks) <= 1:
+		for chunk in chunks:
+			_save(_compute_users(chunk, as_of))
+		return len(user_ids)
+	# Forked workers must not share the parent's connections.
+	connections.close_all()
+	with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+		for forecasts in pool.map(_compute_users, chunks, repeat(as_of)):
+			_save(forecasts)
+	return len(user_ids)
@@ -0,0 +1,216 @@
+import csv
+import hashlib
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import ledger
+from .catalogue import categories
+from .models import Category, Transaction
+
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y")
+UNDECODABLE = "\ufffd"
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportRowError(ValueError):
+	pass
+
+
+def parse_csv(lines):
+	"""Yield ``(line_number, record)`` from a CSV statement with a header row.
+
+	Recognised columns: ``date``, ``description``, ``amount`` (signed; negative
+	is an expense), and optionally ``category``, ``type`` and ``id``.
+	"""
+	reader = csv.DictReader(lines)
+	if reader.fieldnames is None:
+		return
+	reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+	for row in reader:
+		yield reader.line_num, {
+			"date": row.get("date"),
+			"description": row.get("description") or row.get("memo") or "",
+			"amount": row.get("amount"),
+			"category": row.get("category"),
+			"type": row.get("type"),
+			"fitid": row.get("id"),
+		}
+
+
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+_OFX_OPEN = re.compile(r"<STMTTRN>", re.IGNORECASE)
+_OFX_CLOSE = re.compile(r"</STMTTRN>", re.IGNORECASE)
+# Longest tag minus one: how much of a buffer's tail may be the start of a tag split across reads.
+_OFX_TAG_TAIL = len("</STMTTRN>") - 1
+OFX_CHUNK_SIZE = 64 * 1024
+
+
+def _chunks(source, size):
+	# File objects are read in fixed-size pieces; a one-line OFX file would otherwise come back whole.
+	if hasattr(source, "read"):
+		return iter(lambda: source.read(size), "")
+	return source
+
+
+def parse_ofx(source, chunk_size=OFX_CHUNK_SIZE):
+	"""Yield ``(ordinal, record)`` for each ``<STMTTRN>`` block of an OFX 1.x/2.x file.
+
+	``source`` is a text file, read ``chunk_size`` characters at a time, or
+	an iterable of text chunks. Only the unread remainder of the block in
+	progress is buffered, and each search resumes where the last one stopped,
+	so time is linear and memory constant in the size of the statement.
+	"""
+	buffer = ""
+	ordinal = 0
+	body = None  # Offset of the open block's text in buffer, once its <STMTTRN> has been seen.
+	scan = 0  # Offset the next tag search starts from.
+	for chunk in _chunks(source, chunk_size):
+		buffer += chunk
+		while True:
+			if body is None:
+				match = _OFX_OPEN.search(buffer, scan)
+				if match is None:
+					scan = max(len(buffer) - _OFX_TAG_TAIL, scan)
+					break
+				body = scan = match.end()
+			match = _OFX_CLOSE.search(buffer, scan)
+			if match is None:
+				scan = max(len(buffer) - _OFX_TAG_TAIL, body)
+				break
+			fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(buffer, body, match.start())}
+			body, scan = None, match.end()
+			ordinal += 1
+			yield ordinal, {
+				"date": (fields.get("DTPOSTED") or "")[:8],
+				"description": fields.get("NAME") or fields.get("MEMO") or "",
+				"amount": fields.get("TRNAMT"),
+				"category": None,
+				"type": None,
+				"fitid": fields.get("FITID"),
+			}
+		# Drop what has been read: all but the open block's text, or the tail a split tag may start in.
+		keep = scan if body is None else body
+		buffer = buffer[keep:]
+		scan -= keep
+		if body is not None:
+			body = 0
+
+
+PARSERS = {"csv": parse_csv, "ofx": parse_ofx}
+
+
+def parse_date(value):
+	value = (value or "").strip()
+	if re.fullmatch(r"\d{8}", value):
+		return datetime.strptime(value, "%Y%m%d").date()
+	for fmt in DATE_FORMATS:
+		try:
+			return datetime.strptime(value, fmt).date()
+		except ValueError:
+			continue
+	raise ImportRowError(f"Unrecognised date {value!r}")
+
+
+def parse_amount(value):
+	try:
+		amount = Decimal(str(value).strip().replace(",", "").replace("$", ""))
+	except (InvalidOperation, AttributeError):
+		raise ImportRowError(f"Invalid amount {value!r}")
+	if not amount.is_finite():
+		raise ImportRowError(f"Invalid amount {value!r}")
+	return amount.quantize(Decimal("0.01"))
+
+
+class TransactionImporter:
+	"""Load parsed statement records into one account in fixed-size batches.
+
+	Each batch is deduplicated against ``Transaction.import_hash``, written with
+	``bulk_create`` and reconciled into the account balance in the same DB
+	transaction, so an interrupted import leaves balances consistent with the
+	rows committed so far and a re-run only adds what is missing.
+	"""
+
+	default_batch_size = 1000
+
+	def __init__(self, user, account, batch_size=None):
+		self.user = user
+		self.account = account
+		self.batch_size = batch_size or self.default_batch_size
+		self.categories = {category.name.lower(): category for category in categories.lookup().values()}
+		self.fallback = {
+			Category.TYPE_INCOME: self.categories.get("other income"),
+			Category.TYPE_EXPENSE: self.categories.get("miscellaneous"),
+		}
+		self.summary = {"imported": 0, "duplicates": 0, "errors": [], "error_count": 0}
+		self._occurrences = {}
+
+	def run(self, records):
+		batch = []
+		for line, record in records:
+			try:
+				batch.append(self.build(record))
+			except ImportRowError as exc:
+				self.add_error(line, str(exc))
+				continue
+			if len(batch) >= self.batch_size:
+				self.flush(batch)
+				batch = []
+		if batch:
+			self.flush(batch)
+		return self.summary
+
+	def build(self, record):
+		# Uploads are decoded with errors="replace"; a line that was not valid UTF-8 is reported, not imported.
+		if any(UNDECODABLE in value for value in record.values() if value):
+			raise ImportRowError("Line is not valid UTF-8; re-export the statement as UTF-8")
+		when = parse_date(record["date"])
+		signed = parse_amount(record["amount"])
+		description = (record["description"] or "").strip()[:255]
+		category = self.categories.get((record["category"] or "").strip().lower())
+		# The direction comes from an explicit type column, else the sign; never from the category, so a refund
+		# filed under Groceries still credits the account.
+		kind = (record["type"] or "").strip().lower()
+		if kind not in (Category.TYPE_INCOME, Category.TYPE_EXPENSE):
+			kind = Category.TYPE_INCOME if signed > 0 else Category.TYPE_EXPENSE
+		return Transaction(
+			user=self.user,
+			account=self.account,
+			category=category or self.fallback[kind],
+			transaction_type=kind,
+			amount=abs(signed),
+			description=description,
+			date=when,
+			import_hash=self.fingerprint(when, signed, description, record["fitid"]),
+		)
+
+	def fingerprint(self, when, signed, description, fitid):
+		key = "|".join([str(self.account.pk), when.isoformat(), str(signed), description.lower(), (fitid or "").strip()])
+		# Identical lines are distinct entries; number them across the whole statement, wherever they
+		# appear, so re-imports hash the same way. One entry per distinct line.
+		seen = self._occurrences.get(key, 0)
+		self._occurrences[key] = seen + 1
+		return hashlib.sha256(f"{key}|{seen}".encode("utf-8")).hexdigest()
+
+	def flush(self, batch):
+		hashes = [row.import_hash for row in batch]
+		with transaction.atomic():
+			existing = set(Transaction.objects.filter(user=self.user, import_hash__in=hashes).values_list("import_hash", flat=True))
+			fresh = []
+			for row in batch:
+				# Skipping hashes already taken in this batch too keeps bulk_create clear of the unique constraint.
+				if row.import_hash not in existing:
+					existing.add(row.import_hash)
+					fresh.append(row)
+			Transaction.objects.bulk_create(fresh)
+			ledger.post(ledger.entry(row) for row in fresh)
+		self.summary["imported"] += len(fresh)
+		self.summary["duplicates"] += len(batch) - len(fresh)
+
+	def add_error(self, line, message):
+		self.summary["error_count"] += 1
+		if len(self.summary["errors"]) < MAX_REPORTED_ERRORS:
+			self.summary["errors"].append({"line": line, "error": message})
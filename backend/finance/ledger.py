@@ -0,0 +1,80 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from .balances import checkpoints_before, earliest_days
+from .budgets import apply_budget_deltas, budget_deltas
+from .models import Account, Category
+from .rollups import apply_rollup_deltas, rollup_deltas
+from .usercache import bump_on_commit
+
+
+LedgerEntry = namedtuple("LedgerEntry", "user_id account_id category_id budget_id date transaction_type amount sign")
+
+
+def entry(instance, sign=1):
+	"""Snapshot a transaction as a ledger entry; ``sign`` is ``1`` to apply it and ``-1`` to revert it.
+
+	Take the snapshot before mutating the instance: an update is the old row
+	reverted plus the new row applied.
+	"""
+	return LedgerEntry(
+		instance.user_id,
+		instance.account_id,
+		instance.category_id,
+		instance.budget_id,
+		instance.date,
+		instance.transaction_type,
+		instance.amount,
+		sign,
+	)
+
+
+def signed_amount(transaction_type, amount):
+	"""Return the effect of a transaction on its account balance."""
+	if transaction_type == Category.TYPE_INCOME:
+		return amount
+	return -amount
+
+
+def balance_deltas(entries):
+	"""Merge ledger entries into one balance delta per account."""
+	deltas = defaultdict(Decimal)
+	for item in entries:
+		deltas[item.account_id] += item.sign * signed_amount(item.transaction_type, item.amount)
+	return deltas
+
+
+def apply_balance_deltas(deltas, earliest=None):
+	"""Apply per-account balance deltas with ``UPDATE ... SET balance = balance + delta``.
+
+	Accounts are updated in primary-key order so two requests touching the same
+	pair of accounts always lock them in the same order and cannot deadlock.
+	The same statement retires balance checkpoints from each account's
+	``earliest`` written day, so accounts with a zero delta (a date or category
+	edit) are updated too.
+	"""
+	now = timezone.now()
+	earliest = earliest or {}
+	for account_id in sorted(deltas):
+		changes = {"balance": F("balance") + deltas[account_id], "updated_at": now}
+		if account_id in earliest:
+			changes["checkpoints_through"] = checkpoints_before(earliest[account_id])
+		Account.objects.filter(pk=account_id).update(**changes)
+
+
+def post(entries):
+	"""Apply ledger entries to account balances, budget spend and the monthly rollups.
+
+	The affected users' cached responses are retired once the transaction commits.
+
+	Must run inside the caller's ``transaction.atomic()`` block together with
+	the transaction row writes it describes.
+	"""
+	entries = list(entries)
+	apply_balance_deltas(balance_deltas(entries), earliest_days(entries))
+	apply_budget_deltas(budget_deltas(entries))
+	apply_rollup_deltas(rollup_deltas(entries))
+	bump_on_commit(*{item.user_id for item in entries})
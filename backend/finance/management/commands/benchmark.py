@@ -0,0 +1,106 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from finance import benchmark
+from finance.catalogue import categories
+
+
+class Command(BaseCommand):
+	help = (
+		"Generate a synthetic dataset in a throwaway test database and time scripted API scenarios "
+		"in-process. Reports p50/p95/p99 latency, queries per request and peak memory."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--transactions", type=int, default=1000, help="Transactions per user (10^3 to 10^6).")
+		parser.add_argument("--users", type=int, default=1)
+		parser.add_argument("--accounts", type=int, default=3)
+		parser.add_argument("--budgets", type=int, default=5)
+		parser.add_argument("--goals", type=int, default=3)
+		parser.add_argument("--seed", type=int, default=0)
+		parser.add_argument("--iterations", type=int, default=50, help="Timed requests per scenario.")
+		parser.add_argument("--scenario", action="append", dest="scenarios", choices=[s.name for s in benchmark.SCENARIOS])
+		parser.add_argument("--serializer-rows", type=int, default=1000, help="Rows for the serializer and response format microbenchmarks (0 skips them).")
+		parser.add_argument("--output", help="Write the results to this JSON file (a baseline).")
+		parser.add_argument("--compare", help="Baseline JSON to diff against; exits non-zero on regressions.")
+		parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Allowed p95 growth as a fraction.")
+
+	def handle(self, *args, **options):
+		baseline = None
+		if options["compare"]:
+			try:
+				baseline = json.loads(Path(options["compare"]).read_text())
+			except (OSError, ValueError) as exc:
+				raise CommandError(f"Cannot read baseline: {exc}")
+
+		setup_test_environment()
+		old_name = connection.settings_dict["NAME"]
+		connection.creation.create_test_db(verbosity=0, autoclobber=True)
+		try:
+			# A private cache keeps benchmark users from colliding with real users' cached data.
+			with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "finance-benchmark"}}):
+				categories.invalidate()
+				report = self.run(options)
+		finally:
+			connection.creation.destroy_test_db(old_name, verbosity=0)
+			teardown_test_environment()
+			categories.invalidate()
+
+		for name, row in report["scenarios"].items():
+			self.stdout.write(
+				f"{name:20} p50 {row['p50_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  p99 {row['p99_ms']:8.2f} ms  "
+				f"queries {row['queries_per_request']:5.1f}  peak {row['peak_memory_kb']:9.1f} KiB  errors {row['errors']}"
+			)
+		if "serializers" in report:
+			row = report["serializers"]
+			self.stdout.write(f"serializers: {row['rows']} rows  drf {row['drf_ms']:.2f} ms  fast {row['fast_ms']:.2f} ms  ({row['speedup']}x)")
+		for name, row in report.get("formats", {}).items():
+			if name != "rows":
+				self.stdout.write(
+					f"format {name:8} encode {row['encode_ms']:7.2f} ms  {row['bytes']:9} B  gzip {row['gzip_bytes']:8} B  br {row['br_bytes']:8} B"
+				)
+		if options["output"]:
+			Path(options["output"]).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+			self.stdout.write(f"Wrote {options['output']}")
+
+		if baseline is not None:
+			regressions = benchmark.compare(baseline, report, options["latency_tolerance"], options["scenarios"])
+			for line in regressions:
+				self.stderr.write(f"regression: {line}")
+			if regressions:
+				raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
+			self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+	def run(self, options):
+		started = time.perf_counter()
+		datasets = benchmark.generate(
+			users=options["users"],
+			accounts=options["accounts"],
+			budgets=options["budgets"],
+			goals=options["goals"],
+			transactions=options["transactions"],
+			seed=options["seed"],
+		)
+		self.stdout.write(f"Generated {options['users']} user(s) x {options['transactions']} transactions in {time.perf_counter() - started:.1f}s")
+
+		report = {
+			"environment": {
+				**benchmark.environment(),
+				"password_hasher": settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1],
+				"response_cache": settings.FINANCE_RESPONSE_CACHE,
+				"auth_cache": settings.FINANCE_AUTH_CACHE,
+			},
+			"dataset": {name: options[name] for name in ("users", "accounts", "budgets", "goals", "transactions", "seed")},
+			"iterations": options["iterations"],
+			"scenarios": benchmark.run_scenarios(datasets[0], options["iterations"], options["scenarios"]),
+		}
+		if options["serializer_rows"]:
+			report["serializers"] = benchmark.serializer_microbenchmark(datasets[0].user, options["serializer_rows"])
+			report["formats"] = benchmark.format_microbenchmark(datasets[0].user, options["serializer_rows"])
+		return report
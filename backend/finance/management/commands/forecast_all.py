@@ -0,0 +1,17 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from finance import forecast
+
+
+class Command(BaseCommand):
+	help = "Precompute every user's cash-flow forecast in a process pool; run it nightly."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 runs everything in this process).")
+		parser.add_argument("--chunk-size", type=int, default=200, help="Users per task.")
+
+	def handle(self, *args, **options):
+		written = forecast.run_batch(workers=options["workers"], chunk_size=options["chunk_size"])
+		self.stdout.write(self.style.SUCCESS(f"Forecast {written} users."))
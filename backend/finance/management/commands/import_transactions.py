@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.importers import PARSERS, TransactionImporter
+from finance.models import Account
+
+
+class Command(BaseCommand):
+	help = "Stream a CSV or OFX statement into one of a user's accounts."
+
+	def add_arguments(self, parser):
+		parser.add_argument("path", help="Statement file to import.")
+		parser.add_argument("--user", required=True, help="Username that owns the account.")
+		parser.add_argument("--account", required=True, type=int, help="Target account id.")
+		parser.add_argument("--format", choices=sorted(PARSERS), help="Defaults to the file extension.")
+		parser.add_argument("--batch-size", type=int, default=TransactionImporter.default_batch_size)
+
+	def handle(self, *args, **options):
+		path = Path(options["path"])
+		fmt = options["format"] or path.suffix.lstrip(".").lower()
+		if fmt not in PARSERS:
+			raise CommandError(f"Unknown format {fmt!r}; pass --format.")
+
+		try:
+			user = get_user_model().objects.get(username=options["user"])
+			account = Account.objects.get(pk=options["account"], user=user)
+		except (get_user_model().DoesNotExist, Account.DoesNotExist):
+			raise CommandError("No such account for that user.")
+
+		importer = TransactionImporter(user, account, batch_size=options["batch_size"])
+		with path.open(encoding="utf-8-sig", newline="") as handle:
+			summary = importer.run(PARSERS[fmt](handle))
+
+		for error in summary["errors"]:
+			self.stderr.write(f"line {error['line']}: {error['error']}")
+		self.stdout.write(self.style.SUCCESS(
+			f"Imported {summary['imported']} transactions ({summary['duplicates']} duplicates skipped, {summary['error_count']} errors)."
+		))
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.benchmark import percentile
+
+
+DEFAULT_PATHS = ["api/dashboard/summary/", "api/accounts/", "api/transactions/"]
+
+
+class Command(BaseCommand):
+	help = (
+		"Fire concurrent authenticated GETs at a running server and report throughput and latency. "
+		"Run it once against the WSGI deployment and once against the ASGI one to compare."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL.")
+		parser.add_argument("--path", action="append", dest="paths", help=f"Path to request (repeatable, default: {', '.join(DEFAULT_PATHS)}).")
+		parser.add_argument("--username", required=True)
+		parser.add_argument("--password", required=True)
+		parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous in-flight requests.")
+		parser.add_argument("--requests", type=int, default=1000, help="Total requests per path.")
+		parser.add_argument("--timeout", type=float, default=30.0)
+		parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+	def handle(self, *args, **options):
+		base = options["url"].rstrip("/")
+		token = self.login(base, options["username"], options["password"], options["timeout"])
+		results = {}
+		for path in options["paths"] or DEFAULT_PATHS:
+			results[path] = self.run(f"{base}/{path.lstrip('/')}", token, options["concurrency"], options["requests"], options["timeout"])
+
+		if options["json"]:
+			self.stdout.write(json.dumps({"url": base, "concurrency": options["concurrency"], "results": results}, indent=2))
+			return
+		self.stdout.write(f"{base}, concurrency {options['concurrency']}")
+		for path, row in results.items():
+			self.stdout.write(
+				f"{path:32} {row['throughput']:8.1f} req/s  p50 {row['p50_ms']:7.1f} ms  "
+				f"p95 {row['p95_ms']:7.1f} ms  p99 {row['p99_ms']:7.1f} ms  errors {row['errors']}"
+			)
+
+	def login(self, base, username, password, timeout):
+		body = json.dumps({"username": username, "password": password}).encode("utf-8")
+		request = urllib.request.Request(f"{base}/api/login/", data=body, headers={"Content-Type": "application/json"})
+		try:
+			with urllib.request.urlopen(request, timeout=timeout) as response:
+				return json.load(response)["access"]
+		except (urllib.error.URLError, KeyError, ValueError) as exc:
+			raise CommandError(f"Login failed: {exc}")
+
+	def run(self, url, token, concurrency, total, timeout):
+		headers = {"Authorization": f"Bearer {token}"}
+		latencies = []
+		errors = 0
+		lock = threading.Lock()
+
+		def fetch(_):
+			nonlocal errors
+			started = time.perf_counter()
+			try:
+				with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+					response.read()
+				ok = True
+			except (urllib.error.URLError, OSError):
+				ok = False
+			elapsed = time.perf_counter() - started
+			with lock:
+				if ok:
+					latencies.append(elapsed)
+				else:
+					errors += 1
+
+		started = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=concurrency) as pool:
+			list(pool.map(fetch, range(total)))
+		wall = time.perf_counter() - started
+
+		latencies.sort()
+		return {
+			"requests": total,
+			"errors": errors,
+			"throughput": len(latencies) / wall if wall else 0.0,
+			"p50_ms": percentile(latencies, 50) * 1000,
+			"p95_ms": percentile(latencies, 95) * 1000,
+			"p99_ms": percentile(latencies, 99) * 1000,
+		}
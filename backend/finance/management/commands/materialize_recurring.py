@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance import recurring
+
+
+class Command(BaseCommand):
+	help = "Post every recurring transaction occurrence due by today; safe to re-run, run it daily."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--date", help="Materialize occurrences due by this ISO date instead of today.")
+		parser.add_argument("--batch-size", type=int, default=recurring.BATCH_SIZE, help="Schedules per database transaction.")
+
+	def handle(self, *args, **options):
+		today = None
+		if options["date"]:
+			try:
+				today = parse_date(options["date"])
+			except ValueError:
+				today = None
+			if today is None:
+				raise CommandError("--date must be YYYY-MM-DD.")
+		if options["batch_size"] < 1:
+			raise CommandError("--batch-size must be at least 1.")
+		schedules, created = recurring.materialize(today, batch_size=options["batch_size"])
+		self.stdout.write(self.style.SUCCESS(f"Materialized {created} transactions from {schedules} schedules."))
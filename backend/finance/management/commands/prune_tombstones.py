@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from finance import sync
+
+
+class Command(BaseCommand):
+	help = "Delete sync tombstones older than FINANCE_SYNC_TOMBSTONE_DAYS; run it daily."
+
+	def handle(self, *args, **options):
+		deleted = sync.prune()
+		self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
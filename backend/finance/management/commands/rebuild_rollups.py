@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import rollups
+
+
+class Command(BaseCommand):
+	help = "Rebuild or verify the MonthlyCategoryTotal rollup from the raw transactions."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--user", action="append", dest="users", help="Limit to this username (repeatable).")
+		parser.add_argument("--verify", action="store_true", help="Only report keys whose totals drifted; exit non-zero if any did.")
+
+	def handle(self, *args, **options):
+		users = None
+		if options["users"]:
+			users = list(get_user_model().objects.filter(username__in=options["users"]))
+			if len(users) != len(set(options["users"])):
+				raise CommandError("Unknown username given to --user.")
+
+		if options["verify"]:
+			mismatched = rollups.verify(users)
+			for key in mismatched:
+				self.stderr.write("drift: " + ", ".join(f"{name}={value}" for name, value in zip(rollups.ROLLUP_KEY, key)))
+			if mismatched:
+				raise CommandError(f"{len(mismatched)} rollup rows differ from the transactions.")
+			self.stdout.write(self.style.SUCCESS("Rollups match the transactions."))
+			return
+
+		written = rollups.rebuild(users)
+		self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup rows."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance import budgets
+
+
+class Command(BaseCommand):
+	help = "Move budgets whose period has ended onto the current month; safe to re-run, run it daily."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--date", help="Roll budgets onto the month of this ISO date instead of today.")
+		parser.add_argument("--batch-size", type=int, default=budgets.ROLL_BATCH_SIZE, help="Budgets per database transaction.")
+
+	def handle(self, *args, **options):
+		today = None
+		if options["date"]:
+			try:
+				today = parse_date(options["date"])
+			except ValueError:
+				today = None
+			if today is None:
+				raise CommandError("--date must be YYYY-MM-DD.")
+		if options["batch_size"] < 1:
+			raise CommandError("--batch-size must be at least 1.")
+		rolled = budgets.roll_all(today, batch_size=options["batch_size"])
+		self.stdout.write(self.style.SUCCESS(f"Rolled {rolled} budgets onto the current month."))
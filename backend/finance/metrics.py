@@ -0,0 +1,205 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+logger = logging.getLogger("finance.slow_requests")
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+REQUEST_LABELS = ("view", "action", "method")
+# Statements kept per request for the slow-request log.
+MAX_SQL = 50
+
+
+def _format_labels(names, values, extra=()):
+	pairs = [*zip(names, values), *extra]
+	if not pairs:
+		return ""
+	escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+	return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+
+	def __init__(self, name, help_text, labels):
+		self.name = name
+		self.help_text = help_text
+		self.labels = labels
+		self._values = defaultdict(float)
+		self._lock = threading.Lock()
+
+	def inc(self, label_values, amount=1):
+		with self._lock:
+			self._values[label_values] += amount
+
+	def render(self):
+		with self._lock:
+			values = sorted(self._values.items())
+		lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+		lines += [f"{self.name}{_format_labels(self.labels, key)} {value:g}" for key, value in values]
+		return lines
+
+
+class Histogram:
+	"""Cumulative-bucket histogram in the Prometheus text format, kept in process memory."""
+
+	def __init__(self, name, help_text, buckets, labels):
+		self.name = name
+		self.help_text = help_text
+		self.buckets = tuple(buckets)
+		self.bounds = (*(f"{bound:g}" for bound in self.buckets), "+Inf")
+		self.labels = labels
+		self._series = {}
+		self._lock = threading.Lock()
+
+	def observe(self, label_values, value):
+		index = bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(label_values)
+			if series is None:
+				series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+			series[0][index] += 1
+			series[1] += value
+
+	def render(self):
+		with self._lock:
+			series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+		lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+		for key, (counts, total) in series:
+			running = 0
+			for bound, count in zip(self.bounds, counts):
+				running += count
+				lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {running}")
+			lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total:g}")
+			lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {running}")
+		return lines
+
+
+REQUESTS = Counter("finance_requests_total", "Requests handled, by view, action, method and status class.", (*REQUEST_LABELS, "status"))
+REQUEST_SECONDS = Histogram("finance_request_duration_seconds", "Wall time per request.", TIME_BUCKETS, REQUEST_LABELS)
+DB_SECONDS = Histogram("finance_request_db_seconds", "Time spent executing SQL per request.", TIME_BUCKETS, REQUEST_LABELS)
+DB_QUERIES = Histogram("finance_request_db_queries", "SQL statements per request.", QUERY_BUCKETS, REQUEST_LABELS)
+PHASE_SECONDS = Histogram("finance_request_phase_seconds", "Time per request spent in JWT auth, serializers and rendering.", TIME_BUCKETS, (*REQUEST_LABELS, "phase"))
+RESPONSE_BYTES = Histogram("finance_response_bytes", "Response body size.", SIZE_BUCKETS, REQUEST_LABELS)
+METRICS = (REQUESTS, REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, PHASE_SECONDS, RESPONSE_BYTES)
+
+
+def render():
+	return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestMetrics:
+	"""What one request spent its time on; filled in by ``record_query`` and ``timed``."""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.db_seconds = 0.0
+		self.queries = 0
+		self.sql = []
+		self.phases = defaultdict(float)
+
+
+_current = contextvars.ContextVar("finance_request_metrics", default=None)
+
+
+def start():
+	current = RequestMetrics()
+	return current, _current.set(current)
+
+
+def stop(token):
+	_current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+	"""Charge the enclosed block to ``phase`` of the current request, if one is being measured."""
+	current = _current.get()
+	if current is None:
+		yield
+		return
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		current.phases[phase] += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+	current = _current.get()
+	if current is None:
+		return execute(sql, params, many, context)
+	started = time.perf_counter()
+	try:
+		return execute(sql, params, many, context)
+	finally:
+		elapsed = time.perf_counter() - started
+		current.db_seconds += elapsed
+		current.queries += 1
+		if len(current.sql) < MAX_SQL:
+			current.sql.append((elapsed, sql))
+
+
+def install(connection):
+	"""Attach ``record_query`` to a connection's ``execute_wrapper`` chain.
+
+	It goes in at the bottom of the stack so ``connection.execute_wrapper()``
+	blocks, which pop the last wrapper on exit, leave it in place. Every
+	connection gets it (see ``finance.signals``), including the per-request
+	threads the async ORM runs on; the context variable tells it which request
+	to charge.
+	"""
+	if record_query not in connection.execute_wrappers:
+		connection.execute_wrappers.insert(0, record_query)
+
+
+def labels_for(request):
+	match = getattr(request, "resolver_match", None)
+	if match is None:
+		return "unmatched", "", request.method
+	view = match.view_name or match.func.__name__
+	actions = getattr(match.func, "actions", None) or {}
+	return view, actions.get(request.method.lower(), request.method.lower()), request.method
+
+
+def finish(request, response, current):
+	"""Record a finished request: histograms, ``Server-Timing`` and the slow-request log."""
+	elapsed = time.perf_counter() - current.started
+	labels = labels_for(request)
+	REQUESTS.inc((*labels, f"{response.status_code // 100}xx"))
+	REQUEST_SECONDS.observe(labels, elapsed)
+	DB_SECONDS.observe(labels, current.db_seconds)
+	DB_QUERIES.observe(labels, current.queries)
+	for phase, seconds in current.phases.items():
+		PHASE_SECONDS.observe((*labels, phase), seconds)
+	if not response.streaming:
+		RESPONSE_BYTES.observe(labels, len(response.content))
+
+	if getattr(settings, "FINANCE_SERVER_TIMING", True):
+		timings = [f"total;dur={elapsed * 1000:.1f}", f'db;dur={current.db_seconds * 1000:.1f};desc="{current.queries} queries"']
+		timings += [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in current.phases.items()]
+		response["Server-Timing"] = ", ".join(timings)
+
+	threshold = getattr(settings, "FINANCE_SLOW_REQUEST_MS", 500) / 1000
+	if elapsed >= threshold and random.random() < getattr(settings, "FINANCE_SLOW_REQUEST_SAMPLE", 1.0):
+		log_slow_request(request, labels, elapsed, current)
+	return response
+
+
+def log_slow_request(request, labels, elapsed, current):
+	phases = ", ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in current.phases.items())
+	statements = "\n".join(f"  {seconds * 1000:8.1f}ms  {sql}" for seconds, sql in current.sql)
+	logger.warning(
+		"slow request %s %s (%s.%s) %.1fms: db=%.1fms in %d queries %s\n%s",
+		request.method, request.path, labels[0], labels[1], elapsed * 1000,
+		current.db_seconds * 1000, current.queries, phases, statements,
+	)
@@ -0,0 +1,58 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import compression, metrics
+
+
+class RequestMetricsMiddleware:
+	"""Measure every request: wall time, SQL, auth/serialize/render phases and response size.
+
+	Results feed the histograms behind ``/api/metrics/`` and the response's
+	``Server-Timing`` header. Async-capable, so it does not force the async read
+	views back onto a thread.
+	"""
+
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if iscoroutinefunction(self):
+			return self.__acall__(request)
+		current, token = metrics.start()
+		try:
+			response = self.get_response(request)
+		finally:
+			metrics.stop(token)
+		return metrics.finish(request, response, current)
+
+	async def __acall__(self, request):
+		current, token = metrics.start()
+		try:
+			response = await self.get_response(request)
+		finally:
+			metrics.stop(token)
+		return metrics.finish(request, response, current)
+
+
+class CompressionMiddleware:
+	"""Brotli/gzip for large responses (see ``finance.compression``); async-capable like the metrics middleware."""
+
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if iscoroutinefunction(self):
+			return self.__acall__(request)
+		return compression.compress(request, self.get_response(request))
+
+	async def __acall__(self, request):
+		return compression.compress(request, await self.get_response(request))
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def backfill_periods(apps, schema_editor):
+    Budget = apps.get_model("finance", "Budget")
+    BudgetPeriod = apps.get_model("finance", "BudgetPeriod")
+    Transaction = apps.get_model("finance", "Transaction")
+    month = timezone.localdate().replace(day=1)
+    now = timezone.now()
+
+    spend = (
+        Transaction.objects.filter(budget__isnull=False, transaction_type="expense")
+        .annotate(month=TruncMonth("date"))
+        .values("budget_id", "month")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    allocated = dict(Budget.objects.values_list("pk", "allocated_amount"))
+    BudgetPeriod.objects.bulk_create(
+        BudgetPeriod(
+            budget_id=row["budget_id"],
+            month=row["month"],
+            allocated_amount=allocated[row["budget_id"]],
+            spent_amount=row["total"],
+            closed_at=now if row["month"] < month else None,
+        )
+        for row in spend
+    )
+
+    for budget in Budget.objects.all():
+        current = BudgetPeriod.objects.filter(budget=budget, month=month).first()
+        budget.current_period = month
+        budget.spent_amount = current.spent_amount if current else 0
+        budget.remaining_amount = budget.allocated_amount - budget.spent_amount
+        budget.save(update_fields=["current_period", "spent_amount", "remaining_amount"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_monthlycategorytotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='current_period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='spent_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='BudgetPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('allocated_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('spent_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periods', to='finance.budget')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('budget', 'month'), name='finance_budget_period_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+
+# The DDL is frozen here rather than imported from finance.search, so later
+# changes to that module cannot change what this migration did.
+PG_INDEX = "finance_tx_search_idx"
+FTS_TABLE = "finance_transaction_fts"
+
+SQLITE_TRIGGERS = {
+    "finance_transaction_fts_insert": f"""
+        AFTER INSERT ON finance_transaction BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+    "finance_transaction_fts_delete": f"""
+        AFTER DELETE ON finance_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        END""",
+    "finance_transaction_fts_update": f"""
+        AFTER UPDATE OF description ON finance_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "description, content='finance_transaction', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            for name, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            # Same expression as search.PG_VECTOR, without the table alias.
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON finance_transaction "
+                "USING gin (to_tsvector('simple'::regconfig, description))"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_balance_checkpoints'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:13
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_uncategorized_duplicates(apps, schema_editor):
+    """Fold duplicate uncategorized rollup rows into one, so the new key can be enforced."""
+    MonthlyCategoryTotal = apps.get_model("finance", "MonthlyCategoryTotal")
+    duplicates = (
+        MonthlyCategoryTotal.objects.filter(category__isnull=True)
+        .values("user_id", "account_id", "month", "transaction_type")
+        .annotate(keep=Min("id"), rows=Count("id"), sum_total=Sum("total"), sum_count=Sum("count"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in list(duplicates):
+        rows = MonthlyCategoryTotal.objects.filter(
+            category__isnull=True,
+            user_id=group["user_id"],
+            account_id=group["account_id"],
+            month=group["month"],
+            transaction_type=group["transaction_type"],
+        )
+        rows.exclude(pk=group["keep"]).delete()
+        rows.update(total=group["sum_total"], count=group["sum_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0016_recurring_transactions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorized_duplicates, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='monthlycategorytotal',
+            name='finance_rollup_key_uniq',
+        ),
+        migrations.AddConstraint(
+            model_name='monthlycategorytotal',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('account'), django.db.models.functions.comparison.Coalesce('category', 0, output_field=models.BigIntegerField()), models.F('month'), models.F('transaction_type'), name='finance_rollup_key_uniq'),
+        ),
+    ]
@@ -1,15 +1,18 @@
 from django.conf import settings
 from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
 class Account(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='accounts')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='accounts')
     name = models.CharField(max_length=100)
     account_type = models.CharField(max_length=50)
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Last day whose BalanceCheckpoint is still valid; ledger writes move it back (see finance.balances).
+    checkpoints_through = models.DateField(null=True, blank=True, editable=False)
     
     def __str__(self):
         return f"{self.name} - ${self.balance}"
@@ -35,10 +38,15 @@ class Budget(models.Model):
 	category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="budgets")
 	allocated_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 	remaining_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+	# Spend of the month starting at current_period; kept up to date by finance.budgets.
+	spent_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+	current_period = models.DateField(null=True, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def save(self, *args, **kwargs):
-		if self.pk is None:
-			self.remaining_amount = self.allocated_amount
+		if self.current_period is None:
+			self.current_period = timezone.localdate().replace(day=1)
+		self.remaining_amount = self.allocated_amount - self.spent_amount
 		super().save(*args, **kwargs)
 
 	class Meta:
@@ -48,22 +56,76 @@ class Budget(models.Model):
 		return f"Budget {self.category} for {self.user}"
 
 
+class BudgetPeriod(models.Model):
+	"""One month of a budget. Periods before the budget's current one are closed and never recomputed."""
+
+	budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name="periods")
+	month = models.DateField()
+	allocated_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+	spent_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+	closed_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["budget", "month"], name="finance_budget_period_uniq"),
+		]
+
+	def __str__(self):
+		return f"{self.budget} {self.month:%Y-%m}"
+
+
 class Transaction(models.Model):
     TRANSACTION_TYPES = [
         ('expense', 'Expense'),
         ('income', 'Income'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    budget = models.ForeignKey(Budget, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     description = models.CharField(max_length=255)
     date = models.DateField()
+    import_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # The schedule that materialized this row; the unique constraint below indexes it.
+    recurring = models.ForeignKey('RecurringTransaction', on_delete=models.SET_NULL, null=True, blank=True, editable=False, db_index=False, related_name='transactions')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # Statement imports dedupe on this; rows entered by hand leave it NULL.
+            models.UniqueConstraint(fields=['user', 'import_hash'], name='finance_tx_user_import_hash_uniq'),
+            # A schedule materializes each of its dates once, however often the job runs.
+            models.UniqueConstraint(fields=['recurring', 'date'], name='finance_tx_recurring_date_uniq'),
+        ]
+        indexes = [
+            # Matches the transaction list ordering and its keyset cursor.
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='finance_tx_user_date_idx'),
+            # Covers the monthly and per-category aggregates without touching the table.
+            models.Index(fields=['user', 'category', 'date', 'amount'], name='finance_tx_user_cat_date_idx'),
+            # The /api/sync/ change feed.
+            models.Index(fields=['user', 'updated_at'], name='finance_tx_user_updated_idx'),
+        ]
+
+
+class BalanceCheckpoint(models.Model):
+	"""Net transaction flow of an account from its first transaction through ``day`` (see ``finance.balances``)."""
+
+	account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="balance_checkpoints")
+	day = models.DateField()
+	net_total = models.DecimalField(max_digits=14, decimal_places=2)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["account", "day"], name="finance_checkpoint_account_day_uniq"),
+		]
+
+	def __str__(self):
+		return f"{self.account_id} {self.day}: {self.net_total}"
+
 
 class SavingsGoal(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="savings_goals")
@@ -71,7 +133,142 @@ class SavingsGoal(models.Model):
 	description = models.TextField(blank=True)
 	current_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 	target_amount = models.DecimalField(max_digits=12, decimal_places=2)
+	# Contribution velocity aggregates, kept in step with the ledger by ``finance.savings.contribute``.
+	contributed_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+	contribution_count = models.PositiveIntegerField(default=0)
+	first_contribution_at = models.DateTimeField(null=True, blank=True)
+	last_contribution_at = models.DateTimeField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["user", "-created_at"], name="finance_goal_user_created_idx"),
+		]
 
 	def __str__(self):
 		return f"{self.name} ({self.user})"
+
+
+class SavingsContribution(models.Model):
+	"""One amount added to a savings goal; the goal's history, appended to and never edited."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="savings_contributions")
+	goal = models.ForeignKey(SavingsGoal, on_delete=models.CASCADE, related_name="contributions")
+	amount = models.DecimalField(max_digits=12, decimal_places=2)
+	created_at = models.DateTimeField()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["goal", "-created_at"], name="finance_contrib_goal_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.amount} to {self.goal_id} at {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class MonthlyCategoryTotal(models.Model):
+	"""Per-month transaction totals, kept in step with every ledger write (see ``finance.rollups``)."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="monthly_totals")
+	account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="monthly_totals")
+	category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="monthly_totals")
+	month = models.DateField()
+	transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+	total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+	count = models.IntegerField(default=0)
+
+	class Meta:
+		constraints = [
+			# Uncategorized rows share one key: NULLs are distinct in a plain unique constraint.
+			models.UniqueConstraint(
+				"user", "account", Coalesce("category", 0, output_field=models.BigIntegerField()), "month", "transaction_type",
+				name="finance_rollup_key_uniq",
+			),
+		]
+		indexes = [
+			models.Index(fields=["user", "month"], name="finance_rollup_user_month_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.month:%Y-%m} {self.transaction_type} {self.total} ({self.user})"
+
+
+class Tombstone(models.Model):
+	"""Marks a deleted account, transaction, budget or savings goal for the /api/sync/ change feed (see ``finance.sync``)."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tombstones")
+	# The sync payload key the row was listed under, e.g. "transactions".
+	kind = models.CharField(max_length=20)
+	object_id = models.BigIntegerField()
+	deleted_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["user", "deleted_at"], name="finance_tombstone_user_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.kind} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class CashFlowForecast(models.Model):
+	"""A user's latest per-account balance projection (see ``finance.forecast``)."""
+
+	user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="cash_flow_forecast")
+	as_of = models.DateField()
+	# Fingerprint of the user's accounts when the projection was made; any account or ledger write changes it.
+	stamp = models.CharField(max_length=64)
+	payload = models.JSONField()
+	generated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"Forecast for {self.user_id} as of {self.as_of}"
+
+
+class RecurringTransaction(models.Model):
+	"""A transaction repeated on an rrule-style schedule (see ``finance.recurring``).
+
+	Occurrences fall every ``interval`` days, weeks, months or years from
+	``start_date``, until ``until`` or ``count`` occurrences, whichever ends it first.
+	"""
+
+	DAILY = "daily"
+	WEEKLY = "weekly"
+	MONTHLY = "monthly"
+	YEARLY = "yearly"
+	FREQUENCY_CHOICES = [
+		(DAILY, "Daily"),
+		(WEEKLY, "Weekly"),
+		(MONTHLY, "Monthly"),
+		(YEARLY, "Yearly"),
+	]
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="recurring_transactions")
+	account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="recurring_transactions")
+	category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+	budget = models.ForeignKey(Budget, on_delete=models.SET_NULL, null=True, blank=True, related_name="recurring_transactions")
+	transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+	amount = models.DecimalField(max_digits=12, decimal_places=2)
+	description = models.CharField(max_length=255)
+	frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+	interval = models.PositiveSmallIntegerField(default=1)
+	start_date = models.DateField()
+	until = models.DateField(null=True, blank=True)
+	count = models.PositiveIntegerField(null=True, blank=True)
+	# High-water mark: occurrences materialized so far and the date of the next one (NULL once the schedule has ended).
+	occurrences = models.PositiveIntegerField(default=0, editable=False)
+	next_date = models.DateField(null=True, blank=True, editable=False)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		indexes = [
+			# The materializer's due scan, in the order it walks.
+			models.Index(fields=["next_date", "id"], name="finance_recurring_due_idx"),
+			models.Index(fields=["user", "-created_at"], name="finance_recurring_user_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.description} every {self.interval} {self.frequency} ({self.user})"
+
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+	"""Forward-only keyset pagination over ``(date, created_at, id)`` descending.
+
+	The cursor is an opaque, url-safe token holding the sort key of the last row
+	of the previous page, so every page is a single indexed range scan no matter
+	how deep the client has scrolled.
+	"""
+
+	cursor_query_param = "cursor"
+	page_size_query_param = "page_size"
+	page_size = 100
+	max_page_size = 1000
+	ordering = ("-date", "-created_at", "-id")
+	invalid_cursor_message = "Invalid cursor"
+
+	def paginate_queryset(self, queryset, request, view=None):
+		queryset = self.page_queryset(queryset, request)
+		return self.build_page(list(queryset))
+
+	async def apaginate_queryset(self, queryset, request, view=None):
+		"""Async twin of ``paginate_queryset`` for views running on the async ORM."""
+		queryset = self.page_queryset(queryset, request)
+		return self.build_page([row async for row in queryset])
+
+	def page_queryset(self, queryset, request):
+		self.request = request
+		self.page_size_value = self.get_page_size(request)
+		position = self.decode_cursor(request)
+
+		queryset = queryset.order_by(*self.ordering)
+		if position is not None:
+			last_date, last_created, last_id = position
+			queryset = queryset.filter(
+				Q(date__lt=last_date)
+				| Q(date=last_date, created_at__lt=last_created)
+				| Q(date=last_date, created_at=last_created, id__lt=last_id)
+			)
+
+		# Fetch one extra row to learn whether another page exists.
+		return queryset[: self.page_size_value + 1]
+
+	def build_page(self, rows):
+		self.has_next = len(rows) > self.page_size_value
+		page = rows[: self.page_size_value]
+		self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+		return page
+
+	def get_paginated_response(self, data):
+		return Response({"next": self.get_next_link(), "next_cursor": self.next_cursor, "results": data})
+
+	def get_paginated_response_schema(self, schema):
+		return {
+			"type": "object",
+			"required": ["results"],
+			"properties": {
+				"next": {"type": "string", "nullable": True, "format": "uri"},
+				"next_cursor": {"type": "string", "nullable": True},
+				"results": schema,
+			},
+		}
+
+	def get_page_size(self, request):
+		try:
+			size = int(request.query_params[self.page_size_query_param])
+		except (KeyError, ValueError):
+			return self.page_size
+		if size <= 0:
+			return self.page_size
+		return min(size, self.max_page_size)
+
+	def get_next_link(self):
+		if self.next_cursor is None:
+			return None
+		url = self.request.build_absolute_uri()
+		return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+	def encode_cursor(self, instance):
+		# Pages hold model instances or, on the fast list path, ``.values()`` dicts.
+		if isinstance(instance, dict):
+			payload = [instance["date"].isoformat(), instance["created_at"].isoformat(), instance["id"]]
+		else:
+			payload = [instance.date.isoformat(), instance.created_at.isoformat(), instance.pk]
+		raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+		return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+	def decode_cursor(self, request):
+		token = request.query_params.get(self.cursor_query_param)
+		if not token:
+			return None
+		try:
+			padded = token + "=" * (-len(token) % 4)
+			last_date, last_created, last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+			return date.fromisoformat(last_date), datetime.fromisoformat(last_created), int(last_id)
+		except (TypeError, ValueError, UnicodeError):
+			raise exceptions.NotFound(self.invalid_cursor_message)
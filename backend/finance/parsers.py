@@ -0,0 +1,17 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from . import columnar
+
+
+class MessagePackParser(BaseParser):
+	"""Accept request bodies in the ``MessagePackRenderer`` format, e.g. columnar rows for ``transactions/bulk/``."""
+
+	media_type = "application/msgpack"
+
+	def parse(self, stream, media_type=None, parser_context=None):
+		try:
+			return columnar.unpackb(stream.read())
+		except (ValueError, TypeError, msgpack.UnpackException) as exc:
+			raise ParseError(f"MessagePack parse error - {exc}")
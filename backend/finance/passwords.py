@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from rest_framework import exceptions
+
+
+class HashingPool:
+	"""Concurrency limiter for password hashing.
+
+	At most ``workers`` hashes run at once, so a login burst cannot take every
+	core, and at most ``queue_limit`` more requests wait for a slot; the rest
+	are turned away with a 429 straight away. The calling request thread still
+	blocks until its hash is done, so this caps CPU use and queueing, not the
+	number of busy API workers.
+	"""
+
+	def __init__(self, workers, queue_limit):
+		self.workers = workers
+		self.queue_limit = queue_limit
+		self._slots = threading.BoundedSemaphore(workers + queue_limit)
+		self._executor = None
+		self._lock = threading.Lock()
+
+	def run(self, fn, *args):
+		"""Run ``fn(*args)`` on a hashing thread and wait for its result."""
+		if not self._slots.acquire(blocking=False):
+			raise exceptions.Throttled(wait=1, detail="Too many sign-ins in progress; retry shortly.")
+		try:
+			return self._get_executor().submit(fn, *args).result()
+		finally:
+			self._slots.release()
+
+	def _get_executor(self):
+		# Created lazily so forking servers do not inherit idle threads.
+		if self._executor is None:
+			with self._lock:
+				if self._executor is None:
+					self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+		return self._executor
+
+
+pool = HashingPool(
+	workers=getattr(settings, "PASSWORD_HASH_WORKERS", 2),
+	queue_limit=getattr(settings, "PASSWORD_HASH_QUEUE", 32),
+)
+
+
+def hash_password(raw_password):
+	return pool.run(make_password, raw_password)
+
+
+def verify_credentials(username, password):
+	"""Return the active user matching the credentials, or ``None``.
+
+	Mirrors ``ModelBackend.authenticate`` but runs the hasher in the bounded
+	pool. Database access stays on the request thread.
+	"""
+	User = get_user_model()
+	try:
+		user = User._default_manager.get_by_natural_key(username)
+	except User.DoesNotExist:
+		# Spend the same hashing time as a real check so response time does not reveal usernames.
+		hash_password(password)
+		return None
+
+	if not pool.run(check_password, password, user.password):
+		return None
+	if not getattr(user, "is_active", True):
+		return None
+
+	# Re-hash with the preferred hasher after a profile change, like Django's own check does.
+	preferred = get_hasher("default")
+	if identify_hasher(user.password).algorithm != preferred.algorithm or preferred.must_update(user.password):
+		user.password = hash_password(password)
+		user.save(update_fields=["password"])
+	return user
@@ -0,0 +1,122 @@
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import ledger
+from .models import RecurringTransaction, Transaction
+
+
+# Schedules claimed per batch, and occurrences one schedule materializes per batch. Together they bound
+# a batch's rows; a schedule further behind is picked up again by the next batch, earliest first.
+BATCH_SIZE = 500
+MAX_CATCH_UP = 31
+
+
+def add_months(day, months):
+	"""``day`` moved by ``months``, clamped to the last day of a shorter month."""
+	month = day.month - 1 + months
+	year, month = day.year + month // 12, month % 12 + 1
+	return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(schedule, n):
+	"""Date of the schedule's ``n``-th occurrence (``start_date`` is the 0th).
+
+	Counted from the start each time, so a series on the 31st comes back to
+	the 31st after a shorter month instead of drifting to the 28th.
+	"""
+	step = n * schedule.interval
+	if schedule.frequency == RecurringTransaction.DAILY:
+		return schedule.start_date + timedelta(days=step)
+	if schedule.frequency == RecurringTransaction.WEEKLY:
+		return schedule.start_date + timedelta(weeks=step)
+	if schedule.frequency == RecurringTransaction.MONTHLY:
+		return add_months(schedule.start_date, step)
+	return add_months(schedule.start_date, 12 * step)
+
+
+def next_date(schedule):
+	"""The schedule's first occurrence not yet materialized, or ``None`` once ``count`` or ``until`` ends it."""
+	if schedule.count is not None and schedule.occurrences >= schedule.count:
+		return None
+	day = occurrence(schedule, schedule.occurrences)
+	return None if schedule.until is not None and day > schedule.until else day
+
+
+def advance(schedule, today, limit=MAX_CATCH_UP):
+	"""Move ``schedule`` past its occurrences due by ``today``, at most ``limit`` of them; returns their dates."""
+	dates = []
+	while schedule.next_date is not None and schedule.next_date <= today and len(dates) < limit:
+		dates.append(schedule.next_date)
+		schedule.occurrences += 1
+		schedule.next_date = next_date(schedule)
+	return dates
+
+
+def _occurrence_row(schedule, day):
+	return Transaction(
+		user_id=schedule.user_id,
+		account_id=schedule.account_id,
+		category_id=schedule.category_id,
+		budget_id=schedule.budget_id,
+		transaction_type=schedule.transaction_type,
+		amount=schedule.amount,
+		description=schedule.description,
+		date=day,
+		recurring_id=schedule.pk,
+	)
+
+
+def materialize_batch(today, batch_size=BATCH_SIZE, catch_up=MAX_CATCH_UP):
+	"""Materialize the due occurrences of up to ``batch_size`` schedules in one transaction.
+
+	The rows are inserted with ``bulk_create`` and posted to the ledger
+	together, which folds them into one balance ``UPDATE`` per account. The
+	schedules' advanced ``next_date`` commits with them, one ``UPDATE`` per
+	distinct new date. Claimed schedules are locked, and on PostgreSQL a
+	concurrent run skips them and takes the next ones. Returns
+	``(schedules, transactions)`` processed.
+	"""
+	with transaction.atomic():
+		schedules = list(
+			RecurringTransaction.objects.select_for_update(skip_locked=True)
+			.filter(next_date__lte=today)
+			.order_by("next_date", "id")[:batch_size]
+		)
+		created = []
+		# Schedules that took the same number of occurrences and land on the same next date share one UPDATE.
+		moved = defaultdict(list)
+		for schedule in schedules:
+			dates = advance(schedule, today, catch_up)
+			created.extend(_occurrence_row(schedule, day) for day in dates)
+			moved[len(dates), schedule.next_date].append(schedule.pk)
+		Transaction.objects.bulk_create(created, batch_size=1000)
+		now = timezone.now()
+		for (count, day), ids in moved.items():
+			RecurringTransaction.objects.filter(pk__in=ids).update(occurrences=F("occurrences") + count, next_date=day, updated_at=now)
+		ledger.post(ledger.entry(row) for row in created)
+	return len(schedules), len(created)
+
+
+def materialize(today=None, batch_size=BATCH_SIZE, catch_up=MAX_CATCH_UP):
+	"""Materialize every occurrence due by ``today``; returns ``(schedules, transactions)`` processed.
+
+	Each schedule's ``next_date`` is its high-water mark, and each batch
+	commits it together with the rows it produced. A re-run therefore finds
+	nothing left to do, and an interrupted run resumes at the first schedule
+	still due. Batches walk the ``(next_date, id)`` index and hold at most
+	``batch_size * catch_up`` rows, so time and memory grow with the work
+	due, not with the number of schedules.
+	"""
+	today = today or timezone.localdate()
+	schedules = created = 0
+	while True:
+		claimed, rows = materialize_batch(today, batch_size, catch_up)
+		if not claimed:
+			return schedules, created
+		schedules += claimed
+		created += rows
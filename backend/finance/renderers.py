@@ -0,0 +1,39 @@
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import columnar, metrics
+
+
+def vary_on_accept(renderer_context):
+	# The same URL renders as JSON or MessagePack, so caches must key on Accept.
+	response = (renderer_context or {}).get("response")
+	if response is not None:
+		patch_vary_headers(response, ("Accept",))
+
+
+class TimedJSONRenderer(JSONRenderer):
+	"""JSON renderer that charges its time to the request's ``render`` phase."""
+
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		vary_on_accept(renderer_context)
+		with metrics.timed("render"):
+			return super().render(data, accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+	"""Compact binary responses: MessagePack with lists of objects packed as columns (see ``finance.columnar``).
+
+	Chosen with ``Accept: application/msgpack`` or ``?format=msgpack``.
+	"""
+
+	media_type = "application/msgpack"
+	format = "msgpack"
+	charset = None
+	render_style = "binary"
+
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		vary_on_accept(renderer_context)
+		if data is None:
+			return b""
+		with metrics.timed("render"):
+			return columnar.packb(data)
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import MonthlyCategoryTotal, Transaction
+
+
+ROLLUP_KEY = ("user_id", "account_id", "category_id", "month", "transaction_type")
+
+
+def month_start(value):
+	return value.replace(day=1)
+
+
+def rollup_deltas(entries):
+	"""Fold ledger entries into ``{rollup key: [amount delta, count delta]}``."""
+	deltas = defaultdict(lambda: [Decimal("0"), 0])
+	for item in entries:
+		key = (item.user_id, item.account_id, item.category_id, month_start(item.date), item.transaction_type)
+		deltas[key][0] += item.sign * item.amount
+		deltas[key][1] += item.sign
+	return deltas
+
+
+def apply_rollup_deltas(deltas):
+	"""Add deltas to their ``MonthlyCategoryTotal`` rows, creating rows on first use.
+
+	Keys are visited in sorted order so concurrent writers lock rows in the same
+	order. Must run inside the caller's atomic block.
+	"""
+	for key in sorted(deltas, key=_sort_key):
+		amount, count = deltas[key]
+		if not amount and not count:
+			continue
+		lookup = dict(zip(ROLLUP_KEY, key))
+		rows = MonthlyCategoryTotal.objects.filter(**lookup)
+		if rows.update(total=F("total") + amount, count=F("count") + count):
+			continue
+		try:
+			with transaction.atomic():
+				MonthlyCategoryTotal.objects.create(total=amount, count=count, **lookup)
+		except IntegrityError:
+			# Another writer created the row first; add to theirs.
+			rows.update(total=F("total") + amount, count=F("count") + count)
+
+
+def uncategorize(category_id):
+	"""Fold a category's rollup rows into the uncategorized ones, ahead of the category's deletion.
+
+	``SET_NULL`` would otherwise move them onto keys that may already exist.
+	"""
+	rows = MonthlyCategoryTotal.objects.filter(category_id=category_id)
+	deltas = defaultdict(lambda: [Decimal("0"), 0])
+	for user_id, account_id, month, transaction_type, total, count in rows.values_list(
+		"user_id", "account_id", "month", "transaction_type", "total", "count"
+	):
+		key = (user_id, account_id, None, month, transaction_type)
+		deltas[key][0] += total
+		deltas[key][1] += count
+	rows.delete()
+	apply_rollup_deltas(deltas)
+
+
+def _sort_key(key):
+	return tuple((value is None, value) for value in key)
+
+
+def aggregate_from_transactions(users=None):
+	"""Recompute rollup rows straight from ``Transaction``; yields unsaved ``MonthlyCategoryTotal``."""
+	queryset = Transaction.objects.all()
+	if users is not None:
+		queryset = queryset.filter(user__in=users)
+	rows = (
+		queryset.annotate(month=TruncMonth("date"))
+		.values("user_id", "account_id", "category_id", "month", "transaction_type")
+		.annotate(total=Sum("amount"), count=Count("id"))
+		.order_by()
+	)
+	for row in rows.iterator(chunk_size=2000):
+		yield MonthlyCategoryTotal(**row)
+
+
+def rebuild(users=None, batch_size=1000):
+	"""Replace the rollup rows of ``users`` (or everyone) with freshly aggregated ones."""
+	with transaction.atomic():
+		stale = MonthlyCategoryTotal.objects.all()
+		if users is not None:
+			stale = stale.filter(user__in=users)
+		stale.delete()
+		written = 0
+		batch = []
+		for row in aggregate_from_transactions(users):
+			batch.append(row)
+			if len(batch) >= batch_size:
+				MonthlyCategoryTotal.objects.bulk_create(batch)
+				written += len(batch)
+				batch = []
+		MonthlyCategoryTotal.objects.bulk_create(batch)
+		return written + len(batch)
+
+
+def verify(users=None):
+	"""Return the keys whose stored totals differ from a fresh aggregation."""
+	expected = {tuple(getattr(row, name) for name in ROLLUP_KEY): (row.total, row.count) for row in aggregate_from_transactions(users)}
+	stored_rows = MonthlyCategoryTotal.objects.all()
+	if users is not None:
+		stored_rows = stored_rows.filter(user__in=users)
+	stored = defaultdict(lambda: [Decimal("0"), 0])
+	for row in stored_rows.values_list(*ROLLUP_KEY, "total", "count").iterator(chunk_size=2000):
+		stored[row[:5]][0] += row[5]
+		stored[row[:5]][1] += row[6]
+	mismatched = []
+	for key in set(expected) | set(stored):
+		want = expected.get(key, (Decimal("0"), 0))
+		have = tuple(stored.get(key, (Decimal("0"), 0)))
+		if want[0] != have[0] or want[1] != have[1]:
+			mismatched.append(key)
+	return sorted(mismatched, key=_sort_key)
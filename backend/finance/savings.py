@@ -0,0 +1,86 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import SavingsContribution, SavingsGoal
+
+
+# Velocity is averaged over at least this long, so a burst of first-hour contributions is not extrapolated.
+MIN_VELOCITY_DAYS = 1
+# Completion further out than this is reported as no date at all.
+MAX_PROJECTION_DAYS = 100 * 365
+
+PROJECTION_FIELDS = (
+	"id", "name", "current_amount", "target_amount", "contributed_total", "contribution_count", "first_contribution_at", "last_contribution_at",
+)
+
+
+def contribute(user_id, goal_id, amount):
+	"""Add ``amount`` to one of the user's goals and record it in the ledger; returns the goal, or ``None``.
+
+	The goal's amount and its velocity aggregates move in a single
+	``UPDATE ... SET current_amount = current_amount + amount``, so concurrent
+	contributions all land. The ledger row is appended in the same transaction.
+	"""
+	now = timezone.now()
+	with transaction.atomic():
+		updated = SavingsGoal.objects.filter(pk=goal_id, user_id=user_id).update(
+			current_amount=F("current_amount") + amount,
+			contributed_total=F("contributed_total") + amount,
+			contribution_count=F("contribution_count") + 1,
+			first_contribution_at=Coalesce(F("first_contribution_at"), Value(now, output_field=DateTimeField())),
+			last_contribution_at=now,
+			updated_at=now,
+		)
+		if not updated:
+			return None
+		SavingsContribution.objects.create(user_id=user_id, goal_id=goal_id, amount=amount, created_at=now)
+	return SavingsGoal.objects.get(pk=goal_id)
+
+
+def velocity(contributed_total, first_contribution_at, now):
+	"""Average amount contributed per day since the first contribution."""
+	if first_contribution_at is None:
+		return Decimal("0")
+	days = max((now - first_contribution_at).total_seconds() / 86400, MIN_VELOCITY_DAYS)
+	return contributed_total / Decimal(str(days))
+
+
+def project(goal, now):
+	"""Projection of a goal (a ``PROJECTION_FIELDS`` values row) at its contribution velocity so far.
+
+	``projected_completion`` is ``None`` while nothing has been contributed, or when
+	it lies more than ``MAX_PROJECTION_DAYS`` away.
+	"""
+	remaining = max(goal["target_amount"] - goal["current_amount"], Decimal("0"))
+	per_day = velocity(goal["contributed_total"], goal["first_contribution_at"], now)
+	today = timezone.localdate(now)
+	if not remaining:
+		completion = today
+	elif per_day > 0 and remaining / per_day <= MAX_PROJECTION_DAYS:
+		completion = today + timedelta(days=math.ceil(remaining / per_day))
+	else:
+		completion = None
+	return {
+		"goal": goal["id"],
+		"name": goal["name"],
+		"current_amount": f"{goal['current_amount']:.2f}",
+		"target_amount": f"{goal['target_amount']:.2f}",
+		"remaining": f"{remaining:.2f}",
+		"daily_velocity": f"{per_day:.2f}",
+		"contributions": goal["contribution_count"],
+		"last_contribution_at": goal["last_contribution_at"],
+		"projected_completion": completion.isoformat() if completion else None,
+	}
+
+
+def projections(user_id):
+	"""Every goal of the user with its projected completion date, from one query over the goals alone."""
+	now = timezone.now()
+	goals = SavingsGoal.objects.filter(user_id=user_id).order_by("-created_at").values(*PROJECTION_FIELDS)
+	return [project(goal, now) for goal in goals]
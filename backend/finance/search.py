@@ -0,0 +1,139 @@
+import re
+
+from django.db import connection
+
+from .models import Transaction
+
+
+# Terms beyond this are ignored; each one narrows the match further anyway.
+MAX_TERMS = 8
+
+FTS_TABLE = "finance_transaction_fts"
+
+# Kept in sync by triggers, so bulk writes, imports and cascading deletes are indexed too.
+# Migration 0013 holds its own copy of this DDL; change both together.
+SQLITE_TRIGGERS = {
+	"finance_transaction_fts_insert": f"""
+		AFTER INSERT ON finance_transaction BEGIN
+			INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+		END""",
+	"finance_transaction_fts_delete": f"""
+		AFTER DELETE ON finance_transaction BEGIN
+			INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+		END""",
+	"finance_transaction_fts_update": f"""
+		AFTER UPDATE OF description ON finance_transaction BEGIN
+			INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+			INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+		END""",
+}
+
+# The GIN index in migration 0013 is built on exactly this expression; the planner only uses it if they match.
+PG_VECTOR = "to_tsvector('simple'::regconfig, t.description)"
+
+# Query parameter -> (column, lookup) for the filters a search can be combined with.
+FILTERS = {
+	"account": ("account_id", "exact"),
+	"category": ("category_id", "exact"),
+	"type": ("transaction_type", "exact"),
+	"date_after": ("date", "gte"),
+	"date_before": ("date", "lte"),
+}
+OPERATORS = {"exact": "=", "gte": ">=", "lte": "<="}
+
+
+def terms(query):
+	"""Lower-cased word terms of a search string, at most ``MAX_TERMS``."""
+	return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def install_sqlite(cursor, rebuild=False):
+	"""Create the FTS5 shadow table of transaction descriptions and its triggers, if missing.
+
+	The table uses ``finance_transaction`` as external content, so it only holds
+	the index. Re-running this restores triggers that a SQLite table rebuild
+	(an ``ALTER`` the schema editor emulates) dropped along with the old table.
+	"""
+	cursor.execute(
+		f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+		"description, content='finance_transaction', content_rowid='id', "
+		"tokenize='unicode61 remove_diacritics 2')"
+	)
+	for name, body in SQLITE_TRIGGERS.items():
+		cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+	if rebuild:
+		cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_sqlite(cursor):
+	for name in SQLITE_TRIGGERS:
+		cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+	cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def sqlite_installed(cursor):
+	cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+	return cursor.fetchone() is not None
+
+
+def _where(user_id, filters):
+	clauses = ["t.user_id = %s"]
+	params = [user_id]
+	for name, value in filters.items():
+		column, lookup = FILTERS[name]
+		clauses.append(f"t.{column} {OPERATORS[lookup]} %s")
+		params.append(value)
+	return " AND ".join(clauses), params
+
+
+def _sqlite_search(words, where, params, limit):
+	# bm25() is lower for better matches; each term matches as a prefix.
+	match = " ".join(f'"{word}"*' for word in words)
+	sql = (
+		f"SELECT t.id FROM {FTS_TABLE} JOIN finance_transaction t ON t.id = {FTS_TABLE}.rowid "
+		f"WHERE {FTS_TABLE} MATCH %s AND {where} "
+		f"ORDER BY bm25({FTS_TABLE}), t.date DESC, t.id DESC LIMIT %s"
+	)
+	return sql, [match, *params, limit]
+
+
+def _postgresql_search(words, where, params, limit):
+	tsquery = " & ".join(f"{word}:*" for word in words)
+	sql = (
+		f"SELECT t.id FROM finance_transaction t, to_tsquery('simple', %s) query "
+		f"WHERE {PG_VECTOR} @@ query AND {where} "
+		f"ORDER BY ts_rank({PG_VECTOR}, query) DESC, t.date DESC, t.id DESC LIMIT %s"
+	)
+	return sql, [tsquery, *params, limit]
+
+
+BACKENDS = {
+	"sqlite": _sqlite_search,
+	"postgresql": _postgresql_search,
+}
+
+
+def search(user_id, query, filters=None, limit=50):
+	"""Ids of the user's transactions whose description matches every term of ``query``, best first.
+
+	Each term matches words starting with it. ``filters`` maps ``FILTERS`` keys
+	to values. SQLite ranks with FTS5's ``bm25``, PostgreSQL with ``ts_rank``
+	over the GIN-indexed ``tsvector``; both break ties by newest date. Other
+	databases fall back to an unranked ``icontains`` scan.
+	"""
+	words = terms(query)
+	if not words:
+		return []
+	filters = filters or {}
+	backend = BACKENDS.get(connection.vendor)
+	if backend is None:
+		rows = Transaction.objects.filter(user_id=user_id, **{"__".join(FILTERS[name]): value for name, value in filters.items()})
+		for word in words:
+			rows = rows.filter(description__icontains=word)
+		return list(rows.order_by("-date", "-id").values_list("id", flat=True)[:limit])
+	where, params = _where(user_id, filters)
+	sql, params = backend(words, where, params, limit)
+	with connection.cursor() as cursor:
+		cursor.execute(sql, params)
+		return [row[0] for row in cursor.fetchall()]
+
@@ -1,7 +1,14 @@
+from decimal import Decimal
 
-from django.contrib.auth import get_user_model, authenticate
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
-from .models import Account, Category, Budget, Transaction, SavingsGoal
+from .catalogue import categories
+from .metrics import timed
+from . import recurring
+from .models import Account, Category, Budget, RecurringTransaction, Transaction, SavingsGoal
+from .passwords import hash_password, verify_credentials
 
 
 User = get_user_model()
@@ -25,12 +32,12 @@ class RegistrationSerializer(serializers.ModelSerializer):
 	def create(self, validated_data):
 		validated_data.pop("password2", None)
 		password = validated_data.pop("password")
-		try:
-			user = User.objects.create_user(password=password, **validated_data)
-		except TypeError:
-			user = User(**validated_data)
-			user.set_password(password)
-			user.save()
+		user = User(**validated_data)
+		# What create_user would do, with the hash run in the bounded pool.
+		user.username = User.normalize_username(user.username)
+		user.email = User.objects.normalize_email(user.email)
+		user.password = hash_password(password)
+		user.save()
 		return user
 
 
@@ -44,7 +51,7 @@ class LoginSerializer(serializers.Serializer):
 		password = data.get("password")
 
 		if username and password:
-			user = authenticate(username=username, password=password)
+			user = verify_credentials(username, password)
 			if not user:
 				raise serializers.ValidationError("Unable to log in with provided credentials.")
 		else:
@@ -54,39 +61,113 @@ class LoginSerializer(serializers.Serializer):
 		return data
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+	"""Primary key field that resolves from ``context["prefetched"][Model]`` when provided.
+
+	Bulk callers load every referenced row with one ``in_bulk()`` per model and
+	hand the maps in through the serializer context, so validating thousands of
+	rows does not issue a query per row. Without a map it behaves as usual.
+	"""
+
+	def get_prefetched(self):
+		return self.context.get("prefetched", {}).get(self.queryset.model)
+
+	def to_internal_value(self, data):
+		prefetched = self.get_prefetched()
+		if prefetched is None:
+			return super().to_internal_value(data)
+		if isinstance(data, bool):
+			self.fail("incorrect_type", data_type=type(data).__name__)
+		try:
+			return prefetched[int(data)]
+		except KeyError:
+			self.fail("does_not_exist", pk_value=data)
+		except (TypeError, ValueError):
+			self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class CatalogueCategoryField(PrefetchedPrimaryKeyRelatedField):
+	"""Category primary key validated against the in-memory catalogue instead of the database."""
+
+	def __init__(self, category_type=None, **kwargs):
+		self.category_type = category_type
+		kwargs.setdefault("queryset", Category.objects.all())
+		super().__init__(**kwargs)
+
+	def get_prefetched(self):
+		return categories.lookup(self.category_type)
+
+
+class TimedSerializerMixin:
+	"""Charge ``.data`` to the request's ``serialize`` phase (see ``finance.metrics``).
+
+	Nested serializers go through ``to_representation``, so only the outermost
+	one is timed.
+	"""
+
+	@property
+	def data(self):
+		with timed("serialize"):
+			return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+	pass
+
+
+class AccountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 	class Meta:
 		model = Account
+		list_serializer_class = TimedListSerializer
 		fields = ("id", "name", "balance", "created_at")
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
 	class Meta:
 		model = Category
+		list_serializer_class = TimedListSerializer
 		fields = ("id", "name", "type")
 
 
-class BudgetSerializer(serializers.ModelSerializer):
+class BudgetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 	category = CategorySerializer(read_only=True)
-	category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.filter(type=Category.TYPE_EXPENSE), source="category", write_only=True)
+	category_id = CatalogueCategoryField(category_type=Category.TYPE_EXPENSE, source="category", write_only=True)
 
 	class Meta:
 		model = Budget
-		fields = ("id", "category", "category_id", "allocated_amount", "remaining_amount")
+		list_serializer_class = TimedListSerializer
+		fields = ("id", "category", "category_id", "allocated_amount", "remaining_amount", "spent_amount", "current_period")
+		read_only_fields = ("remaining_amount", "spent_amount", "current_period")
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 	account = AccountSerializer(read_only=True)
-	account_id = serializers.PrimaryKeyRelatedField(queryset=Account.objects.all(), source="account", write_only=True)
+	account_id = PrefetchedPrimaryKeyRelatedField(queryset=Account.objects.all(), source="account", write_only=True)
 	category = CategorySerializer(read_only=True)
-	category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), source="category", write_only=True)
+	category_id = CatalogueCategoryField(source="category", write_only=True)
 	budget = serializers.SerializerMethodField(read_only=True)
-	budget_id = serializers.PrimaryKeyRelatedField(queryset=Budget.objects.all(), source="budget", write_only=True, allow_null=True, required=False)
+	budget_id = PrefetchedPrimaryKeyRelatedField(queryset=Budget.objects.all(), source="budget", write_only=True, allow_null=True, required=False)
 
 	class Meta:
 		model = Transaction
+		list_serializer_class = TimedListSerializer
 		fields = ("id", "account", "account_id", "category", "category_id", "budget", "budget_id", "description", "date", "amount", "created_at")
 
+	def __init__(self, *args, **kwargs):
+		# Optional projection, e.g. fields=("id", "date", "amount") for lean list responses.
+		fields = kwargs.pop("fields", None)
+		super().__init__(*args, **kwargs)
+		if fields is not None:
+			for name in set(self.fields) - set(fields):
+				self.fields.pop(name)
+
+	def validate(self, data):
+		# The client only picks a category; its type decides how the amount moves the balance.
+		category = data.get("category")
+		if category is not None:
+			data["transaction_type"] = category.type
+		return data
+
 	def create(self, validated_data):
 		# user is set in the viewset perform_create
 		return super().create(validated_data)
@@ -97,16 +178,90 @@ class TransactionSerializer(serializers.ModelSerializer):
 	def get_budget(self, obj):
 		if not getattr(obj, "budget", None):
 			return None
-		return {"id": obj.budget.id, "category": obj.budget.category.id if obj.budget.category else None, "allocated_amount": obj.budget.allocated_amount, "remaining_amount": obj.budget.remaining_amount}
+		return {"id": obj.budget.id, "category": obj.budget.category_id, "allocated_amount": obj.budget.allocated_amount, "remaining_amount": obj.budget.remaining_amount, "spent_amount": obj.budget.spent_amount}
 
 
-class SavingsGoalSerializer(serializers.ModelSerializer):
+class SavingsGoalSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 	class Meta:
 		model = SavingsGoal
+		list_serializer_class = TimedListSerializer
 		fields = ("id", "name", "description", "current_amount", "target_amount", "created_at")
+		# Only the add action moves the amount: atomically, and through the contribution ledger.
+		read_only_fields = ("current_amount",)
 
 	def create(self, validated_data):
 		return super().create(validated_data)
 
 	def update(self, instance, validated_data):
-		return super().update(instance, validated_data)
+		for attr, value in validated_data.items():
+			setattr(instance, attr, value)
+		# A full save would write back amounts and velocity aggregates that a concurrent add has moved on.
+		instance.save(update_fields=[*validated_data, "updated_at"])
+		instance.refresh_from_db(fields=["current_amount"])
+		return instance
+
+
+class RecurringTransactionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+	account_id = serializers.PrimaryKeyRelatedField(queryset=Account.objects.all(), source="account")
+	category_id = CatalogueCategoryField(source="category")
+	budget_id = serializers.PrimaryKeyRelatedField(queryset=Budget.objects.all(), source="budget", allow_null=True, required=False)
+
+	# Materialized occurrences were dated by these; changing them would re-date the series under its history.
+	TIMING_FIELDS = ("frequency", "interval", "start_date")
+
+	class Meta:
+		model = RecurringTransaction
+		list_serializer_class = TimedListSerializer
+		fields = (
+			"id", "account_id", "category_id", "budget_id", "transaction_type", "description", "amount",
+			"frequency", "interval", "start_date", "until", "count", "occurrences", "next_date", "created_at",
+		)
+		read_only_fields = ("transaction_type",)
+		extra_kwargs = {
+			"amount": {"min_value": Decimal("0.01")},
+			"interval": {"min_value": 1},
+			"count": {"min_value": 1},
+		}
+
+	def validate(self, data):
+		user = self.context["request"].user
+		for name in ("account", "budget"):
+			if data.get(name) is not None and data[name].user_id != user.pk:
+				raise serializers.ValidationError({f"{name}_id": "Not found."})
+		start_date = data.get("start_date", getattr(self.instance, "start_date", None))
+		until = data.get("until", getattr(self.instance, "until", None))
+		if until is not None and start_date is not None and until < start_date:
+			raise serializers.ValidationError({"until": "Must not be before start_date."})
+		if self.instance is not None:
+			self._check_timing(self.instance, data)
+		category = data.get("category")
+		if category is not None:
+			data["transaction_type"] = category.type
+		return data
+
+	def create(self, validated_data):
+		schedule = RecurringTransaction(**validated_data)
+		schedule.next_date = recurring.next_date(schedule)
+		schedule.save()
+		return schedule
+
+	def update(self, instance, validated_data):
+		with transaction.atomic():
+			# The materializer advances occurrences and next_date meanwhile; start from the locked row and write back
+			# only what the user edits, or a stale high-water mark would re-materialize dates already posted.
+			schedule = RecurringTransaction.objects.select_for_update().get(pk=instance.pk)
+			self._check_timing(schedule, validated_data)
+			for attr, value in validated_data.items():
+				setattr(schedule, attr, value)
+			# until and count may end the series early or extend it.
+			schedule.next_date = recurring.next_date(schedule)
+			schedule.save(update_fields=[*validated_data, "next_date", "updated_at"])
+		return schedule
+
+	def _check_timing(self, schedule, data):
+		if not schedule.occurrences:
+			return
+		changed = [name for name in self.TIMING_FIELDS if name in data and data[name] != getattr(schedule, name)]
+		if changed:
+			raise serializers.ValidationError({name: "Cannot change once occurrences exist; create a new schedule instead." for name in changed})
+
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import metrics, rollups, search, sync
+from .authentication import forget_user
+from .catalogue import categories
+from .models import Account, Budget, Category, SavingsGoal, Transaction
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_catalogue(sender, **kwargs):
+	# Retire cached copies only once the change is visible to other connections.
+	transaction.on_commit(categories.invalidate)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+	# Evict now and again after commit so no request caches the pre-change row in between.
+	forget_user(instance.pk)
+	transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=SavingsGoal)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+	# Covers cascades and admin deletes too; nothing is left to sync once the user is gone.
+	if not isinstance(origin, get_user_model()):
+		sync.bury(instance.user_id, sync.KINDS[sender], instance.pk)
+
+
+@receiver(pre_delete, sender=Budget)
+def detach_budget_transactions(sender, instance, origin=None, **kwargs):
+	# SET_NULL would skip auto_now; stamp the rows so the change feed re-sends them without the budget.
+	if not isinstance(origin, get_user_model()):
+		Transaction.objects.filter(budget=instance).update(budget=None, updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def uncategorize_rollups(sender, instance, **kwargs):
+	rollups.uncategorize(instance.pk)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+	metrics.install(connection)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+	# SQLite rebuilds a table for most ALTERs and drops its triggers with it; put the search index's back.
+	if sender.name != "finance" or connections[using].vendor != "sqlite":
+		return
+	with connections[using].cursor() as cursor:
+		if search.sqlite_installed(cursor):
+			search.install_sqlite(cursor)
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+
+from . import budgets
+from .fastserializers import row_serializer
+from .models import Account, Budget, SavingsGoal, Tombstone, Transaction
+from .serializers import AccountSerializer, BudgetSerializer, SavingsGoalSerializer, TransactionSerializer
+
+
+# Payload key -> (model, serializer, ordering); Tombstone.kind uses the same keys.
+FEEDS = {
+	"accounts": (Account, AccountSerializer, ("id",)),
+	"transactions": (Transaction, TransactionSerializer, ("id",)),
+	"budgets": (Budget, BudgetSerializer, ("id",)),
+	"savings_goals": (SavingsGoal, SavingsGoalSerializer, ("-created_at",)),
+}
+KINDS = {model: kind for kind, (model, _, _) in FEEDS.items()}
+# The one feed that can be long; it is sent in pages of page_size() rows, keyed on its id ordering.
+PAGED_FEED = "transactions"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_token(moment):
+	return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def decode_token(token):
+	try:
+		return EPOCH + timedelta(microseconds=int(token))
+	except (TypeError, ValueError, OverflowError):
+		raise exceptions.ValidationError({"since": "Invalid sync token."})
+
+
+def overlap():
+	# A write stamps updated_at before it commits; re-reading this window catches rows that committed late.
+	return timedelta(seconds=getattr(settings, "FINANCE_SYNC_OVERLAP_SECONDS", 60))
+
+
+def retention():
+	return timedelta(days=getattr(settings, "FINANCE_SYNC_TOMBSTONE_DAYS", 30))
+
+
+def page_size():
+	return getattr(settings, "FINANCE_SYNC_PAGE_SIZE", 1000)
+
+
+def encode_cursor(started, cutoff, last_id):
+	return f"{encode_token(started)}.{'' if cutoff is None else encode_token(cutoff)}.{last_id}"
+
+
+def decode_cursor(cursor):
+	try:
+		started, cutoff, last_id = cursor.split(".")
+		return decode_token(started), decode_token(cutoff) if cutoff else None, int(last_id)
+	except (exceptions.ValidationError, ValueError):
+		raise exceptions.ValidationError({"cursor": "Invalid sync cursor."})
+
+
+def changes(user, since=None, cursor=None):
+	"""Rows the user's client needs to catch up from the ``since`` token.
+
+	Each feed lists the rows created or updated since the token and the ids
+	deleted since then. Without a token, or with one older than the tombstone
+	retention, the payload is a full snapshot (``"full": true``) that replaces
+	the client's copy. Windows overlap slightly, so clients must apply rows
+	idempotently; ``token`` is the ``since`` for the next call.
+
+	Transactions come ``page_size()`` at a time. While ``next`` is set the
+	client fetches ``?cursor=<next>`` and merges the rows it returns; only then
+	is ``token`` good to use. Rows changed during the walk are caught by the
+	next sync, because ``token`` is the time the first page was read.
+	"""
+	if cursor is not None:
+		return _continue(user, cursor)
+	started = timezone.now()
+	cutoff = None if since is None else decode_token(since) - overlap()
+	if cutoff is not None and cutoff < started - retention():
+		cutoff = None
+	payload = {"token": encode_token(started), "full": cutoff is None, "next": None}
+	for kind, (model, serializer_class, ordering) in FEEDS.items():
+		if kind == PAGED_FEED:
+			payload[kind], payload["next"] = _transactions_page(user, started, cutoff, 0)
+			continue
+		rows = row_serializer(serializer_class)
+		queryset = model.objects.filter(user=user)
+		if cutoff is not None:
+			queryset = queryset.filter(updated_at__gte=cutoff)
+		values = queryset.order_by(*ordering).values(*rows.columns)
+		if model is Budget:
+			# Read as of this month; roll_budgets stamps updated_at when it moves them, so feeds re-send them.
+			values = budgets.current_rows(values)
+		payload[kind] = {"changed": rows.serialize(values), "deleted": []}
+	if cutoff is not None:
+		deleted = Tombstone.objects.filter(user=user, deleted_at__gte=cutoff).order_by("deleted_at", "id")
+		for kind, object_id in deleted.values_list("kind", "object_id"):
+			payload[kind]["deleted"].append(object_id)
+	return payload
+
+
+def _continue(user, cursor):
+	"""A later page of the transactions feed; the other feeds were complete on the first page."""
+	started, cutoff, last_id = decode_cursor(cursor)
+	payload = {"token": encode_token(started), "full": False, "next": None}
+	payload.update({kind: {"changed": [], "deleted": []} for kind in FEEDS})
+	payload[PAGED_FEED], payload["next"] = _transactions_page(user, started, cutoff, last_id)
+	return payload
+
+
+def _transactions_page(user, started, cutoff, last_id):
+	model, serializer_class, ordering = FEEDS[PAGED_FEED]
+	rows = row_serializer(serializer_class)
+	queryset = model.objects.filter(user=user, id__gt=last_id)
+	if cutoff is not None:
+		queryset = queryset.filter(updated_at__gte=cutoff)
+	size = page_size()
+	# One extra row tells whether another page follows.
+	values = list(queryset.order_by(*ordering).values(*rows.columns)[: size + 1])
+	following = encode_cursor(started, cutoff, values[size - 1]["id"]) if len(values) > size else None
+	return {"changed": rows.serialize(values[:size]), "deleted": []}, following
+
+
+def bury(user_id, kind, object_id):
+	Tombstone.objects.create(user_id=user_id, kind=kind, object_id=object_id)
+
+
+def prune(now=None):
+	"""Drop tombstones past the retention window; clients that old get a full snapshot instead."""
+	deleted, _ = Tombstone.objects.filter(deleted_at__lt=(now or timezone.now()) - retention()).delete()
+	return deleted
@@ -1,3 +1,1625 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import brotli
+import msgpack
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import analytics, async_views, benchmark, columnar, compression, forecast, metrics, recurring, rollups, search, sync
+from .fastserializers import row_serializer
+from .catalogue import categories
+from .importers import parse_ofx
+from .ledger import signed_amount
+from .passwords import HashingPool
+from .views import TransactionViewSet
+from .serializers import AccountSerializer, BudgetSerializer, RecurringTransactionSerializer, SavingsGoalSerializer, TransactionSerializer
+from .models import Account, BalanceCheckpoint, CashFlowForecast, Category, Budget, BudgetPeriod, RecurringTransaction, Transaction, SavingsContribution, SavingsGoal, MonthlyCategoryTotal, Tombstone
+
+
+User = get_user_model()
+
+
+class FinanceAPITestCase(TestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="alice", password="pw-alice-123")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		self.account = Account.objects.create(user=self.user, name="Checking", account_type="checking", balance=Decimal("1000.00"))
+		self.salary = Category.objects.get(name="Salary", type=Category.TYPE_INCOME)
+		self.groceries = Category.objects.get(name="Groceries", type=Category.TYPE_EXPENSE)
+		self.rent = Category.objects.get(name="Rent / Mortgage", type=Category.TYPE_EXPENSE)
+
+	def make_transaction(self, category, amount, on=None, account=None, **extra):
+		return Transaction.objects.create(
+			user=self.user,
+			account=account or self.account,
+			category=category,
+			transaction_type=category.type,
+			amount=Decimal(amount),
+			description=extra.pop("description", category.name),
+			date=on or date.today(),
+			**extra,
+		)
+
+
+class DashboardSummaryTests(FinanceAPITestCase):
+
+	def test_summary_aggregates_current_user_data(self):
+		today = date.today()
+		self.make_transaction(self.salary, "3000.00", today)
+		self.make_transaction(self.groceries, "120.50", today)
+		self.make_transaction(self.rent, "900.00", today)
+		self.make_transaction(self.groceries, "30.00", date(today.year - 2, 1, 15))
+		Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("400.00"))
+		SavingsGoal.objects.create(user=self.user, name="Trip", current_amount=Decimal("50"), target_amount=Decimal("100"))
+		SavingsGoal.objects.create(user=self.user, name="Car", current_amount=Decimal("10"), target_amount=Decimal("1000"))
+
+		other = User.objects.create_user(username="bob", password="pw-bob-123")
+		other_account = Account.objects.create(user=other, name="Other", account_type="checking", balance=Decimal("5"))
+		Transaction.objects.create(user=other, account=other_account, category=self.salary, transaction_type="income", amount=Decimal("99"), description="x", date=today)
+		rollups.rebuild()
+
+		response = self.client.get(reverse("dashboard-summary"))
+
+		self.assertEqual(response.status_code, 200)
+		data = response.json()
+		self.assertEqual(data["total_balance"], "1000.00")
+		self.assertEqual(data["income_this_month"], "3000.00")
+		self.assertEqual(data["expense_this_month"], "1020.50")
+		self.assertEqual(len(data["monthly_series"]), 6)
+		self.assertEqual(data["monthly_series"][-1]["month"], today.strftime("%Y-%m"))
+		self.assertEqual(data["expense_by_category"][0], {"name": "Rent / Mortgage", "value": "900.00"})
+		self.assertEqual(data["expense_by_category"][1], {"name": "Groceries", "value": "150.50"})
+		self.assertEqual(data["budgets"], {"allocated": "400.00", "remaining": "400.00", "spent_pct": "0.00"})
+		self.assertEqual(data["savings"]["saved"], "60.00")
+		self.assertEqual(data["savings"]["next_goal"]["name"], "Trip")
+		self.assertEqual(len(data["recent_transactions"]), 3)
+
+	def test_summary_requires_authentication(self):
+		response = APIClient().get(reverse("dashboard-summary"))
+		self.assertEqual(response.status_code, 401)
+
+
+class TransactionPaginationTests(FinanceAPITestCase):
+
+	def test_cursor_walks_every_row_once_in_order(self):
+		today = date.today()
+		created = [self.make_transaction(self.groceries, "1.00", date(today.year, 1, 1 + (i % 3))) for i in range(7)]
+
+		seen = []
+		url = reverse("transaction-list") + "?page_size=3"
+		while url:
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			body = response.json()
+			self.assertLessEqual(len(body["results"]), 3)
+			seen.extend(row["id"] for row in body["results"])
+			url = body["next"]
+
+		expected = [t.id for t in sorted(created, key=lambda t: (t.date, t.created_at, t.id), reverse=True)]
+		self.assertEqual(seen, expected)
+
+	def test_fields_projection_drops_nested_objects(self):
+		self.make_transaction(self.groceries, "12.00")
+		response = self.client.get(reverse("transaction-list"), {"fields": "id,date,amount"})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(set(response.json()["results"][0]), {"id", "date", "amount"})
+
+	def test_unknown_projection_field_is_rejected(self):
+		response = self.client.get(reverse("transaction-list"), {"fields": "id,account_id"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_garbage_cursor_is_not_found(self):
+		response = self.client.get(reverse("transaction-list"), {"cursor": "not-a-cursor"})
+		self.assertEqual(response.status_code, 404)
+
+
+class TransactionQueryCountTests(FinanceAPITestCase):
+	"""Pin the number of queries per request so nested fields cannot reintroduce N+1."""
+
+	def setUp(self):
+		super().setUp()
+		savings = Account.objects.create(user=self.user, name="Savings", account_type="savings")
+		budget = Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("300"))
+		for i in range(10):
+			self.make_transaction(self.groceries, "5.00", account=savings if i % 2 else self.account, budget=budget)
+			self.make_transaction(self.salary, "50.00")
+
+	def test_list_is_a_single_query(self):
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse("transaction-list"))
+		self.assertEqual(len(response.json()["results"]), 20)
+		self.assertIsNotNone(response.json()["results"][0]["account"])
+
+	def test_projected_list_skips_joins(self):
+		with self.assertNumQueries(1) as ctx:
+			self.client.get(reverse("transaction-list"), {"fields": "id,amount"})
+		self.assertNotIn("JOIN", ctx.captured_queries[0]["sql"])
+
+	def test_retrieve_is_a_single_query(self):
+		tx = Transaction.objects.filter(budget__isnull=False).first()
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse("transaction-detail", args=[tx.pk]))
+		self.assertEqual(response.json()["budget"]["category"], self.groceries.pk)
+
+
+class IndexUsageTests(FinanceAPITestCase):
+	"""The per-user list queries must be answered from the composite indexes, not a sort."""
+
+	def explain(self, queryset):
+		if connection.vendor == "postgresql":
+			with connection.cursor() as cursor:
+				cursor.execute("SET LOCAL enable_seqscan = off")
+		return queryset.explain()
+
+	def test_transaction_list_uses_user_date_index(self):
+		self.make_transaction(self.groceries, "1.00")
+		plan = self.explain(Transaction.objects.filter(user=self.user).order_by("-date", "-created_at", "-id")[:100])
+		self.assertIn("finance_tx_user_date_idx", plan)
+		self.assertNotIn("TEMP B-TREE", plan)
+
+	def test_savings_goal_list_uses_user_created_index(self):
+		SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("100"))
+		plan = self.explain(SavingsGoal.objects.filter(user=self.user).order_by("-created_at"))
+		self.assertIn("finance_goal_user_created_idx", plan)
+		self.assertNotIn("TEMP B-TREE", plan)
+
+
+class BalanceLedgerTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings", balance=Decimal("0"))
+
+	def create(self, category, amount, account=None):
+		payload = {"account_id": (account or self.account).pk, "category_id": category.pk, "description": "x", "date": "2025-01-01", "amount": amount}
+		response = self.client.post(reverse("transaction-list"), payload, format="json")
+		self.assertEqual(response.status_code, 201, response.content)
+		return response.json()
+
+	def balances(self):
+		self.account.refresh_from_db()
+		self.savings.refresh_from_db()
+		return self.account.balance, self.savings.balance
+
+	def test_create_applies_category_sign(self):
+		body = self.create(self.salary, "200.00")
+		self.create(self.groceries, "50.00")
+		self.assertEqual(body["account"]["balance"], "1200.00")
+		self.assertEqual(self.balances(), (Decimal("1150.00"), Decimal("0")))
+		self.assertEqual(Transaction.objects.get(pk=body["id"]).transaction_type, Category.TYPE_INCOME)
+
+	def test_update_moves_amount_between_accounts_and_types(self):
+		body = self.create(self.groceries, "50.00")
+		payload = {"account_id": self.savings.pk, "category_id": self.salary.pk, "description": "x", "date": "2025-01-01", "amount": "80.00"}
+		response = self.client.put(reverse("transaction-detail", args=[body["id"]]), payload, format="json")
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertEqual(response.json()["account"]["balance"], "80.00")
+		self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("80.00")))
+
+	def test_destroy_reverts_balance(self):
+		body = self.create(self.groceries, "50.00")
+		response = self.client.delete(reverse("transaction-detail", args=[body["id"]]))
+		self.assertEqual(response.status_code, 204)
+		self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("0")))
+
+	def test_destroy_reverts_the_current_row_once(self):
+		body = self.create(self.groceries, "50.00")
+		# Read before a concurrent edit and delete land, as a racing DELETE's get_object() would be.
+		stale = Transaction.objects.get(pk=body["id"])
+		self.client.patch(reverse("transaction-detail", args=[body["id"]]), {"amount": "70.00"}, format="json")
+		view = TransactionViewSet()
+		view.perform_destroy(stale)
+		self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("0")))
+		view.perform_destroy(stale)
+		self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("0")))
+
+
+class ConcurrentBalanceTests(TransactionTestCase):
+	"""Hammer one account from several threads; no balance update may be lost."""
+
+	serialized_rollback = True
+	threads = 8
+	per_thread = 15
+
+	def post_with_retry(self, client, payload, url=None):
+		# SQLite serialises writers by failing fast; the atomic block rolled back, so retrying is safe.
+		# Threads spin without backing off (a sleeping thread only loses more races), so allow plenty of tries.
+		for _ in range(1000):
+			try:
+				return client.post(url or reverse("transaction-list"), payload, format="json")
+			except OperationalError:
+				continue
+		raise AssertionError("database stayed locked")
+
+	def test_parallel_creates_keep_balance_exact(self):
+		user = User.objects.create_user(username="carol", password="pw-carol-123")
+		account = Account.objects.create(user=user, name="Checking", account_type="checking", balance=Decimal("0"))
+		salary = Category.objects.get(name="Salary")
+		groceries = Category.objects.get(name="Groceries")
+		errors = []
+
+		def worker(index):
+			client = APIClient()
+			client.force_authenticate(user)
+			try:
+				for i in range(self.per_thread):
+					category = salary if (index + i) % 2 else groceries
+					payload = {"account_id": account.pk, "category_id": category.pk, "description": "load", "date": "2025-01-01", "amount": "3.00"}
+					response = self.post_with_retry(client, payload)
+					if response.status_code != 201:
+						errors.append(response.status_code)
+			except Exception as exc:
+				errors.append(exc)
+			finally:
+				connection.close()
+
+		workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		# A retried request may have committed before its error surfaced, so compare against the
+		# rows that actually exist: the balance must equal their sum exactly.
+		rows = Transaction.objects.filter(account=account)
+		self.assertGreaterEqual(rows.count(), self.threads * self.per_thread)
+		expected = sum(signed_amount(row.transaction_type, row.amount) for row in rows)
+		account.refresh_from_db()
+		self.assertEqual(account.balance, expected)
+
+	def test_parallel_bulk_updates_revert_the_current_row(self):
+		user = User.objects.create_user(username="carol", password="pw-carol-123")
+		account = Account.objects.create(user=user, name="Checking", account_type="checking", balance=Decimal("0"))
+		groceries = Category.objects.get(name="Groceries")
+		row = Transaction.objects.create(user=user, account=account, category=groceries, transaction_type="expense", amount=Decimal("1.00"), description="x", date=date(2025, 1, 1))
+		Account.objects.filter(pk=account.pk).update(balance=Decimal("-1.00"))
+		url = reverse("transaction-bulk")
+		errors = []
+
+		def worker(index):
+			client = APIClient()
+			client.force_authenticate(user)
+			try:
+				for i in range(self.per_thread):
+					payload = {"update": [{"id": row.pk, "amount": f"{index + i + 1}.00"}]}
+					response = self.post_with_retry(client, payload, url)
+					if response.status_code != 200:
+						errors.append(response.status_code)
+			except Exception as exc:
+				errors.append(exc)
+			finally:
+				connection.close()
+
+		workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		row.refresh_from_db()
+		account.refresh_from_db()
+		self.assertEqual(account.balance, -row.amount)
+
+	def test_parallel_savings_adds_are_not_lost(self):
+		user = User.objects.create_user(username="carol", password="pw-carol-123")
+		goal = SavingsGoal.objects.create(user=user, name="Trip", target_amount=Decimal("1000"))
+		url = reverse("savingsgoal-add", args=[goal.pk])
+		errors = []
+
+		def worker():
+			client = APIClient()
+			client.force_authenticate(user)
+			try:
+				for _ in range(self.per_thread):
+					response = self.post_with_retry(client, {"amount": "0.25"}, url)
+					if response.status_code != 200:
+						errors.append(response.status_code)
+			except Exception as exc:
+				errors.append(exc)
+			finally:
+				connection.close()
+
+		workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		contributions = SavingsContribution.objects.filter(goal=goal)
+		self.assertGreaterEqual(contributions.count(), self.threads * self.per_thread)
+		goal.refresh_from_db()
+		self.assertEqual(goal.current_amount, sum(row.amount for row in contributions))
+		self.assertEqual((goal.contributed_total, goal.contribution_count), (goal.current_amount, contributions.count()))
+
+
+class BulkTransactionTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings", balance=Decimal("0"))
+
+	def row(self, category, amount, account=None, **extra):
+		return dict({"account_id": (account or self.account).pk, "category_id": category.pk, "description": "sync", "date": "2025-02-01", "amount": amount}, **extra)
+
+	def test_bulk_create_update_delete_applies_net_deltas(self):
+		keep = self.make_transaction(self.groceries, "10.00")
+		drop = self.make_transaction(self.groceries, "20.00")
+		payload = {
+			"create": [self.row(self.salary, "100.00"), self.row(self.groceries, "30.00"), self.row(self.salary, "5.00", self.savings)],
+			"update": [{"id": keep.pk, "amount": "15.00"}],
+			"delete": [drop.pk],
+		}
+		response = self.client.post(reverse("transaction-bulk"), payload, format="json")
+
+		self.assertEqual(response.status_code, 200, response.content)
+		body = response.json()
+		self.assertEqual(len(body["created"]), 3)
+		self.assertEqual(body["updated"], [keep.pk])
+		self.assertEqual(body["deleted"], [drop.pk])
+		self.account.refresh_from_db()
+		self.savings.refresh_from_db()
+		# Rows made with make_transaction bypass the ledger, so only the bulk deltas apply.
+		self.assertEqual(self.account.balance, Decimal("1000.00") + 100 - 30 - 5 + 20)
+		self.assertEqual(self.savings.balance, Decimal("5.00"))
+		self.assertFalse(Transaction.objects.filter(pk=drop.pk).exists())
+
+	def test_bulk_validation_uses_constant_queries(self):
+		rows = [self.row(self.groceries, "1.00") for _ in range(50)]
+		categories.snapshot()
+		with self.assertNumQueries(1):
+			# One lookup for the referenced accounts however many rows there are; categories come from the catalogue.
+			response = self.client.post(reverse("transaction-bulk"), {"create": rows + [self.row(self.groceries, "x")]}, format="json")
+		self.assertEqual(response.status_code, 400)
+
+	def test_bulk_reports_per_row_errors_and_writes_nothing(self):
+		other = User.objects.create_user(username="mallory", password="pw-mallory-123")
+		foreign = Account.objects.create(user=other, name="Theirs", account_type="checking")
+		payload = {"create": [self.row(self.salary, "1.00"), self.row(self.salary, "1.00", foreign)], "delete": [999999]}
+		response = self.client.post(reverse("transaction-bulk"), payload, format="json")
+
+		self.assertEqual(response.status_code, 400)
+		errors = response.json()
+		self.assertEqual(list(errors["create"]), ["1"])
+		self.assertIn("account_id", errors["create"]["1"])
+		self.assertEqual(errors["delete"], {"0": {"id": ["Not found."]}})
+		self.assertFalse(Transaction.objects.exists())
+
+
+class StatementImportTests(FinanceAPITestCase):
+
+	csv_statement = (
+		"Date,Description,Amount,Category\n"
+		"2025-03-01,Paycheck,2500.00,Salary\n"
+		"2025-03-02,Coffee,-3.50,\n"
+		"2025-03-02,Coffee,-3.50,\n"
+		"2025-03-03,Weekly shop,-80.25,Groceries\n"
+		"not-a-date,Broken,-1.00,\n"
+	)
+
+	def upload(self, content, name="statement.csv"):
+		upload = SimpleUploadedFile(name, content.encode("utf-8"))
+		return self.client.post(reverse("transaction-import-statement"), {"file": upload, "account_id": self.account.pk}, format="multipart")
+
+	def test_csv_upload_imports_in_batches_and_reconciles_balance(self):
+		response = self.upload(self.csv_statement)
+
+		self.assertEqual(response.status_code, 200, response.content)
+		summary = response.json()
+		self.assertEqual(summary["imported"], 4)
+		self.assertEqual(summary["error_count"], 1)
+		self.assertEqual(summary["errors"][0]["line"], 6)
+		self.account.refresh_from_db()
+		self.assertEqual(self.account.balance, Decimal("1000.00") + Decimal("2500.00") - Decimal("7.00") - Decimal("80.25"))
+		coffee = Transaction.objects.filter(description="Coffee")
+		self.assertEqual(coffee.count(), 2)
+		self.assertEqual(coffee.first().category.name, "Miscellaneous")
+
+	def test_reimport_skips_duplicates(self):
+		self.upload(self.csv_statement)
+		response = self.upload(self.csv_statement)
+		self.assertEqual(response.json()["imported"], 0)
+		self.assertEqual(response.json()["duplicates"], 4)
+		self.assertEqual(Transaction.objects.count(), 4)
+
+	def test_repeated_lines_that_are_not_adjacent_are_numbered_across_the_statement(self):
+		statement = (
+			"Date,Description,Amount\n"
+			"2025-03-01,Coffee,-3.50\n"
+			"2025-03-02,Bus,-2.00\n"
+			"2025-03-01,Coffee,-3.50\n"
+		)
+		response = self.upload(statement)
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertEqual(response.json()["imported"], 3)
+		response = self.upload(statement)
+		self.assertEqual((response.json()["imported"], response.json()["duplicates"]), (0, 3))
+
+	def test_lines_that_are_not_utf8_are_reported_not_imported(self):
+		statement = "Date,Description,Amount\n2025-03-01,Caf\u00e9,-3.50\n2025-03-02,Bus,-2.00\n".encode("cp1252")
+		upload = SimpleUploadedFile("statement.csv", statement)
+		response = self.client.post(reverse("transaction-import-statement"), {"file": upload, "account_id": self.account.pk}, format="multipart")
+		self.assertEqual(response.status_code, 200, response.content)
+		self.assertEqual((response.json()["imported"], response.json()["errors"][0]["line"]), (1, 2))
+
+		response = self.upload("Date,Description,Amount\n2025-03-01," + "x" * 200_000 + ",-1.00\n")
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("file", response.json())
+
+	def test_direction_follows_sign_or_type_column_not_category(self):
+		self.upload(
+			"Date,Description,Amount,Category,Type\n"
+			"2025-03-01,Refund,25.00,Groceries,\n"
+			"2025-03-02,Shop,-10.00,Groceries,\n"
+			"2025-03-03,Bonus,5.00,,income\n"
+			"2025-03-04,Fee,5.00,,expense\n"
+		)
+		rows = dict(Transaction.objects.values_list("description", "transaction_type"))
+		self.assertEqual(rows, {"Refund": "income", "Shop": "expense", "Bonus": "income", "Fee": "expense"})
+		self.account.refresh_from_db()
+		self.assertEqual(self.account.balance, Decimal("1000.00") + 25 - 10 + 5 - 5)
+
+	def test_ofx_parser_reads_blocks_split_across_chunks(self):
+		ofx = (
+			"OFXHEADER:100\n<OFX><BANKTRANLIST>"
+			"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250304120000<TRNAMT>-12.00<FITID>A1<NAME>Cinema</STMTTRN>"
+			"<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20250305\n<TRNAMT>40.00\n<FITID>A2\n<MEMO>Refund\n</STMTTRN>"
+			"</BANKTRANLIST></OFX>"
+		)
+		chunks = [ofx[i:i + 7] for i in range(0, len(ofx), 7)]
+		records = [record for _, record in parse_ofx(chunks)]
+		self.assertEqual([r["fitid"] for r in records], ["A1", "A2"])
+		self.assertEqual(records[0]["date"], "20250304")
+		self.assertEqual(records[1]["description"], "Refund")
+
+	def test_ofx_parser_reads_single_line_files_in_fixed_chunks(self):
+		block = "<stmttrn><DTPOSTED>20250304<TRNAMT>-1.00<FITID>F{}<NAME>x</STMTTRN>"
+		source = io.StringIO("<OFX>" + "".join(block.format(i) for i in range(300)) + "</OFX>")
+		sizes = []
+		read = source.read
+		source.read = lambda size: sizes.append(size) or read(size)
+		records = [record for _, record in parse_ofx(source, chunk_size=13)]
+		self.assertEqual([r["fitid"] for r in records], [f"F{i}" for i in range(300)])
+		self.assertEqual(set(sizes), {13})
+
+	def test_management_command_imports_file(self):
+		with tempfile.TemporaryDirectory() as folder:
+			path = os.path.join(folder, "statement.csv")
+			with open(path, "w") as handle:
+				handle.write(self.csv_statement)
+			out = io.StringIO()
+			call_command("import_transactions", path, user="alice", account=self.account.pk, batch_size=2, stdout=out, stderr=io.StringIO())
+		self.assertIn("Imported 4 transactions", out.getvalue())
+
+
+class TransactionExportTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings")
+		self.make_transaction(self.salary, "2500.00", date(2025, 1, 31), description="Pay, January")
+		self.make_transaction(self.groceries, "42.10", date(2025, 2, 3))
+		self.make_transaction(self.groceries, "9.99", date(2025, 2, 4), account=self.savings)
+
+	def read(self, response):
+		self.assertEqual(response.status_code, 200)
+		return b"".join(response.streaming_content).decode("utf-8")
+
+	def test_csv_export_streams_all_rows_in_date_order(self):
+		response = self.client.get(reverse("transaction-export"))
+		self.assertEqual(response["Content-Type"], "text/csv")
+		lines = self.read(response).splitlines()
+		self.assertEqual(lines[0], "id,date,description,amount,type,account_id,account,category,category_type,budget_id")
+		self.assertEqual(len(lines), 4)
+		self.assertIn('"Pay, January",2500.00,income', lines[1])
+
+	def test_ndjson_export_applies_filters(self):
+		response = self.client.get(reverse("transaction-export"), {"output": "ndjson", "date_after": "2025-02-01", "account": self.account.pk})
+		rows = [json.loads(line) for line in self.read(response).splitlines()]
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0]["amount"], "42.10")
+		self.assertEqual(rows[0]["category"], "Groceries")
+
+	def test_export_rejects_bad_filters(self):
+		response = self.client.get(reverse("transaction-export"), {"date_before": "31/01/2025"})
+		self.assertEqual(response.status_code, 400)
+		response = self.client.get(reverse("transaction-export"), {"account": "abc"})
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("account", response.json())
+
+
+class MonthlyRollupTests(FinanceAPITestCase):
+
+	def post(self, category, amount, on="2025-04-10"):
+		payload = {"account_id": self.account.pk, "category_id": category.pk, "description": "x", "date": on, "amount": amount}
+		response = self.client.post(reverse("transaction-list"), payload, format="json")
+		self.assertEqual(response.status_code, 201, response.content)
+		return response.json()["id"]
+
+	def totals(self):
+		return {
+			(row.month.isoformat(), row.category.name): (row.total, row.count)
+			for row in MonthlyCategoryTotal.objects.filter(user=self.user, count__gt=0)
+		}
+
+	def test_write_paths_keep_rollup_in_step(self):
+		first = self.post(self.groceries, "10.00")
+		self.post(self.groceries, "5.00")
+		self.post(self.salary, "100.00", on="2025-05-01")
+		self.assertEqual(self.totals(), {
+			("2025-04-01", "Groceries"): (Decimal("15.00"), 2),
+			("2025-05-01", "Salary"): (Decimal("100.00"), 1),
+		})
+
+		payload = {"account_id": self.account.pk, "category_id": self.rent.pk, "description": "x", "date": "2025-05-02", "amount": "7.00"}
+		self.client.put(reverse("transaction-detail", args=[first]), payload, format="json")
+		self.client.post(reverse("transaction-bulk"), {"delete": [Transaction.objects.get(category=self.salary).pk]}, format="json")
+
+		self.assertEqual(self.totals(), {
+			("2025-04-01", "Groceries"): (Decimal("5.00"), 1),
+			("2025-05-01", "Rent / Mortgage"): (Decimal("7.00"), 1),
+		})
+		self.assertEqual(rollups.verify([self.user]), [])
+
+	def test_uncategorized_rows_share_one_key(self):
+		key = {"user": self.user, "account": self.account, "category": None, "month": date(2025, 4, 1), "transaction_type": "expense"}
+		MonthlyCategoryTotal.objects.create(total=Decimal("3.00"), count=1, **key)
+		with self.assertRaises(IntegrityError), transaction.atomic():
+			MonthlyCategoryTotal.objects.create(total=Decimal("4.00"), count=1, **key)
+
+		Transaction.objects.create(user=self.user, account=self.account, transaction_type="expense", amount=Decimal("3.00"), description="x", date=date(2025, 4, 2))
+		self.post(self.groceries, "10.00")
+		self.groceries.delete()
+		self.assertEqual(
+			list(MonthlyCategoryTotal.objects.filter(user=self.user).values_list("category", "total", "count")),
+			[(None, Decimal("13.00"), 2)],
+		)
+		self.assertEqual(rollups.verify([self.user]), [])
+
+	def test_command_verifies_and_rebuilds(self):
+		self.post(self.groceries, "10.00")
+		MonthlyCategoryTotal.objects.update(total=Decimal("1.00"))
+		with self.assertRaises(CommandError):
+			call_command("rebuild_rollups", "--verify", stdout=io.StringIO(), stderr=io.StringIO())
+		call_command("rebuild_rollups", user=["alice"], stdout=io.StringIO())
+		self.assertEqual(rollups.verify(), [])
+
+
+class BudgetSpendTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.budget = Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("300.00"))
+		self.today = date.today().isoformat()
+
+	def payload(self, amount, on=None, budget=True):
+		return {"account_id": self.account.pk, "category_id": self.groceries.pk, "description": "shop", "date": on or self.today, "amount": amount, "budget_id": self.budget.pk if budget else None}
+
+	def test_transaction_writes_update_current_period_spend(self):
+		response = self.client.post(reverse("transaction-list"), self.payload("40.00"), format="json")
+		self.assertEqual(response.json()["budget"]["remaining_amount"], 260)
+		tx_id = response.json()["id"]
+
+		response = self.client.put(reverse("transaction-detail", args=[tx_id]), self.payload("55.00"), format="json")
+		self.assertEqual(response.json()["budget"]["spent_amount"], 55)
+
+		self.client.post(reverse("transaction-list"), self.payload("5.00"), format="json")
+		self.client.delete(reverse("transaction-detail", args=[tx_id]))
+		self.budget.refresh_from_db()
+		self.assertEqual((self.budget.spent_amount, self.budget.remaining_amount), (Decimal("5.00"), Decimal("295.00")))
+		period = BudgetPeriod.objects.get(budget=self.budget)
+		self.assertEqual(period.spent_amount, Decimal("5.00"))
+
+	def test_backdated_spend_only_touches_its_own_period(self):
+		self.client.post(reverse("transaction-list"), self.payload("70.00", on="2020-01-15"), format="json")
+		self.budget.refresh_from_db()
+		self.assertEqual(self.budget.remaining_amount, Decimal("300.00"))
+		self.assertEqual(BudgetPeriod.objects.get(budget=self.budget, month=date(2020, 1, 1)).spent_amount, Decimal("70.00"))
+
+	def test_reads_show_the_new_month_and_the_command_rolls_it(self):
+		old_month = date(2020, 1, 1)
+		Budget.objects.filter(pk=self.budget.pk).update(current_period=old_month, spent_amount=Decimal("100.00"), remaining_amount=Decimal("200.00"))
+		BudgetPeriod.objects.create(budget=self.budget, month=old_month, allocated_amount=Decimal("300.00"), spent_amount=Decimal("100.00"))
+		self.client.post(reverse("transaction-list"), self.payload("25.00"), format="json")
+		current = (date.today().replace(day=1).isoformat(), "25.00", "275.00")
+
+		row = self.client.get(reverse("budget-list")).json()[0]
+		self.assertEqual((row["current_period"], row["spent_amount"], row["remaining_amount"]), current)
+		row = self.client.get(reverse("budget-detail", args=[self.budget.pk])).json()
+		self.assertEqual((row["current_period"], row["spent_amount"], row["remaining_amount"]), current)
+		self.assertEqual(self.client.get(reverse("dashboard-summary")).json()["budgets"]["remaining"], "275.00")
+		row = self.client.get(reverse("sync")).json()["budgets"]["changed"][0]
+		self.assertEqual((row["current_period"], row["spent_amount"], row["remaining_amount"]), current)
+		self.budget.refresh_from_db()
+		self.assertEqual(self.budget.current_period, old_month)
+		self.assertIsNone(BudgetPeriod.objects.get(budget=self.budget, month=old_month).closed_at)
+
+		call_command("roll_budgets", stdout=io.StringIO())
+		self.budget.refresh_from_db()
+		self.assertEqual((self.budget.current_period.isoformat(), self.budget.spent_amount), (current[0], Decimal("25.00")))
+		self.assertIsNotNone(BudgetPeriod.objects.get(budget=self.budget, month=old_month).closed_at)
+
+	def test_changing_allocation_keeps_recorded_spend(self):
+		self.client.post(reverse("transaction-list"), self.payload("40.00"), format="json")
+		response = self.client.patch(reverse("budget-detail", args=[self.budget.pk]), {"allocated_amount": "500.00"}, format="json")
+		self.assertEqual(response.json()["remaining_amount"], "460.00")
+		self.assertEqual(BudgetPeriod.objects.get(budget=self.budget).allocated_amount, Decimal("500.00"))
+
+
+class CategoryCatalogueTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		categories.invalidate()
+		# Rows created here are rolled back, so do not leave them in the shared catalogue.
+		self.addCleanup(categories.invalidate)
+
+	def test_list_matches_table_and_revalidates_without_queries(self):
+		response = self.client.get(reverse("category-list"))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json(), list(Category.objects.order_by("id").values("id", "name", "type")))
+		self.assertIn("max-age", response["Cache-Control"])
+
+		with self.assertNumQueries(0):
+			again = self.client.get(reverse("category-list"), HTTP_IF_NONE_MATCH=response["ETag"])
+		self.assertEqual(again.status_code, 304)
+
+	def test_write_changes_etag_and_validation_map(self):
+		etag = self.client.get(reverse("category-list"))["ETag"]
+		with self.captureOnCommitCallbacks(execute=True):
+			hobby = Category.objects.create(name="Hobbies", type=Category.TYPE_EXPENSE)
+
+		response = self.client.get(reverse("category-list"), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response["ETag"], etag)
+		self.assertIn(hobby.pk, categories.lookup(Category.TYPE_EXPENSE))
+
+	def test_budget_category_must_be_an_expense(self):
+		response = self.client.post(reverse("budget-list"), {"category_id": self.salary.pk, "allocated_amount": "10"}, format="json")
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("category_id", response.json())
+
+
+@override_settings(FINANCE_RESPONSE_CACHE=True)
+class UserListCacheTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.goal = SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("500"))
+
+	def test_unchanged_list_revalidates_with_304_and_no_queries(self):
+		first = self.client.get(reverse("account-list"))
+		self.assertEqual(first.status_code, 200)
+		with self.assertNumQueries(0):
+			cached = self.client.get(reverse("account-list"))
+			revalidated = self.client.get(reverse("account-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+		self.assertEqual(cached.json(), first.json())
+		self.assertEqual(revalidated.status_code, 304)
+
+	def test_transaction_write_retires_cached_accounts(self):
+		etag = self.client.get(reverse("account-list"))["ETag"]
+		payload = {"account_id": self.account.pk, "category_id": self.salary.pk, "description": "x", "date": "2025-01-01", "amount": "25.00"}
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(reverse("transaction-list"), payload, format="json")
+
+		response = self.client.get(reverse("account-list"), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()[0]["balance"], "1025.00")
+
+	def test_savings_add_and_goal_writes_bump_version(self):
+		etag = self.client.get(reverse("savingsgoal-list"))["ETag"]
+		self.client.post(reverse("savingsgoal-add", args=[self.goal.pk]), {"amount": "20"}, format="json")
+		response = self.client.get(reverse("savingsgoal-list"), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()[0]["current_amount"], "20.00")
+
+		etag = response["ETag"]
+		self.client.post(reverse("budget-list"), {"category_id": self.groceries.pk, "allocated_amount": "50"}, format="json")
+		self.assertEqual(self.client.get(reverse("savingsgoal-list"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_cache_is_per_user(self):
+		self.client.get(reverse("account-list"))
+		other = User.objects.create_user(username="dave", password="pw-dave-123")
+		client = APIClient()
+		client.force_authenticate(other)
+		self.assertEqual(client.get(reverse("account-list")).json(), [])
+
+
+@override_settings(FINANCE_AUTH_CACHE=True)
+class AuthenticationTests(TestCase):
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="erin", password="pw-erin-123")
+		Account.objects.create(user=self.user, name="Checking", account_type="checking")
+		self.client = APIClient()
+
+	def login(self, password="pw-erin-123"):
+		return self.client.post(reverse("login"), {"username": "erin", "password": password}, format="json")
+
+	def authorize(self):
+		response = self.login()
+		self.assertEqual(response.status_code, 200)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+
+	def test_user_is_resolved_from_cache_after_first_request(self):
+		self.authorize()
+		with self.assertNumQueries(2):
+			self.assertEqual(self.client.get(reverse("account-list")).status_code, 200)
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse("account-list"))
+		self.assertEqual(response.json()[0]["name"], "Checking")
+
+	def test_deactivated_user_is_rejected_immediately(self):
+		self.authorize()
+		self.client.get(reverse("account-list"))
+		self.user.is_active = False
+		with self.captureOnCommitCallbacks(execute=True):
+			self.user.save()
+		self.assertEqual(self.client.get(reverse("account-list")).status_code, 401)
+
+	def test_logout_revokes_issued_tokens(self):
+		self.authorize()
+		self.assertEqual(self.client.post(reverse("logout")).status_code, 204)
+		response = self.client.get(reverse("account-list"))
+		self.assertEqual(response.status_code, 401)
+
+	def test_login_in_the_same_second_as_logout_is_accepted(self):
+		self.authorize()
+		self.assertEqual(self.client.post(reverse("logout")).status_code, 204)
+		self.client.credentials()
+		self.authorize()
+		self.assertEqual(self.client.get(reverse("account-list")).status_code, 200)
+
+	@override_settings(FINANCE_AUTH_CACHE=False)
+	def test_without_shared_cache_user_is_loaded_from_database(self):
+		self.authorize()
+		for _ in range(2):
+			with self.assertNumQueries(2):
+				self.assertEqual(self.client.get(reverse("account-list")).status_code, 200)
+
+	def test_wrong_password_is_rejected(self):
+		self.assertEqual(self.login("nope").status_code, 400)
+		response = self.client.post(reverse("login"), {"username": "nobody", "password": "x"}, format="json")
+		self.assertEqual(response.status_code, 400)
+
+	@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.PBKDF2PasswordHasher", "django.contrib.auth.hashers.MD5PasswordHasher"])
+	def test_login_upgrades_hash_to_preferred_profile(self):
+		User.objects.filter(pk=self.user.pk).update(password=make_password("pw-erin-123", hasher="md5"))
+		self.assertEqual(self.login().status_code, 200)
+		self.user.refresh_from_db()
+		self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+	def test_register_hashes_in_pool_and_normalizes_like_create_user(self):
+		payload = {"username": "\uff46rank", "email": "Frank@EXAMPLE.com", "password": "pw-frank-123", "password2": "pw-frank-123"}
+		self.assertEqual(self.client.post(reverse("register"), payload, format="json").status_code, 201)
+		user = User.objects.get(username="frank")
+		self.assertTrue(user.check_password("pw-frank-123"))
+		self.assertEqual(user.email, "Frank@example.com")
+
+	def test_saturated_hashing_pool_throttles(self):
+		pool = HashingPool(workers=1, queue_limit=0)
+		started, release = threading.Event(), threading.Event()
+		worker = threading.Thread(target=pool.run, args=(lambda: started.set() or release.wait(),))
+		worker.start()
+		try:
+			started.wait()
+			with self.assertRaises(Throttled):
+				pool.run(make_password, "x")
+		finally:
+			release.set()
+			worker.join()
+		self.assertTrue(pool.run(make_password, "x"))
+
+
+class AsyncReadTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		cache.clear()
+		self.token = str(AccessToken.for_user(self.user))
+		self.factory = RequestFactory()
+
+	def call(self, view, path, data=None, **extra):
+		extra.setdefault("HTTP_AUTHORIZATION", f"Bearer {self.token}")
+		return async_to_sync(view)(self.factory.get(path, data or {}, **extra))
+
+	def test_transaction_list_matches_sync_view(self):
+		for day in (1, 2, 3):
+			self.make_transaction(self.groceries, "10.00", date(2025, 1, day))
+		path = reverse("transaction-list")
+		expected = self.client.get(path, {"page_size": 2})
+		response = self.call(async_views.transaction_list, path, {"page_size": 2})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.content, expected.content)
+
+		cursor = json.loads(response.content)["next_cursor"]
+		expected = self.client.get(path, {"page_size": 2, "cursor": cursor, "fields": "id,amount"})
+		response = self.call(async_views.transaction_list, path, {"page_size": 2, "cursor": cursor, "fields": "id,amount"})
+		self.assertEqual(response.content, expected.content)
+		self.assertEqual(len(json.loads(response.content)["results"]), 1)
+
+	def test_account_and_dashboard_match_sync_views(self):
+		self.make_transaction(self.salary, "250.00")
+		Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("100.00"))
+		rollups.rebuild()
+		for name, view in (("account-list", async_views.account_list), ("dashboard-summary", async_views.dashboard_summary)):
+			path = reverse(name)
+			self.assertEqual(self.call(view, path).content, self.client.get(path).content, name)
+
+	@override_settings(FINANCE_RESPONSE_CACHE=True)
+	def test_account_list_shares_the_response_cache(self):
+		etag = self.client.get(reverse("account-list"))["ETag"]
+		response = self.call(async_views.account_list, reverse("account-list"), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response["ETag"], etag)
+
+	def test_errors_render_like_drf(self):
+		response = self.call(async_views.account_list, reverse("account-list"), HTTP_AUTHORIZATION="")
+		self.assertEqual(response.status_code, 401)
+		self.assertEqual(response.content, APIClient().get(reverse("account-list")).content)
+		self.assertIn("Bearer", response["WWW-Authenticate"])
+
+		response = self.call(async_views.transaction_list, reverse("transaction-list"), {"fields": "nope"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_writes_fall_through_to_drf(self):
+		request = self.factory.post(
+			reverse("account-list"), {"name": "Savings", "balance": "5.00"}, content_type="application/json",
+			HTTP_AUTHORIZATION=f"Bearer {self.token}",
+		)
+		response = async_to_sync(async_views.account_list)(request)
+		response.render()
+		self.assertEqual(response.status_code, 201)
+		self.assertTrue(Account.objects.filter(user=self.user, name="Savings").exists())
+
+
+class BenchmarkTests(TestCase):
+
+	def setUp(self):
+		cache.clear()
+
+	def test_generated_dataset_is_consistent(self):
+		(dataset,) = benchmark.generate(accounts=2, budgets=3, goals=2, transactions=250, batch_size=100)
+		user = dataset.user
+		self.assertEqual(Transaction.objects.filter(user=user).count(), 250)
+		self.assertEqual(Account.objects.filter(user=user).count(), 2)
+		self.assertEqual(Budget.objects.filter(user=user).count(), 3)
+		for account in Account.objects.filter(user=user):
+			expected = sum(signed_amount(t.transaction_type, t.amount) for t in account.transactions.all())
+			self.assertEqual(account.balance, expected)
+		self.assertEqual(rollups.verify([user]), [])
+
+	@override_settings(FINANCE_AUTH_CACHE=True)
+	def test_scenarios_report_latency_queries_and_memory(self):
+		(dataset,) = benchmark.generate(transactions=50)
+		report = benchmark.run_scenarios(dataset, iterations=3, memory_iterations=1)
+		self.assertEqual(list(report), [scenario.name for scenario in benchmark.SCENARIOS])
+		for name, row in report.items():
+			self.assertEqual(row["errors"], 0, name)
+			self.assertGreaterEqual(row["p99_ms"], row["p50_ms"])
+			self.assertGreater(row["peak_memory_kb"], 0)
+		self.assertEqual(report["transaction_list"]["max_queries"], 1)
+
+	def test_compare_flags_query_and_latency_regressions(self):
+		row = {"errors": 0, "p95_ms": 10.0, "max_queries": 2}
+		baseline = {"scenarios": {"dashboard": row, "login": row}}
+		current = {"scenarios": {"dashboard": {**row, "max_queries": 3}, "login": {**row, "p95_ms": 12.0}}}
+		self.assertEqual(benchmark.compare(baseline, current), ["dashboard: queries 2 -> 3"])
+		self.assertEqual(len(benchmark.compare(baseline, current, latency_tolerance=0.1)), 2)
+		self.assertEqual(benchmark.compare(baseline, current, names=["login"]), [])
+
+
+class FastSerializerParityTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings", balance=Decimal("12.5"))
+		self.budget = Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("300"))
+		self.make_transaction(self.salary, "2500.00")
+		self.make_transaction(self.groceries, "42.10", budget=self.budget, account=self.savings)
+		self.make_transaction(self.rent, "900", on=date(2024, 2, 29), description="")
+		uncategorised = self.make_transaction(self.groceries, "0.05")
+		Transaction.objects.filter(pk=uncategorised.pk).update(category=None)
+		SavingsGoal.objects.create(user=self.user, name="Trip", current_amount=Decimal("10"), target_amount=Decimal("1000.5"))
+
+	def assertSameOutput(self, serializer_class, queryset, fields=None):
+		kwargs = {"fields": fields} if fields is not None else {}
+		expected = JSONRenderer().render(serializer_class(queryset, many=True, **kwargs).data)
+		rows = row_serializer(serializer_class, tuple(fields) if fields is not None else None)
+		actual = JSONRenderer().render(rows.serialize(queryset.values(*rows.columns)))
+		self.assertEqual(actual, expected)
+
+	def test_transactions_match_drf(self):
+		self.assertSameOutput(TransactionSerializer, Transaction.objects.filter(user=self.user).order_by("id"))
+		self.assertTrue(Transaction.objects.filter(user=self.user, category=None).exists())
+
+	def test_transaction_projection_matches_drf(self):
+		queryset = Transaction.objects.filter(user=self.user).order_by("id")
+		self.assertSameOutput(TransactionSerializer, queryset, ["id", "amount", "budget", "category"])
+
+	def test_other_lists_match_drf(self):
+		self.assertSameOutput(AccountSerializer, Account.objects.filter(user=self.user).order_by("id"))
+		self.assertSameOutput(BudgetSerializer, Budget.objects.filter(user=self.user).order_by("id"))
+		self.assertSameOutput(SavingsGoalSerializer, SavingsGoal.objects.filter(user=self.user).order_by("id"))
+
+	def test_list_endpoint_runs_one_query(self):
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse("transaction-list"))
+		self.assertEqual(len(response.json()["results"]), 4)
+
+	def test_microbenchmark_reports_both_timings(self):
+		report = benchmark.serializer_microbenchmark(self.user, rows=4, repeat=2)
+		self.assertEqual(report["rows"], 4)
+		self.assertGreater(report["drf_ms"], 0)
+
+
+class RequestMetricsTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		cache.clear()
+		self.client.force_authenticate(None)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+	def test_server_timing_breaks_down_the_request(self):
+		self.make_transaction(self.groceries, "12.00")
+		response = self.client.get(reverse("transaction-list"))
+		timing = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+		self.assertEqual(set(timing), {"total", "db", "auth", "serialize", "render"})
+		self.assertIn('desc="2 queries"', timing["db"])
+
+	@override_settings(FINANCE_METRICS_TOKEN="scrape-me")
+	def test_metrics_endpoint_exposes_histograms(self):
+		self.client.get(reverse("account-list"))
+		anonymous = APIClient()
+		self.assertEqual(anonymous.get(reverse("metrics")).status_code, 403)
+		response = anonymous.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-me")
+		self.assertEqual(response.status_code, 200)
+		body = response.content.decode()
+		self.assertIn('finance_request_duration_seconds_bucket{view="account-list",action="list",method="GET",le="+Inf"}', body)
+		self.assertIn('finance_request_phase_seconds_count{view="account-list",action="list",method="GET",phase="auth"}', body)
+		self.assertIn('finance_requests_total{view="account-list",action="list",method="GET",status="2xx"}', body)
+
+	def test_metrics_endpoint_is_off_without_a_token(self):
+		self.assertEqual(APIClient().get(reverse("metrics")).status_code, 404)
+
+	@override_settings(FINANCE_SLOW_REQUEST_MS=0, FINANCE_SLOW_REQUEST_SAMPLE=1.0)
+	def test_slow_requests_are_logged_with_sql(self):
+		with self.assertLogs("finance.slow_requests", "WARNING") as logs:
+			self.client.get(reverse("account-list"))
+		self.assertIn("GET /api/accounts/ (account-list.list)", logs.output[0])
+		self.assertIn("finance_account", logs.output[0])
+
+	def test_histogram_buckets_are_cumulative(self):
+		histogram = metrics.Histogram("h", "help", (1, 5), ("view",))
+		for value in (0.5, 3, 3, 10):
+			histogram.observe(("x",), value)
+		lines = histogram.render()
+		self.assertIn('h_bucket{view="x",le="1"} 1', lines)
+		self.assertIn('h_bucket{view="x",le="5"} 3', lines)
+		self.assertIn('h_bucket{view="x",le="+Inf"} 4', lines)
+		self.assertIn('h_count{view="x"} 4', lines)
+
+
+class ResponseFormatTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		cache.clear()
+		for day in range(1, 11):
+			self.make_transaction(self.groceries, f"{day}.50", date(2025, 1, day))
+
+	def test_msgpack_list_matches_json(self):
+		path = reverse("transaction-list")
+		response = self.client.get(path, HTTP_ACCEPT="application/msgpack")
+		self.assertEqual(response["Content-Type"], "application/msgpack")
+		self.assertIn("Accept", response["Vary"])
+		self.assertEqual(columnar.unpackb(response.content), self.client.get(path).json())
+
+		# Rows travel as columns, with the shared account stored once.
+		block = msgpack.unpackb(response.content, ext_hook=lambda code, data: msgpack.unpackb(data))["results"]
+		self.assertEqual(len(block["tables"]["account"]), 1)
+		self.assertEqual(block["columns"][block["keys"].index("account")], [0] * 10)
+
+	def test_async_view_negotiates_the_same_bytes(self):
+		path = reverse("transaction-list")
+		request = RequestFactory().get(path, HTTP_ACCEPT="application/msgpack", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+		response = async_to_sync(async_views.transaction_list)(request)
+		self.assertEqual(response["Content-Type"], "application/msgpack")
+		self.assertEqual(response.content, self.client.get(path, {"format": "msgpack"}).content)
+
+	def test_bulk_accepts_msgpack(self):
+		row = {"account_id": self.account.pk, "category_id": self.salary.pk, "description": "Pay", "date": "2025-02-01", "amount": "10.00"}
+		body = columnar.packb({"create": [row, {**row, "amount": "20.00"}]})
+		response = self.client.post(reverse("transaction-bulk"), body, content_type="application/msgpack")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.json()["created"]), 2)
+
+		response = self.client.post(reverse("transaction-bulk"), b"\xc1", content_type="application/msgpack")
+		self.assertEqual(response.status_code, 400)
+
+	def test_large_responses_are_compressed(self):
+		path = reverse("transaction-list")
+		plain = self.client.get(path).content
+		response = self.client.get(path, HTTP_ACCEPT_ENCODING="gzip, br")
+		self.assertEqual(response["Content-Encoding"], "br")
+		self.assertEqual(brotli.decompress(response.content), plain)
+		response = self.client.get(path, HTTP_ACCEPT_ENCODING="br;q=0.5, gzip")
+		self.assertEqual(response["Content-Encoding"], "gzip")
+		self.assertEqual(gzip.decompress(response.content), plain)
+
+		small = self.client.get(reverse("account-list"), HTTP_ACCEPT_ENCODING="gzip")
+		self.assertFalse(small.has_header("Content-Encoding"))
+		self.assertIn("Accept-Encoding", small["Vary"])
+
+		export = self.client.get(reverse("transaction-export"), HTTP_ACCEPT_ENCODING="gzip")
+		self.assertEqual(gzip.decompress(b"".join(export.streaming_content)), b"".join(self.client.get(reverse("transaction-export")).streaming_content))
+
+	def test_choose_encoding(self):
+		self.assertEqual(compression.choose_encoding("gzip, deflate, br"), "br")
+		self.assertEqual(compression.choose_encoding("br;q=0, gzip;q=0.2"), "gzip")
+		self.assertEqual(compression.choose_encoding("*"), "br")
+		self.assertIsNone(compression.choose_encoding("identity"))
+		self.assertIsNone(compression.choose_encoding(""))
+
+	@override_settings(FINANCE_RESPONSE_CACHE=True, FINANCE_COMPRESS_MIN_BYTES=0)
+	def test_weakened_etag_still_revalidates(self):
+		Account.objects.bulk_create(Account(user=self.user, name=f"Card {n}", account_type="credit") for n in range(20))
+		etag = self.client.get(reverse("account-list"), HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+		self.assertTrue(etag.startswith("W/"))
+		self.assertEqual(self.client.get(reverse("account-list"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+	def test_format_microbenchmark(self):
+		report = benchmark.format_microbenchmark(self.user, rows=10, repeat=1)
+		self.assertEqual(report["rows"], 10)
+		self.assertLess(report["msgpack"]["bytes"], report["json"]["bytes"])
+
+
+class SyncTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.budget = Budget.objects.create(user=self.user, category=self.groceries, allocated_amount=Decimal("300"))
+		self.goal = SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("1000"))
+		self.old = self.make_transaction(self.rent, "900")
+		self.shopping = self.make_transaction(self.groceries, "40", budget=self.budget)
+
+	def age_everything(self):
+		# Push every row and tombstone out of the overlap window, as if the last sync was long ago.
+		past = timezone.now() - timedelta(hours=1)
+		for model in (Account, Transaction, Budget, SavingsGoal):
+			model.objects.filter(user=self.user).update(updated_at=past)
+		Tombstone.objects.filter(user=self.user).update(deleted_at=past)
+		return sync.encode_token(past + timedelta(minutes=10))
+
+	def sync(self, since=None):
+		response = self.client.get(reverse("sync"), {"since": since} if since else {})
+		self.assertEqual(response.status_code, 200)
+		return response.json()
+
+	def test_without_token_returns_full_snapshot(self):
+		data = self.sync()
+		self.assertTrue(data["full"])
+		self.assertIsNone(data["next"])
+		self.assertEqual([row["id"] for row in data["transactions"]["changed"]], [self.old.pk, self.shopping.pk])
+		self.assertEqual(data["transactions"]["changed"][1], self.client.get(reverse("transaction-detail", args=[self.shopping.pk])).json())
+		self.assertEqual(len(data["accounts"]["changed"]), 1)
+		self.assertEqual(data["savings_goals"]["changed"][0]["id"], self.goal.pk)
+
+	def test_returns_only_changes_and_deletions_since_token(self):
+		since = self.age_everything()
+		self.client.patch(reverse("transaction-detail", args=[self.shopping.pk]), {"amount": "45.00"}, format="json")
+		self.client.delete(reverse("transaction-detail", args=[self.old.pk]))
+		self.client.post(reverse("savingsgoal-add", args=[self.goal.pk]), {"amount": "5"}, format="json")
+
+		data = self.sync(since)
+		self.assertFalse(data["full"])
+		self.assertEqual([row["id"] for row in data["transactions"]["changed"]], [self.shopping.pk])
+		self.assertEqual(data["transactions"]["deleted"], [self.old.pk])
+		# The ledger moved the balance and the budget's spend in SQL; both still show up.
+		self.assertEqual([row["id"] for row in data["accounts"]["changed"]], [self.account.pk])
+		# The fixture rows bypassed the ledger, so the budget only saw the +5 edit.
+		self.assertEqual(data["budgets"]["changed"][0]["spent_amount"], "5.00")
+		self.assertEqual(data["savings_goals"]["changed"][0]["current_amount"], "5.00")
+
+		data = self.sync(self.age_everything())
+		self.assertEqual([data[kind] for kind in sync.FEEDS], [{"changed": [], "deleted": []}] * 4)
+
+	def test_cascaded_deletes_leave_tombstones(self):
+		since = self.age_everything()
+		self.client.delete(reverse("budget-detail", args=[self.budget.pk]))
+		data = self.sync(since)
+		self.assertEqual(data["budgets"]["deleted"], [self.budget.pk])
+		self.assertEqual(data["transactions"]["changed"][0]["id"], self.shopping.pk)
+		self.assertIsNone(data["transactions"]["changed"][0]["budget"])
+
+		account_id = self.account.pk
+		self.account.delete()
+		data = self.sync(since)
+		self.assertEqual(data["accounts"]["deleted"], [account_id])
+		self.assertEqual(sorted(data["transactions"]["deleted"]), sorted([self.old.pk, self.shopping.pk]))
+
+	@override_settings(FINANCE_SYNC_PAGE_SIZE=1)
+	def test_transactions_come_in_pages_under_one_token(self):
+		first = self.sync()
+		self.assertEqual([row["id"] for row in first["transactions"]["changed"]], [self.old.pk])
+		self.assertEqual(len(first["accounts"]["changed"]), 1)
+
+		response = self.client.get(reverse("sync"), {"cursor": first["next"]})
+		second = response.json()
+		self.assertEqual([row["id"] for row in second["transactions"]["changed"]], [self.shopping.pk])
+		self.assertEqual((second["full"], second["next"], second["token"]), (False, None, first["token"]))
+		self.assertEqual(second["accounts"], {"changed": [], "deleted": []})
+		self.assertEqual(self.client.get(reverse("sync"), {"cursor": "nope"}).status_code, 400)
+
+	def test_stale_or_bad_tokens(self):
+		self.assertTrue(self.sync(sync.encode_token(timezone.now() - timedelta(days=60)))["full"])
+		self.assertEqual(self.client.get(reverse("sync"), {"since": "yesterday"}).status_code, 400)
+		self.user.delete()
+		self.assertFalse(Tombstone.objects.exists())
+		self.assertEqual(sync.prune(), 0)
+
+
+class BalanceHistoryTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		# Opening balance 1000, then +500 on Jan 3, -100 and -20 on Jan 5, -30 on Feb 10 -> 1350 now.
+		for category, amount, on in ((self.salary, "500", date(2025, 1, 3)), (self.groceries, "100", date(2025, 1, 5)), (self.rent, "20", date(2025, 1, 5)), (self.groceries, "30", date(2025, 2, 10))):
+			self.client.post(reverse("transaction-list"), {
+				"account_id": self.account.pk, "category_id": category.pk, "description": "x", "date": on.isoformat(), "amount": amount,
+			}, format="json")
+		self.url = reverse("account-balance-history", args=[self.account.pk])
+
+	def points(self, **params):
+		response = self.client.get(self.url, params)
+		self.assertEqual(response.status_code, 200, response.content)
+		return [(point["date"], point["balance"]) for point in response.json()["points"]]
+
+	def test_daily_running_balance(self):
+		self.assertEqual(self.points(start="2025-01-02", end="2025-01-06"), [
+			("2025-01-02", "1000.00"), ("2025-01-03", "1500.00"), ("2025-01-04", "1500.00"), ("2025-01-05", "1380.00"), ("2025-01-06", "1380.00"),
+		])
+		self.assertEqual(BalanceCheckpoint.objects.filter(account=self.account).count(), 3)
+
+	def test_monthly_closing_balance(self):
+		self.assertEqual(self.points(interval="month", start="2024-12-01", end="2025-03-15"), [
+			("2024-12-01", "1000.00"), ("2025-01-01", "1380.00"), ("2025-02-01", "1350.00"), ("2025-03-01", "1350.00"),
+		])
+
+	def test_writes_drop_only_later_checkpoints(self):
+		self.points(start="2025-01-01", end="2025-01-31")
+		self.client.post(reverse("transaction-list"), {
+			"account_id": self.account.pk, "category_id": self.salary.pk, "description": "late", "date": "2025-01-04", "amount": "5",
+		}, format="json")
+		self.account.refresh_from_db()
+		self.assertEqual(self.account.checkpoints_through, date(2025, 1, 3))
+		self.assertEqual(self.points(start="2025-01-04", end="2025-01-05"), [("2025-01-04", "1505.00"), ("2025-01-05", "1385.00")])
+		self.assertEqual(list(BalanceCheckpoint.objects.filter(account=self.account).values_list("day", flat=True)), [
+			date(2025, 1, 3), date(2025, 1, 4), date(2025, 1, 5), date(2025, 2, 10),
+		])
+
+		# A warm read only scans transactions past the last checkpoint.
+		with self.assertNumQueries(8):
+			self.points(start="2025-01-01", end="2025-02-28")
+
+	def test_rejects_bad_ranges_and_other_users_accounts(self):
+		self.assertEqual(self.client.get(self.url, {"interval": "week"}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {"start": "2025-02-01", "end": "2025-01-01"}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {"start": "2000-01-01", "end": "2025-01-01"}).status_code, 400)
+		other = Account.objects.create(user=User.objects.create_user(username="bob", password="pw-bob-123"), name="Bob")
+		self.assertEqual(self.client.get(reverse("account-balance-history", args=[other.pk])).status_code, 404)
+
+
+class TransactionSearchTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings")
+		self.once = self.make_transaction(self.groceries, "4.50", date(2025, 3, 1), description="Coffee at the station")
+		self.twice = self.make_transaction(self.groceries, "9.00", date(2025, 2, 1), description="Coffee and coffee beans", account=self.savings)
+		self.office = self.make_transaction(self.rent, "800", date(2025, 3, 1), description="Office rent")
+		self.url = reverse("transaction-search")
+
+	def ids(self, **params):
+		response = self.client.get(self.url, params)
+		self.assertEqual(response.status_code, 200, response.content)
+		return [row["id"] for row in response.json()["results"]]
+
+	def test_prefix_terms_ranked_best_first(self):
+		# "coff" is a prefix of "coffee", not of "office"; the row saying it twice ranks first.
+		self.assertEqual(self.ids(q="COFF"), [self.twice.pk, self.once.pk])
+		self.assertEqual(self.ids(q="coffee bea"), [self.twice.pk])
+		self.assertEqual(self.ids(q="tea"), [])
+
+	def test_filters_combine_with_the_match(self):
+		self.assertEqual(self.ids(q="coffee", account=self.account.pk), [self.once.pk])
+		self.assertEqual(self.ids(q="coffee", date_before="2025-02-15"), [self.twice.pk])
+		self.assertEqual(self.ids(q="coffee", category=self.rent.pk), [])
+		self.assertEqual(self.ids(q="o", type="expense"), [self.office.pk])
+		self.assertEqual(self.ids(q="coffee", limit=1), [self.twice.pk])
+
+	def test_index_follows_every_write_path(self):
+		self.client.patch(reverse("transaction-detail", args=[self.once.pk]), {"description": "Train ticket"}, format="json")
+		self.client.delete(reverse("transaction-detail", args=[self.twice.pk]))
+		self.client.post(reverse("transaction-bulk"), {"create": [
+			{"account_id": self.account.pk, "category_id": self.groceries.pk, "description": "Coffee again", "date": "2025-04-01", "amount": "3"},
+		]}, format="json")
+		self.assertEqual(self.ids(q="coffee"), list(Transaction.objects.filter(description="Coffee again").values_list("id", flat=True)))
+		self.assertEqual(self.ids(q="train"), [self.once.pk])
+
+	def test_only_searches_own_rows_in_two_queries(self):
+		bob = User.objects.create_user(username="bob", password="pw-bob-123")
+		Transaction.objects.create(
+			user=bob, account=Account.objects.create(user=bob, name="Bob"), category=self.groceries,
+			transaction_type=Category.TYPE_EXPENSE, amount=Decimal("1"), description="Coffee", date=date.today(),
+		)
+		with self.assertNumQueries(2):
+			results = self.client.get(self.url, {"q": "coffee", "fields": "description,amount"}).json()["results"]
+		self.assertEqual(results, [{"description": "Coffee and coffee beans", "amount": "9.00"}, {"description": "Coffee at the station", "amount": "4.50"}])
+
+	def test_rejects_empty_queries_and_bad_parameters(self):
+		self.assertEqual(self.client.get(self.url, {"q": " -- "}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {"q": "coffee", "limit": "0"}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {"q": "coffee", "type": "transfer"}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {"q": "coffee", "date_after": "soon"}).status_code, 400)
+		self.assertEqual(search.terms('"a" OR b*'), ["a", "or", "b"])
+
+
+class AnalyticsTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.savings = Account.objects.create(user=self.user, name="Savings", account_type="savings")
+		for account, category, amount, on in (
+			(self.account, self.groceries, "10", "2025-01-06"),
+			(self.savings, self.groceries, "5", "2025-01-08"),
+			(self.account, self.rent, "100", "2025-01-15"),
+			(self.account, self.salary, "1000", "2025-01-31"),
+			(self.account, self.groceries, "20", "2025-02-03"),
+			(self.account, self.salary, "1000", "2025-02-28"),
+		):
+			self.client.post(reverse("transaction-list"), {
+				"account_id": account.pk, "category_id": category.pk, "description": "x", "date": on, "amount": amount,
+			}, format="json")
+		self.url = reverse("analytics")
+
+	def ask(self, spec, status_code=200):
+		response = self.client.post(self.url, spec, format="json")
+		self.assertEqual(response.status_code, status_code, response.content)
+		return response.json()
+
+	def test_spend_by_category_account_and_week_is_one_query(self):
+		spec = {"dimensions": ["category", "account"], "measures": ["total", "count"], "bucket": "week", "filters": {"type": "expense"}}
+		with self.assertNumQueries(1):
+			answer = self.ask(spec)
+		self.assertEqual(answer["source"], "transactions")
+		groceries, rent = self.groceries.pk, self.rent.pk
+		self.assertEqual(answer["rows"], [
+			{"period": "2025-01-06", "category": groceries, "category_name": "Groceries", "account": self.account.pk, "account_name": "Checking", "total": "10.00", "count": 1},
+			{"period": "2025-01-06", "category": groceries, "category_name": "Groceries", "account": self.savings.pk, "account_name": "Savings", "total": "5.00", "count": 1},
+			{"period": "2025-01-13", "category": rent, "category_name": "Rent / Mortgage", "account": self.account.pk, "account_name": "Checking", "total": "100.00", "count": 1},
+			{"period": "2025-02-03", "category": groceries, "category_name": "Groceries", "account": self.account.pk, "account_name": "Checking", "total": "20.00", "count": 1},
+		])
+
+	def test_month_aligned_questions_read_the_rollups(self):
+		answer = self.ask({"bucket": "month", "filters": {"type": "income", "date_after": "2025-01-01", "date_before": "2025-02-28"}})
+		self.assertEqual(answer["source"], "rollups")
+		self.assertEqual(answer["rows"], [{"period": "2025-01-01", "total": "1000.00", "count": 1}, {"period": "2025-02-01", "total": "1000.00", "count": 1}])
+
+		by_account = self.ask({"dimensions": ["account"], "measures": ["net"]})
+		self.assertEqual(by_account["source"], "rollups")
+		self.assertEqual([(row["account"], row["net"]) for row in by_account["rows"]], [(self.account.pk, "1870.00"), (self.savings.pk, "-5.00")])
+		# A mid-month bound or a measure the rollups lack falls back to the transactions.
+		self.assertEqual(self.ask({"filters": {"date_after": "2025-01-07"}, "measures": ["count"]})["rows"], [{"count": 5}])
+		self.assertEqual(self.ask({"dimensions": ["type"], "measures": ["max", "average"]})["rows"], [
+			{"type": "expense", "max": "100.00", "average": "33.75"}, {"type": "income", "max": "1000.00", "average": "1000.00"},
+		])
+
+	def test_order_and_limit(self):
+		answer = self.ask({"dimensions": ["category"], "measures": ["total"], "order": ["-total"], "limit": 2})
+		self.assertEqual([row["category_name"] for row in answer["rows"]], ["Salary", "Rent / Mortgage"])
+		self.assertTrue(answer["truncated"])
+		self.assertFalse(self.ask({"dimensions": ["category"], "limit": 3})["truncated"])
+
+	def test_rejects_unknown_fields(self):
+		for spec in (
+			{"dimensions": ["description"]},
+			{"measures": ["amount"]},
+			{"bucket": "fortnight"},
+			{"filters": {"user": 1}},
+			{"filters": {"account": "1 OR 1=1"}},
+			{"order": ["amount"]},
+			{"limit": 10 ** 6},
+			{"group_by": ["category"]},
+			[],
+		):
+			self.ask(spec, status_code=400)
+
+	@override_settings(FINANCE_RESPONSE_CACHE=True)
+	def test_answers_are_cached_per_normalized_spec_and_data_version(self):
+		cache.clear()
+		first = self.ask({"dimensions": ["account"], "filters": {"account": [self.savings.pk, self.account.pk]}})
+		with self.assertNumQueries(0):
+			again = self.ask({"filters": {"account": [self.account.pk, self.savings.pk, self.account.pk]}, "dimensions": ["account"], "measures": ["total", "count"]})
+		self.assertEqual(again, first)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(reverse("transaction-list"), {
+				"account_id": self.savings.pk, "category_id": self.groceries.pk, "description": "x", "date": "2025-03-01", "amount": "1",
+			}, format="json")
+		after = self.ask({"dimensions": ["account"], "filters": {"account": [self.account.pk, self.savings.pk]}})
+		self.assertEqual(after["rows"][1]["count"], 2)
+
+	def test_only_reads_own_rows(self):
+		bob = User.objects.create_user(username="bob", password="pw-bob-123")
+		self.client.force_authenticate(bob)
+		self.assertEqual(self.ask({"measures": ["count"]})["rows"], [{"count": 0}])
+		self.assertEqual(analytics.normalize({})["measures"], ["total", "count"])
+
+
+class ForecastTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		# Groceries of 10 every day this year and a salary of 1000 on each 28th; 500 already entered for July 10.
+		first = date(2025, 1, 1)
+		rows = [self.row(self.groceries, "10", first + timedelta(days=n)) for n in range(181)]
+		rows += [self.row(self.salary, "1000", date(2025, month, 28)) for month in range(1, 7)]
+		rows.append(self.row(self.rent, "500", date(2025, 7, 10)))
+		Transaction.objects.bulk_create(rows)
+		Account.objects.filter(pk=self.account.pk).update(balance=Decimal("4690.00"))
+
+	def row(self, category, amount, on):
+		return Transaction(user=self.user, account=self.account, category=category, transaction_type=category.type, amount=Decimal(amount), date=on)
+
+	def test_projects_level_recurring_and_entered_transactions(self):
+		with self.assertNumQueries(2):
+			payload = forecast.build(self.user.pk, as_of=date(2025, 6, 30))
+		self.assertEqual(payload["days"], 90)
+		account = payload["accounts"][0]
+		self.assertEqual(account["daily_average"], "-10.00")
+		self.assertEqual(account["recurring"], [{"amount": "1000.00", "every": "month", "next": "2025-07-28"}])
+		points = dict((point["date"], point["balance"]) for point in account["points"])
+		# Starts from the balance before the July 10 entry, which lands on its day.
+		self.assertEqual((points["2025-07-01"], points["2025-07-09"], points["2025-07-10"]), ("5180.00", "5100.00", "4590.00"))
+		self.assertEqual(account["lowest"], {"date": "2025-07-27", "balance": "4420.00"})
+		self.assertEqual((points["2025-07-28"], points["2025-09-28"]), ("5410.00", "6790.00"))
+
+	def test_recurring_amount_due_today_lands_on_the_first_day(self):
+		# A weekly -50 last seen 7 days ago is due today; it must not wrap round to the end of the horizon.
+		savings = Account.objects.create(user=self.user, name="Savings", account_type="savings", balance=Decimal("500.00"))
+		Transaction.objects.bulk_create([
+			Transaction(user=self.user, account=savings, category=self.rent, transaction_type="expense", amount=Decimal("50"), date=date(2025, 6, 30) - timedelta(weeks=n))
+			for n in range(1, 5)
+		])
+		account = forecast.build(self.user.pk, as_of=date(2025, 6, 30))["accounts"][1]
+		self.assertEqual(account["recurring"], [{"amount": "-50.00", "every": "week", "next": "2025-07-07"}])
+		points = [point["balance"] for point in account["points"]]
+		# Today's and the next 12 weekly amounts (through Sep 22), and no more.
+		self.assertEqual((points[0], points[5], points[6], points[-1]), ("450.00", "450.00", "400.00", "-150.00"))
+
+	def test_accounts_without_history_stay_flat(self):
+		savings = Account.objects.create(user=self.user, name="Savings", account_type="savings", balance=Decimal("250.00"))
+		account = forecast.build(self.user.pk, as_of=date(2025, 6, 30))["accounts"][1]
+		self.assertEqual(account["account"], savings.pk)
+		self.assertEqual({point["balance"] for point in account["points"]}, {"250.00"})
+		self.assertEqual(account["recurring"], [])
+
+	def test_stored_forecast_is_reused_until_the_accounts_change(self):
+		url = reverse("account-forecast")
+		first = self.client.get(url).json()
+		self.assertEqual(first["as_of"], timezone.localdate().isoformat())
+		with self.assertNumQueries(2):
+			self.assertEqual(self.client.get(url).json(), first)
+		self.client.post(reverse("transaction-list"), {
+			"account_id": self.account.pk, "category_id": self.groceries.pk, "description": "x", "date": timezone.localdate().isoformat(), "amount": "40",
+		}, format="json")
+		self.assertEqual(self.client.get(url).json()["accounts"][0]["balance"], "4650.00")
+
+	def test_batch_stores_every_account_holder(self):
+		bob = User.objects.create_user(username="bob", password="pw-bob-123")
+		Account.objects.create(user=bob, name="Bob", balance=Decimal("5"))
+		User.objects.create_user(username="carol", password="pw-carol-123")
+		self.assertEqual(forecast.run_batch(workers=1, as_of=date(2025, 6, 30)), 2)
+		self.assertEqual(sorted(CashFlowForecast.objects.values_list("user__username", flat=True)), ["alice", "bob"])
+		self.assertEqual(CashFlowForecast.objects.get(user=bob).payload["accounts"][0]["points"][-1]["balance"], "5.00")
+
+
+class SavingsContributionTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.goal = SavingsGoal.objects.create(user=self.user, name="Trip", current_amount=Decimal("100"), target_amount=Decimal("500"))
+
+	def add(self, amount, goal=None):
+		return self.client.post(reverse("savingsgoal-add", args=[(goal or self.goal).pk]), {"amount": amount}, format="json")
+
+	def test_add_increments_atomically_and_appends_to_the_ledger(self):
+		stale = SavingsGoal.objects.get(pk=self.goal.pk)
+		self.assertEqual(self.add("20").json()["current_amount"], "120.00")
+		# A save from a copy read before the add would have overwritten it; the add is an UPDATE on the row instead.
+		self.assertEqual(self.add("5.5").json()["current_amount"], "125.50")
+		self.assertEqual(stale.current_amount, Decimal("100"))
+		self.goal.refresh_from_db()
+		self.assertEqual((self.goal.contributed_total, self.goal.contribution_count), (Decimal("25.50"), 2))
+
+		history = self.client.get(reverse("savingsgoal-contributions", args=[self.goal.pk]), {"limit": 1}).json()
+		self.assertEqual([row["amount"] for row in history], ["5.50"])
+		self.assertEqual(SavingsContribution.objects.filter(goal=self.goal, user=self.user).count(), 2)
+
+	def test_edits_cannot_set_or_overwrite_the_amount(self):
+		stale = SavingsGoal.objects.get(pk=self.goal.pk)
+		self.add("20")
+		# A rename saved from a copy read before the add keeps the add.
+		serializer = SavingsGoalSerializer(stale, data={"name": "Holiday", "current_amount": "999"}, partial=True)
+		self.assertTrue(serializer.is_valid(), serializer.errors)
+		self.assertEqual(serializer.save().current_amount, Decimal("120.00"))
+		self.goal.refresh_from_db()
+		self.assertEqual((self.goal.name, self.goal.current_amount, self.goal.contributed_total, self.goal.contribution_count), ("Holiday", Decimal("120.00"), Decimal("20.00"), 1))
+
+		response = self.client.patch(reverse("savingsgoal-detail", args=[self.goal.pk]), {"current_amount": "0"}, format="json")
+		self.assertEqual(response.json()["current_amount"], "120.00")
+
+	def test_rejects_bad_amounts_and_other_users_goals(self):
+		for amount in ("0", "-1", "abc", "NaN", None):
+			self.assertEqual(self.add(amount).status_code, 400)
+		other = SavingsGoal.objects.create(user=User.objects.create_user(username="bob", password="pw-bob-123"), name="Bob", target_amount=Decimal("1"))
+		self.assertEqual(self.add("1", other).status_code, 404)
+		self.assertEqual(self.client.get(reverse("savingsgoal-contributions", args=[other.pk])).status_code, 404)
+		self.assertFalse(SavingsContribution.objects.exists())
+
+	def test_projection_uses_the_maintained_velocity(self):
+		now = timezone.now()
+		# 40 contributed over the last 10 days: 4 a day, with 358 left to go (89.5 days).
+		SavingsGoal.objects.filter(pk=self.goal.pk).update(
+			current_amount=Decimal("142"), contributed_total=Decimal("40"), contribution_count=8, first_contribution_at=now - timedelta(days=10),
+		)
+		SavingsGoal.objects.create(user=self.user, name="Car", target_amount=Decimal("1000"))
+		SavingsGoal.objects.create(user=self.user, name="Done", current_amount=Decimal("60"), target_amount=Decimal("50"))
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse("savingsgoal-projection"))
+		goals = {goal["name"]: goal for goal in response.json()["goals"]}
+		today = timezone.localdate()
+		self.assertEqual((goals["Trip"]["daily_velocity"], goals["Trip"]["remaining"]), ("4.00", "358.00"))
+		self.assertEqual(goals["Trip"]["projected_completion"], (today + timedelta(days=90)).isoformat())
+		self.assertIsNone(goals["Car"]["projected_completion"])
+		self.assertEqual((goals["Done"]["remaining"], goals["Done"]["projected_completion"]), ("0.00", today.isoformat()))
+
+	def test_first_day_velocity_is_spread_over_a_whole_day(self):
+		self.add("50")
+		goal = self.client.get(reverse("savingsgoal-projection")).json()["goals"][0]
+		self.assertEqual(goal["daily_velocity"], "50.00")
+		self.assertEqual(goal["projected_completion"], (timezone.localdate() + timedelta(days=7)).isoformat())
+
+
+class RecurringTransactionTests(FinanceAPITestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.url = reverse("recurringtransaction-list")
+
+	def schedule(self, category, amount, frequency, start, status_code=201, **extra):
+		response = self.client.post(self.url, {
+			"account_id": self.account.pk, "category_id": category.pk, "description": category.name, "amount": amount,
+			"frequency": frequency, "start_date": start, **extra,
+		}, format="json")
+		self.assertEqual(response.status_code, status_code, response.content)
+		return response.json()
+
+	def dates(self, schedule, n):
+		schedule = RecurringTransaction.objects.get(pk=schedule["id"])
+		return [recurring.occurrence(schedule, index).isoformat() for index in range(n)]
+
+	def test_occurrences_follow_the_schedule(self):
+		month_end = self.schedule(self.rent, "800", "monthly", "2025-01-31")
+		self.assertEqual(self.dates(month_end, 4), ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30"])
+		leap = self.schedule(self.rent, "50", "yearly", "2024-02-29")
+		self.assertEqual(self.dates(leap, 3), ["2024-02-29", "2025-02-28", "2026-02-28"])
+		fortnightly = self.schedule(self.salary, "1000", "weekly", "2025-01-03", interval=2)
+		self.assertEqual(self.dates(fortnightly, 3), ["2025-01-03", "2025-01-17", "2025-01-31"])
+		self.assertEqual(fortnightly["next_date"], "2025-01-03")
+		ending = RecurringTransaction.objects.get(pk=self.schedule(self.groceries, "5", "daily", "2025-01-01", until="2025-01-02")["id"])
+		self.assertEqual(recurring.advance(ending, date(2025, 6, 1)), [date(2025, 1, 1), date(2025, 1, 2)])
+		self.assertIsNone(ending.next_date)
+
+	def test_materializes_due_occurrences_once_with_one_balance_update_per_account(self):
+		rent = self.schedule(self.rent, "800", "monthly", "2025-01-01")
+		salary = self.schedule(self.salary, "1000", "monthly", "2025-01-28", count=2)
+		with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+			self.assertEqual(recurring.materialize(date(2025, 3, 15)), (2, 5))
+		balance_updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith('UPDATE "finance_account"')]
+		self.assertEqual(len(balance_updates), 1)
+
+		self.account.refresh_from_db()
+		self.assertEqual(self.account.balance, Decimal("1000") - 3 * Decimal("800") + 2 * Decimal("1000"))
+		self.assertEqual(rollups.verify([self.user]), [])
+		self.assertEqual(list(Transaction.objects.filter(recurring_id=rent["id"]).order_by("date").values_list("date", flat=True)), [
+			date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1),
+		])
+		rows = {row["id"]: row for row in self.client.get(self.url).json()}
+		self.assertEqual((rows[rent["id"]]["occurrences"], rows[rent["id"]]["next_date"]), (3, "2025-04-01"))
+		# count=2 ended the salary.
+		self.assertEqual((rows[salary["id"]]["occurrences"], rows[salary["id"]]["next_date"]), (2, None))
+
+		# Re-running is a no-op.
+		self.assertEqual(recurring.materialize(date(2025, 3, 15)), (0, 0))
+		self.assertEqual(Transaction.objects.filter(recurring__isnull=False).count(), 5)
+
+	def test_catch_up_is_bounded_per_batch_and_resumes_from_next_date(self):
+		daily = self.schedule(self.groceries, "2", "daily", "2025-01-01", until="2025-03-01")
+		self.assertEqual(recurring.materialize_batch(date(2025, 6, 1), catch_up=10), (1, 10))
+		schedule = RecurringTransaction.objects.get(pk=daily["id"])
+		self.assertEqual((schedule.occurrences, schedule.next_date), (10, date(2025, 1, 11)))
+
+		out = io.StringIO()
+		call_command("materialize_recurring", date="2025-06-01", stdout=out)
+		self.assertIn("Materialized 50 transactions", out.getvalue())
+		self.assertEqual(Transaction.objects.filter(recurring_id=daily["id"]).count(), 60)
+		self.assertIsNone(RecurringTransaction.objects.get(pk=daily["id"]).next_date)
+		with self.assertRaises(CommandError):
+			call_command("materialize_recurring", date="2025-02-30", stdout=io.StringIO())
+
+	def test_edit_does_not_write_back_a_stale_high_water_mark(self):
+		rent = self.schedule(self.rent, "800", "monthly", "2025-01-01")
+		stale = RecurringTransaction.objects.get(pk=rent["id"])
+		serializer = RecurringTransactionSerializer(stale, data={"description": "Flat"}, partial=True, context={"request": SimpleNamespace(user=self.user)})
+		self.assertTrue(serializer.is_valid(), serializer.errors)
+		# The materializer commits between the edit's read and its save.
+		recurring.materialize(date(2025, 3, 15))
+		serializer.save()
+
+		schedule = RecurringTransaction.objects.get(pk=rent["id"])
+		self.assertEqual((schedule.description, schedule.occurrences, schedule.next_date), ("Flat", 3, date(2025, 4, 1)))
+		self.assertEqual(recurring.materialize(date(2025, 3, 15)), (0, 0))
+
+	def test_validates_and_scopes_schedules(self):
+		other = Account.objects.create(user=User.objects.create_user(username="bob", password="pw-bob-123"), name="Bob")
+		self.schedule(self.rent, "800", "monthly", "2025-01-01", status_code=400, account_id=other.pk)
+		self.schedule(self.rent, "800", "monthly", "2025-01-01", status_code=400, until="2024-12-31")
+		self.schedule(self.rent, "800", "fortnightly", "2025-01-01", status_code=400)
+		self.schedule(self.rent, "0", "monthly", "2025-01-01", status_code=400)
+		self.schedule(self.rent, "800", "monthly", "2025-01-01", status_code=400, interval=0)
+
+		rent = self.schedule(self.rent, "800", "monthly", "2025-01-01", count=1)
+		self.assertEqual(rent["transaction_type"], "expense")
+		recurring.materialize(date(2025, 3, 15))
+		detail = reverse("recurringtransaction-detail", args=[rent["id"]])
+		self.assertEqual(self.client.patch(detail, {"frequency": "weekly"}, format="json").status_code, 400)
+		# Raising the count reopens the series where it stopped.
+		response = self.client.patch(detail, {"count": 3, "amount": "850"}, format="json")
+		self.assertEqual(response.json()["next_date"], "2025-02-01")
+		recurring.materialize(date(2025, 3, 15))
+		self.assertEqual(list(Transaction.objects.filter(recurring_id=rent["id"]).order_by("date").values_list("amount", flat=True)), [
+			Decimal("800"), Decimal("850"), Decimal("850"),
+		])
+
+		self.client.force_authenticate(other.user)
+		self.assertEqual(self.client.get(self.url).json(), [])
+		self.assertEqual(self.client.get(detail).status_code, 404)
 
-# Create your tests here.
@@ -1,7 +1,9 @@
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegisterView, LoginView, AccountViewSet, CategoryViewSet, BudgetViewSet, TransactionViewSet, SavingsGoalViewSet
+from . import async_views
+from .views import RegisterView, LoginView, LogoutView, AccountViewSet, CategoryViewSet, BudgetViewSet, TransactionViewSet, SavingsGoalViewSet, RecurringTransactionViewSet, DashboardSummaryView, MetricsView, SyncView, AnalyticsView
 
 router = DefaultRouter()
 router.register(r"accounts", AccountViewSet, basename="account")
@@ -9,9 +11,25 @@ router.register(r"categories", CategoryViewSet, basename="category")
 router.register(r"budgets", BudgetViewSet, basename="budget")
 router.register(r"transactions", TransactionViewSet, basename="transaction")
 router.register(r"savings-goals", SavingsGoalViewSet, basename="savingsgoal")
+router.register(r"recurring-transactions", RecurringTransactionViewSet, basename="recurringtransaction")
 
 urlpatterns = [
 	path("register/", RegisterView.as_view(), name="register"),
 	path("login/", LoginView.as_view(), name="login"),
+	path("logout/", LogoutView.as_view(), name="logout"),
+	path("dashboard/summary/", DashboardSummaryView.as_view(), name="dashboard-summary"),
+	path("metrics/", MetricsView.as_view(), name="metrics"),
+	path("sync/", SyncView.as_view(), name="sync"),
+	path("analytics/", AnalyticsView.as_view(), name="analytics"),
 	path("", include(router.urls)),
 ]
+
+# Async GET handlers for the hottest read paths; they take precedence over the DRF routes above.
+async_urlpatterns = [
+	path("accounts/", async_views.account_list, name="account-list"),
+	path("transactions/", async_views.transaction_list, name="transaction-list"),
+	path("dashboard/summary/", async_views.dashboard_summary, name="dashboard-summary"),
+]
+
+if settings.FINANCE_ASYNC_READS:
+	urlpatterns = async_urlpatterns + urlpatterns
@@ -0,0 +1,122 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+VERSION_KEY = "finance:user:{user_id}:version"
+LIST_KEY = "finance:user:{user_id}:{name}:{variant}:{version}"
+VERSION_TTL = 60 * 60 * 24
+
+
+def enabled():
+	return getattr(settings, "FINANCE_RESPONSE_CACHE", False)
+
+
+def data_version(user_id):
+	"""Return the user's current data version token, minting one if none is cached."""
+	key = VERSION_KEY.format(user_id=user_id)
+	version = cache.get(key)
+	if version is None:
+		cache.add(key, uuid.uuid4().hex, VERSION_TTL)
+		version = cache.get(key)
+	return version
+
+
+async def adata_version(user_id):
+	"""Async twin of ``data_version``."""
+	key = VERSION_KEY.format(user_id=user_id)
+	version = await cache.aget(key)
+	if version is None:
+		await cache.aadd(key, uuid.uuid4().hex, VERSION_TTL)
+		version = await cache.aget(key)
+	return version
+
+
+def etag_matches(request, etag):
+	"""Weak If-None-Match comparison, so ETags weakened by response compression still match."""
+	candidates = parse_etags(request.headers.get("If-None-Match", ""))
+	return etag.removeprefix("W/") in {candidate.removeprefix("W/") for candidate in candidates}
+
+
+def list_etag(name, variant, version):
+	return f'"{name}-{variant}-{version}"'
+
+
+async def acached_list(request, name, variant, load, timeout=300):
+	"""Async twin of ``CachedListMixin.list``, sharing its cache keys and ETags.
+
+	``load`` is a coroutine function returning the list data. Returns
+	``(status_code, data, etag)``; ``data`` is ``None`` for a 304.
+	"""
+	user_id = request.user.pk
+	version = await adata_version(user_id)
+	etag = list_etag(name, variant, version)
+	if etag_matches(request, etag):
+		return status.HTTP_304_NOT_MODIFIED, None, etag
+	key = LIST_KEY.format(user_id=user_id, name=name, variant=variant, version=version)
+	data = await cache.aget(key)
+	if data is None:
+		data = await load()
+		await cache.aset(key, data, timeout)
+	return status.HTTP_200_OK, data, etag
+
+
+def bump(*user_ids):
+	"""Give each user a new data version, retiring every response cached under the old one."""
+	if not enabled():
+		return
+	cache.set_many({VERSION_KEY.format(user_id=pk): uuid.uuid4().hex for pk in set(user_ids)}, VERSION_TTL)
+
+
+def bump_on_commit(*user_ids):
+	if user_ids:
+		transaction.on_commit(lambda: bump(*user_ids))
+
+
+class CachedListMixin:
+	"""Cache a viewset's list response per user under their data version.
+
+	Any successful write through the viewset bumps the version; writes made
+	elsewhere (the transaction ledger, savings contributions) bump it
+	themselves. Responses carry an ETag built from the version, so an
+	unchanged list costs a 304 and no query.
+	"""
+
+	list_cache_timeout = 300
+
+	def list(self, request, *args, **kwargs):
+		if not enabled():
+			return super().list(request, *args, **kwargs)
+
+		user_id = request.user.pk
+		version = data_version(user_id)
+		variant = self.list_cache_variant()
+		etag = list_etag(self.basename, variant, version)
+		if etag_matches(request, etag):
+			response = Response(status=status.HTTP_304_NOT_MODIFIED)
+		else:
+			key = LIST_KEY.format(user_id=user_id, name=self.basename, variant=variant, version=version)
+			data = cache.get(key)
+			if data is None:
+				data = super().list(request, *args, **kwargs).data
+				cache.set(key, data, self.list_cache_timeout)
+			response = Response(data)
+		response["ETag"] = etag
+		response["Cache-Control"] = "private, no-cache"
+		return response
+
+	def list_cache_variant(self):
+		"""Extra cache key part for lists whose content changes without a write (e.g. by date)."""
+		return "all"
+
+	def finalize_response(self, request, response, *args, **kwargs):
+		response = super().finalize_response(request, response, *args, **kwargs)
+		if request.method not in SAFE_METHODS and response.status_code < 400 and request.user.is_authenticated:
+			bump(request.user.pk)
+		return response
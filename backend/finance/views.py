@@ -8,9 +8,30 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import viewsets, permissions
 from rest_framework import exceptions
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Account, Category, Budget, Transaction, SavingsGoal
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Abs, Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Account, Category, Budget, BudgetPeriod, RecurringTransaction, Transaction, SavingsGoal, MonthlyCategoryTotal
+from .authentication import revoke_tokens
+from .catalogue import categories
+from .fastserializers import FastListMixin
+from .exporters import EXPORT_FORMATS, export_rows, transactions_for_export
+from .importers import PARSERS, TransactionImporter
+from . import analytics, balances, budgets, forecast, ledger, metrics, savings, search, sync
+from .pagination import KeysetPagination
+from .usercache import CachedListMixin, etag_matches
+import csv
+import hmac
+import io
+from collections import Counter
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 from .serializers import (
 	RegistrationSerializer,
@@ -20,6 +41,7 @@ from .serializers import (
 	BudgetSerializer,
 	TransactionSerializer,
     SavingsGoalSerializer,
+	RecurringTransactionSerializer,
 )
 
 from .serializers import RegistrationSerializer, LoginSerializer
@@ -68,123 +90,419 @@ class LoginView(APIView):
 		)
 
 
-class AccountViewSet(viewsets.ModelViewSet):
+class LogoutView(APIView):
+	"""Revoke the request's access token and every one issued to the user before it.
+
+	Revocation needs the shared auth cache; without it the client just drops
+	its tokens, which stay valid until they expire.
+	"""
+
+	permission_classes = [permissions.IsAuthenticated]
+
+	def post(self, request):
+		revoke_tokens(request.user.pk, request.auth)
+		return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+	"""Prometheus text exposition of this process's request histograms."""
+
+	authentication_classes = []
+	permission_classes = [AllowAny]
+
+	def get(self, request):
+		token = settings.FINANCE_METRICS_TOKEN
+		if not token:
+			raise exceptions.NotFound()
+		supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+		if not hmac.compare_digest(supplied.encode(), token.encode()):
+			raise exceptions.PermissionDenied()
+		return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class AccountViewSet(CachedListMixin, FastListMixin, viewsets.ModelViewSet):
 	serializer_class = AccountSerializer
 	permission_classes = [permissions.IsAuthenticated]
 
+	history_max_days = 3660
+
 	def get_queryset(self):
 		return Account.objects.filter(user=self.request.user)
 
 	def perform_create(self, serializer):
 		serializer.save(user=self.request.user)
 
+	@action(detail=False, methods=["get"], url_path="forecast")
+	def forecast(self, request):
+		"""Projected daily balance of each account for the next ``FINANCE_FORECAST_DAYS`` days (see ``finance.forecast``)."""
+		return Response(forecast.for_user(request.user.pk))
+
+	@action(detail=True, methods=["get"], url_path="balance-history")
+	def balance_history(self, request, pk=None):
+		"""Closing balance per day or month (``?interval=day|month``) between ``start`` and ``end`` (ISO dates).
+
+		Defaults to the last 90 days, or the last 12 months by month.
+		"""
+		account_id = get_object_or_404(self.get_queryset().values_list("pk", flat=True), pk=pk)
+		interval = request.query_params.get("interval", "day")
+		if interval not in balances.INTERVALS:
+			raise exceptions.ValidationError({"interval": f"Expected one of: {', '.join(balances.INTERVALS)}."})
+		end = _query_date(request, "end") or timezone.localdate()
+		start = _query_date(request, "start") or (end - timedelta(days=89) if interval == "day" else _month_starts(12, end)[0])
+		if start > end:
+			raise exceptions.ValidationError({"start": "Must not be after end."})
+		if (end - start).days >= self.history_max_days:
+			raise exceptions.ValidationError({"start": f"At most {self.history_max_days} days per request."})
+
+		points = balances.history(account_id, start, end, interval)
+		return Response({
+			"account": account_id,
+			"interval": interval,
+			"start": start,
+			"end": end,
+			"points": [{"date": period, "balance": _money(balance)} for period, balance in points],
+		})
+
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
 	queryset = Category.objects.all()
 	serializer_class = CategorySerializer
 	permission_classes = [permissions.AllowAny]
+	cache_max_age = 300
 
+	# Served from the category catalogue cache; clients revalidate with If-None-Match.
+	def list(self, request, *args, **kwargs):
+		snapshot = categories.snapshot()
+		return self._conditional(request, snapshot.etag, lambda: snapshot.rows)
 
-class BudgetViewSet(viewsets.ModelViewSet):
+	def retrieve(self, request, pk=None, *args, **kwargs):
+		snapshot = categories.snapshot()
+		try:
+			category = snapshot.by_id.get(int(pk))
+		except (TypeError, ValueError):
+			category = None
+		if category is None:
+			raise exceptions.NotFound()
+		return self._conditional(request, f"{snapshot.etag}-{category.pk}", lambda: CategorySerializer(category).data)
+
+	def _conditional(self, request, tag, body):
+		etag = f'"{tag}"'
+		if etag_matches(request, etag):
+			response = Response(status=status.HTTP_304_NOT_MODIFIED)
+		else:
+			response = Response(body())
+		response["ETag"] = etag
+		response["Cache-Control"] = f"public, max-age={self.cache_max_age}"
+		return response
+
+
+class BudgetViewSet(CachedListMixin, FastListMixin, viewsets.ModelViewSet):
 	serializer_class = BudgetSerializer
 	permission_classes = [permissions.IsAuthenticated]
 
 	def get_queryset(self):
 		return Budget.objects.filter(user=self.request.user)
 
+	def list_rows(self, rows):
+		return budgets.current_rows(rows)
+
+	def retrieve(self, request, *args, **kwargs):
+		return Response(self.get_serializer(budgets.current_budget(self.get_object())).data)
+
 	def perform_create(self, serializer):
 		serializer.save(user=self.request.user)
 
+	def list_cache_variant(self):
+		# Budgets read as the new month's at the boundary without any write.
+		return timezone.localdate().strftime("%Y-%m")
+
+	def perform_update(self, serializer):
+		with transaction.atomic():
+			budgets.roll_forward(Budget.objects.filter(pk=serializer.instance.pk))
+			# Spend is maintained by transaction writes; never overwrite it with the copy loaded for this request.
+			locked = Budget.objects.select_for_update().get(pk=serializer.instance.pk)
+			budget = serializer.save(spent_amount=locked.spent_amount, current_period=locked.current_period)
+			BudgetPeriod.objects.filter(budget=budget, month=budget.current_period, closed_at__isnull=True).update(allocated_amount=budget.allocated_amount)
+
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    related_fields = ("account", "category", "budget")
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user).order_by("-date", "-created_at")
+        queryset = Transaction.objects.filter(user=self.request.user).order_by("-date", "-created_at", "-id")
+        # Join the nested objects the serializer renders so a page costs one query.
+        related = self.related_fields
+        fields = self.get_projection() if self.action == "list" else None
+        if fields is not None:
+            related = tuple(name for name in related if name in fields)
+        return queryset.select_related(*related) if related else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list" and "fields" not in kwargs:
+            fields = self.get_projection()
+            if fields is not None:
+                kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def list_fields(self):
+        return self.get_projection()
+
+    def get_projection(self):
+        # ?fields=id,date,amount limits list rows to the readable fields named.
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        readable = {name for name, field in self.serializer_class().fields.items() if not field.write_only}
+        unknown = sorted(set(fields) - readable)
+        if unknown:
+            raise exceptions.ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+        return fields
 
     def perform_create(self, serializer):
-        transaction = serializer.save(user=self.request.user)
-        
-        # Update account balance when creating a new transaction
-        account = transaction.account
-        if transaction.transaction_type == 'expense':
-            account.balance -= transaction.amount
-        elif transaction.transaction_type == 'income':
-            account.balance += transaction.amount
-        account.save()
+        with transaction.atomic():
+            instance = serializer.save(user=self.request.user)
+            ledger.post([ledger.entry(instance)])
+        self._refresh_totals(instance)
 
     def perform_update(self, serializer):
-        # Get the original transaction before updating
-        original_transaction = self.get_object()
-        original_amount = original_transaction.amount
-        original_type = original_transaction.transaction_type
-        original_account = original_transaction.account
-        
-        # Update the transaction
-        updated_transaction = serializer.save()
-        new_amount = updated_transaction.amount
-        new_type = updated_transaction.transaction_type
-        new_account = updated_transaction.account
-        
-        # Calculate the adjustment
-        adjustment = Decimal('0')
-        
-        # Case 1: Same account, same type
-        if original_account == new_account and original_type == new_type:
-            if original_type == 'expense':
-                # Expense amount changed: original was subtracted, now subtract new
-                # So we need to add back original and subtract new
-                adjustment = original_amount - new_amount
-            else:  # income
-                # Income amount changed: original was added, now add new
-                # So we need to subtract original and add new
-                adjustment = new_amount - original_amount
-        
-        # Case 2: Same account, different type
-        elif original_account == new_account and original_type != new_type:
-            # Revert original transaction and apply new one
-            if original_type == 'expense':
-                # Add back the original expense, then apply new income
-                adjustment = original_amount + new_amount
-            else:  # original was income
-                # Subtract original income, then apply new expense
-                adjustment = -original_amount - new_amount
-        
-        # Case 3: Different accounts
-        else:
-            # Revert from original account
-            if original_type == 'expense':
-                original_account.balance += original_amount
-            else:
-                original_account.balance -= original_amount
-            original_account.save()
-            
-            # Apply to new account
-            if new_type == 'expense':
-                new_account.balance -= new_amount
-            else:
-                new_account.balance += new_amount
-            new_account.save()
-            return
-        
-        # Apply adjustment for same account cases
-        if adjustment != Decimal('0'):
-            new_account.balance += adjustment
-            new_account.save()
+        with transaction.atomic():
+            # Lock the row so two edits of the same transaction cannot both revert its old amount.
+            original = Transaction.objects.select_for_update().get(pk=serializer.instance.pk)
+            instance = serializer.save()
+            ledger.post([ledger.entry(original, -1), ledger.entry(instance)])
+        self._refresh_totals(instance)
+
+    @staticmethod
+    def _refresh_totals(instance):
+        # The ledger updated these rows in SQL; reload them so the response shows the new figures.
+        instance.account.refresh_from_db(fields=["balance"])
+        if instance.budget_id:
+            instance.budget.refresh_from_db(fields=["spent_amount", "remaining_amount", "current_period"])
 
     def perform_destroy(self, instance):
-        # Revert the transaction from account balance before deleting
-        account = instance.account
-        if instance.transaction_type == 'expense':
-            account.balance += instance.amount  # Add back the expense
-        else:  # income
-            account.balance -= instance.amount  # Subtract the income
-        account.save()
-        instance.delete()
-
-
-class SavingsGoalViewSet(viewsets.ModelViewSet):
+        with transaction.atomic():
+            # Revert the row as it is now, locked; a concurrent delete or edit may have got there first.
+            locked = Transaction.objects.select_for_update().filter(pk=instance.pk).first()
+            if locked is None:
+                return
+            ledger.post([ledger.entry(locked, -1)])
+            locked.delete()
+
+    bulk_max_rows = 10000
+    bulk_batch_size = 1000
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Create, update and delete many transactions in one request and one DB transaction.
+
+        Body: ``{"create": [row, ...], "update": [{"id": ..., **changes}, ...], "delete": [id, ...]}``.
+        Either every row is applied or none is; on failure the response carries
+        the errors of each bad row, keyed by its position in the request list.
+        """
+        create_rows = request.data.get("create") or []
+        update_rows = request.data.get("update") or []
+        delete_ids = request.data.get("delete") or []
+        if not all(isinstance(rows, list) for rows in (create_rows, update_rows, delete_ids)):
+            raise exceptions.ValidationError({"detail": "create, update and delete must be lists."})
+        if len(create_rows) + len(update_rows) + len(delete_ids) > self.bulk_max_rows:
+            raise exceptions.ValidationError({"detail": f"At most {self.bulk_max_rows} rows per request."})
+
+        user = request.user
+        context = self.get_serializer_context()
+        context["prefetched"] = self._prefetch_related_rows(user, create_rows + update_rows)
+
+        create_serializer = TransactionSerializer(data=create_rows, many=True, context=context)
+        update_serializer = TransactionSerializer(data=update_rows, many=True, partial=True, context=context)
+        # Errors are keyed by list position, matching DRF's many=True error format.
+        errors = {}
+        if not create_serializer.is_valid():
+            errors["create"] = dict(create_serializer.errors)
+        if not update_serializer.is_valid():
+            errors["update"] = dict(update_serializer.errors)
+
+        targets = self._row_ids(update_rows) + self._row_ids(delete_ids)
+        if errors:
+            # Nothing will be written, so report missing targets too without locking them.
+            self._add_target_errors(errors, update_rows, delete_ids, Transaction.objects.filter(user=user, pk__in=targets).in_bulk())
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = []
+        with transaction.atomic():
+            # Lock the rows being updated or deleted, in pk order so overlapping requests cannot deadlock, and
+            # revert them as they are now; a concurrent edit or delete may have changed them since validation.
+            locked = Transaction.objects.select_for_update().filter(user=user, pk__in=targets).order_by("pk")
+            existing = {row.pk: row for row in locked}
+            self._add_target_errors(errors, update_rows, delete_ids, existing)
+            if errors:
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            created = [Transaction(user=user, **data) for data in create_serializer.validated_data]
+            Transaction.objects.bulk_create(created, batch_size=self.bulk_batch_size)
+            entries.extend(ledger.entry(t) for t in created)
+
+            updated = []
+            changed_fields = {"updated_at"}
+            now = timezone.now()
+            for row, data in zip(update_rows, update_serializer.validated_data):
+                instance = existing[self._row_id(row)]
+                entries.append(ledger.entry(instance, -1))
+                for attr, value in data.items():
+                    setattr(instance, attr, value)
+                    changed_fields.add(attr)
+                instance.updated_at = now
+                entries.append(ledger.entry(instance))
+                updated.append(instance)
+            if updated:
+                Transaction.objects.bulk_update(updated, sorted(changed_fields), batch_size=self.bulk_batch_size)
+
+            deleted = [existing[self._row_id(pk)] for pk in delete_ids]
+            entries.extend(ledger.entry(t, -1) for t in deleted)
+            Transaction.objects.filter(pk__in=[t.pk for t in deleted]).delete()
+
+            ledger.post(entries)
+
+        return Response(
+            {
+                "created": [t.pk for t in created],
+                "updated": [t.pk for t in updated],
+                "deleted": [t.pk for t in deleted],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_statement(self, request):
+        """Stream an uploaded CSV/OFX statement into one of the user's accounts."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise exceptions.ValidationError({"file": "This field is required."})
+        account = get_object_or_404(Account, pk=self._row_id(request.data.get("account_id")), user=request.user)
+        fmt = (request.data.get("format") or upload.name.rsplit(".", 1)[-1]).lower()
+        if fmt not in PARSERS:
+            raise exceptions.ValidationError({"format": f"Expected one of: {', '.join(sorted(PARSERS))}."})
+
+        # Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk, so this reads in constant memory.
+        # Bytes that are not UTF-8 (a cp1252 export, say) decode to U+FFFD and the importer reports those lines.
+        lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            summary = TransactionImporter(request.user, account).run(PARSERS[fmt](lines))
+        except csv.Error as exc:
+            # Batches before the bad line are committed; re-uploading the fixed file skips them as duplicates.
+            raise exceptions.ValidationError({"file": f"Not a readable statement: {exc}."})
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream the user's history as CSV or NDJSON (``?output=csv|ndjson``).
+
+        Optional filters: ``account``, ``date_after`` and ``date_before`` (inclusive, ISO dates).
+        """
+        output = request.query_params.get("output", "csv").lower()
+        if output not in EXPORT_FORMATS:
+            raise exceptions.ValidationError({"output": f"Expected one of: {', '.join(sorted(EXPORT_FORMATS))}."})
+        filters = {name: _query_date(request, name) for name in ("date_after", "date_before") if request.query_params.get(name)}
+        if request.query_params.get("account"):
+            filters["account"] = self._row_id(request.query_params["account"])
+            if filters["account"] is None:
+                raise exceptions.ValidationError({"account": "Expected an id."})
+
+        stream, content_type = EXPORT_FORMATS[output]
+        rows = export_rows(transactions_for_export(request.user, **filters))
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="transactions.{output}"'
+        return response
+
+    search_default_limit = 50
+    search_max_limit = 200
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Transactions whose description matches ``q``, best match first.
+
+        Every word of ``q`` must match the start of a word in the description.
+        Optional filters: ``account``, ``category``, ``type``, ``date_after`` and
+        ``date_before`` (inclusive, ISO dates); ``limit`` caps the results
+        (default 50, at most 200) and ``fields`` projects them as on the list.
+        """
+        query = request.query_params.get("q", "")
+        if not search.terms(query):
+            raise exceptions.ValidationError({"q": "Enter at least one word to search for."})
+        try:
+            limit = int(request.query_params.get("limit", self.search_default_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.search_max_limit:
+            raise exceptions.ValidationError({"limit": f"Expected a number from 1 to {self.search_max_limit}."})
+
+        filters = {}
+        for name in ("account", "category"):
+            if request.query_params.get(name):
+                filters[name] = self._row_id(request.query_params[name])
+                if filters[name] is None:
+                    raise exceptions.ValidationError({name: "Expected an id."})
+        transaction_type = request.query_params.get("type")
+        if transaction_type:
+            if transaction_type not in dict(Category.TYPE_CHOICES):
+                raise exceptions.ValidationError({"type": f"Expected one of: {', '.join(dict(Category.TYPE_CHOICES))}."})
+            filters["type"] = transaction_type
+        for name in ("date_after", "date_before"):
+            if request.query_params.get(name):
+                filters[name] = _query_date(request, name)
+
+        ids = search.search(request.user.pk, query, filters, limit)
+        rows = self.fast_serializer()
+        columns = rows.columns if "id" in rows.columns else [*rows.columns, "id"]
+        found = {row["id"]: row for row in Transaction.objects.filter(pk__in=ids).values(*columns)} if ids else {}
+        return Response({"query": query, "results": rows.serialize([found[pk] for pk in ids if pk in found])})
+
+    def _prefetch_related_rows(self, user, rows):
+        def ids(key):
+            return self._row_ids(row.get(key) for row in rows if isinstance(row, dict))
+
+        return {
+            Account: Account.objects.filter(user=user).in_bulk(ids("account_id")),
+            Budget: Budget.objects.filter(user=user).in_bulk(ids("budget_id")),
+        }
+
+    @classmethod
+    def _add_target_errors(cls, errors, update_rows, delete_ids, existing):
+        # Each existing row may appear once across update and delete, otherwise its delta would be applied twice.
+        targets = cls._row_ids(update_rows) + cls._row_ids(delete_ids)
+        repeated = {pk for pk, seen in Counter(targets).items() if seen > 1}
+        for key, values in (("update", update_rows), ("delete", delete_ids)):
+            for index, value in enumerate(values):
+                error = cls._target_error(cls._row_id(value), existing, repeated)
+                if error:
+                    errors.setdefault(key, {}).setdefault(index, {}).update(error)
+
+    @staticmethod
+    def _target_error(pk, existing, repeated):
+        if pk not in existing:
+            return {"id": ["Not found."]}
+        if pk in repeated:
+            return {"id": ["Listed more than once."]}
+        return {}
+
+    @staticmethod
+    def _row_id(value):
+        if isinstance(value, dict):
+            value = value.get("id")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def _row_ids(cls, values):
+        return [pk for pk in map(cls._row_id, values) if pk is not None]
+
+
+class SavingsGoalViewSet(CachedListMixin, FastListMixin, viewsets.ModelViewSet):
 	
 	serializer_class = SavingsGoalSerializer
 	permission_classes = [permissions.IsAuthenticated]
@@ -197,8 +515,7 @@ class SavingsGoalViewSet(viewsets.ModelViewSet):
 
 	@action(detail=True, methods=["post"])
 	def add(self, request, pk=None):
-		
-		goal = get_object_or_404(SavingsGoal, pk=pk, user=request.user)
+		"""Add a positive ``amount`` to the goal atomically and record it in the contribution ledger."""
 		amount = request.data.get("amount")
 		
 		try:
@@ -206,9 +523,211 @@ class SavingsGoalViewSet(viewsets.ModelViewSet):
 		except (InvalidOperation, TypeError, ValueError):
 			return Response({"detail": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST)
 
-		if amount <= Decimal("0"):
+		if not amount.is_finite() or amount <= Decimal("0"):
 			return Response({"detail": "Amount must be positive"}, status=status.HTTP_400_BAD_REQUEST)
 
-		goal.current_amount = (goal.current_amount or Decimal("0")) + amount
-		goal.save()
+		goal = savings.contribute(request.user.pk, pk, amount.quantize(Decimal("0.01")))
+		if goal is None:
+			raise Http404
 		return Response(SavingsGoalSerializer(goal).data, status=status.HTTP_200_OK)
+
+	@action(detail=True, methods=["get"])
+	def contributions(self, request, pk=None):
+		"""The goal's most recent contributions, newest first (``?limit=``, default 50, at most 200)."""
+		goal = get_object_or_404(SavingsGoal, pk=pk, user=request.user)
+		try:
+			limit = int(request.query_params.get("limit", 50))
+		except ValueError:
+			raise exceptions.ValidationError({"limit": "Expected a number."})
+		if not 1 <= limit <= 200:
+			raise exceptions.ValidationError({"limit": "Expected a number from 1 to 200."})
+		rows = goal.contributions.order_by("-created_at", "-id").values("id", "amount", "created_at")[:limit]
+		return Response([{"id": row["id"], "amount": f"{row['amount']:.2f}", "created_at": row["created_at"]} for row in rows])
+
+	@action(detail=False, methods=["get"])
+	def projection(self, request):
+		"""Projected completion date of each goal at its contribution velocity (see ``finance.savings``)."""
+		return Response({"as_of": timezone.localdate().isoformat(), "goals": savings.projections(request.user.pk)})
+
+
+class RecurringTransactionViewSet(CachedListMixin, viewsets.ModelViewSet):
+	"""The user's recurring transactions; ``manage.py materialize_recurring`` posts their due occurrences."""
+
+	serializer_class = RecurringTransactionSerializer
+	permission_classes = [permissions.IsAuthenticated]
+
+	def get_queryset(self):
+		return RecurringTransaction.objects.filter(user=self.request.user).order_by("-created_at")
+
+	def perform_create(self, serializer):
+		serializer.save(user=self.request.user)
+
+
+class SyncView(APIView):
+	"""Accounts, transactions, budgets and savings goals changed since ``?since=<token>`` (see ``finance.sync``)."""
+
+	permission_classes = [permissions.IsAuthenticated]
+
+	def get(self, request):
+		return Response(sync.changes(request.user, request.query_params.get("since") or None, request.query_params.get("cursor") or None))
+
+
+class AnalyticsView(APIView):
+	"""Answer an ad-hoc pivot over the user's transactions with one grouped query (see ``finance.analytics``).
+
+	Body: ``{"dimensions": [...], "measures": [...], "bucket": "month", "filters": {...}, "order": [...], "limit": n}``.
+	"""
+
+	permission_classes = [permissions.IsAuthenticated]
+
+	def post(self, request):
+		return Response(analytics.answer(request.user.pk, request.data))
+
+
+def _month_starts(count, today=None):
+	"""Return the first day of the last ``count`` months, oldest first."""
+	today = today or timezone.localdate()
+	year, month = today.year, today.month
+	starts = []
+	for _ in range(count):
+		starts.append(today.replace(year=year, month=month, day=1))
+		month -= 1
+		if month == 0:
+			year, month = year - 1, 12
+	return starts[::-1]
+
+
+def _query_date(request, name):
+	"""Parse an optional ISO date query parameter; ``None`` when absent."""
+	raw = request.query_params.get(name)
+	if not raw:
+		return None
+	try:
+		value = parse_date(raw)
+	except ValueError:
+		value = None
+	if value is None:
+		raise exceptions.ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+	return value
+
+
+def _money(value):
+	return str((value or Decimal("0")).quantize(Decimal("0.01")))
+
+
+def _dashboard_queries(user, month_starts, recent_count):
+	"""Build the unevaluated queries behind the dashboard summary.
+
+	Returns ``(rows, aggregates)``: querysets to list, and ``(queryset, exprs)``
+	pairs to aggregate. The sync and async views evaluate the same queries.
+	"""
+	# Same split as the dashboard: income categories vs everything else.
+	# Both charts read the monthly rollup, so cost scales with months x categories, not rows.
+	rollups = MonthlyCategoryTotal.objects.filter(user=user)
+	rows = {
+		"monthly": (
+			rollups.filter(month__gte=month_starts[0])
+			.values("month", "category__type")
+			.annotate(total=Sum("total"))
+			.order_by()
+		),
+		"expense_by_category": (
+			rollups.filter(category__type=Category.TYPE_EXPENSE)
+			.values("category__name")
+			.annotate(value=Abs(Sum("total")))
+			.filter(value__gt=0)
+			.order_by("-value")
+		),
+		"next_goal": (
+			SavingsGoal.objects.filter(user=user, target_amount__gt=0)
+			.annotate(progress=ExpressionWrapper(Cast("current_amount", FloatField()) / F("target_amount"), output_field=FloatField()))
+			.order_by("-progress", "-created_at")
+			.values("id", "name", "description", "current_amount", "target_amount")[:1]
+		),
+		"recent": (
+			Transaction.objects.filter(user=user)
+			.order_by("-date", "-created_at")
+			.values("id", "date", "amount", "description", "category__name", "category__type")[:recent_count]
+		),
+	}
+	aggregates = {
+		"accounts": (Account.objects.filter(user=user), {"total_balance": Sum("balance"), "count": Count("id")}),
+		"budgets": (budgets.with_current_spend(Budget.objects.filter(user=user)), {"allocated": Sum("allocated_amount"), "remaining": Sum(F("allocated_amount") - F("current_spent"))}),
+		"savings": (SavingsGoal.objects.filter(user=user), {"saved": Sum("current_amount"), "target": Sum("target_amount")}),
+	}
+	return rows, aggregates
+
+
+def _dashboard_payload(month_starts, results):
+	"""Shape the evaluated dashboard queries into the response body."""
+	series = {start: {"month": start.strftime("%Y-%m"), "income": Decimal("0"), "expense": Decimal("0")} for start in month_starts}
+	for row in results["monthly"]:
+		bucket = series.get(row["month"])
+		if bucket is None:
+			continue
+		key = "income" if row["category__type"] == Category.TYPE_INCOME else "expense"
+		bucket[key] += abs(row["total"] or Decimal("0"))
+
+	accounts = results["accounts"]
+	savings = results["savings"]
+	allocated = results["budgets"]["allocated"] or Decimal("0")
+	remaining = results["budgets"]["remaining"] or Decimal("0")
+	spent_pct = ((allocated - remaining) / allocated * 100) if allocated else Decimal("0")
+	next_goal = results["next_goal"][0] if results["next_goal"] else None
+
+	this_month = series[month_starts[-1]]
+	return {
+		"total_balance": _money(accounts["total_balance"]),
+		"account_count": accounts["count"],
+		"income_this_month": _money(this_month["income"]),
+		"expense_this_month": _money(this_month["expense"]),
+		"monthly_series": [
+			{"month": bucket["month"], "income": _money(bucket["income"]), "expense": _money(bucket["expense"])}
+			for bucket in series.values()
+		],
+		"expense_by_category": [
+			{"name": row["category__name"], "value": _money(row["value"])} for row in results["expense_by_category"]
+		],
+		"budgets": {
+			"allocated": _money(allocated),
+			"remaining": _money(remaining),
+			"spent_pct": _money(spent_pct),
+		},
+		"savings": {
+			"saved": _money(savings["saved"]),
+			"target": _money(savings["target"]),
+			"next_goal": next_goal and {
+				"id": next_goal["id"],
+				"name": next_goal["name"],
+				"description": next_goal["description"],
+				"current_amount": _money(next_goal["current_amount"]),
+				"target_amount": _money(next_goal["target_amount"]),
+			},
+		},
+		"recent_transactions": [
+			{
+				"id": row["id"],
+				"date": row["date"],
+				"amount": _money(row["amount"]),
+				"description": row["description"],
+				"category": {"name": row["category__name"], "type": row["category__type"]},
+			}
+			for row in results["recent"]
+		],
+	}
+
+
+class DashboardSummaryView(APIView):
+
+	permission_classes = [permissions.IsAuthenticated]
+	months = 6
+	recent_count = 3
+
+	def get(self, request):
+		user = request.user
+		month_starts = _month_starts(self.months)
+
+		rows, aggregates = _dashboard_queries(user, month_starts, self.recent_count)
+		results = {name: list(queryset) for name, queryset in rows.items()}
+		results.update({name: queryset.aggregate(**exprs) for name, (queryset, exprs) in aggregates.items()})
+		return Response(_dashboard_payload(month_starts, results), status=status.HTTP_200_OK)
@@ -5,6 +5,17 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Worker model: run one event-loop worker per core, e.g.
+
+    uvicorn main.asgi:application --workers 2 --host 0.0.0.0 --port 8000
+
+The GET handlers in finance.async_views await the ORM, so a worker
+interleaves many requests. Each in-flight request runs its queries on its own
+thread and database connection; persistent connections are therefore off
+(DB_CONN_MAX_AGE=0) and concurrent requests per worker should stay below
+the database's connection budget (or sit behind PgBouncer).
+Writes still run the synchronous DRF views in a thread.
 """
 
 import os
@@ -12,5 +23,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+os.environ.setdefault('FINANCE_ASYNC_READS', '1')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -51,7 +51,18 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'finance.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'finance.renderers.TimedJSONRenderer',
+        'finance.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'finance.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
@@ -65,6 +76,8 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'finance.middleware.RequestMetricsMiddleware',
+    'finance.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -93,20 +106,129 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'main.wsgi.application'
+ASGI_APPLICATION = 'main.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DATABASE_URL = os.environ.get("DATABASE_URL", "")
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.environ.get("DATABASE_URL"),
-        conn_max_age=600,
-        ssl_require=True
+        default=DATABASE_URL,
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", "600")),
+        ssl_require=not DATABASE_URL.startswith("sqlite")
     )
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set CACHE_URL=redis://host:6379/0 (needs the redis package) to share the cache
+# between workers; otherwise each process gets its own local-memory cache.
+
+CACHE_URL = os.environ.get("CACHE_URL", "")
+
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'finance',
+        }
+    }
+
+# Per-user list response caching is only safe when every worker sees the same cache.
+FINANCE_RESPONSE_CACHE = os.environ.get("FINANCE_RESPONSE_CACHE", "1" if CACHES['default']['BACKEND'].endswith("RedisCache") else "") == "1"
+
+
+# Serve the hot GET endpoints from async views (finance.async_views). main.asgi
+# turns this on; under main.wsgi the DRF views answer directly.
+
+FINANCE_ASYNC_READS = os.environ.get("FINANCE_ASYNC_READS", "") == "1"
+
+
+# Request metrics (finance.middleware): Server-Timing headers, the Prometheus
+# endpoint at /api/metrics/ (off unless FINANCE_METRICS_TOKEN is set; scrape
+# with "Authorization: Bearer <token>") and a sampled log of slow requests
+# with their SQL on the "finance.slow_requests" logger.
+
+FINANCE_SERVER_TIMING = os.environ.get("FINANCE_SERVER_TIMING", "1") == "1"
+FINANCE_METRICS_TOKEN = os.environ.get("FINANCE_METRICS_TOKEN", "")
+FINANCE_SLOW_REQUEST_MS = int(os.environ.get("FINANCE_SLOW_REQUEST_MS", "500"))
+FINANCE_SLOW_REQUEST_SAMPLE = float(os.environ.get("FINANCE_SLOW_REQUEST_SAMPLE", "0.1"))
+
+
+# /api/sync/ (finance.sync): how far each call re-reads behind the client's
+# token, and how long deletions are remembered before clients get a full
+# snapshot instead. Prune old tombstones with "manage.py prune_tombstones".
+
+FINANCE_SYNC_OVERLAP_SECONDS = int(os.environ.get("FINANCE_SYNC_OVERLAP_SECONDS", "60"))
+FINANCE_SYNC_TOMBSTONE_DAYS = int(os.environ.get("FINANCE_SYNC_TOMBSTONE_DAYS", "30"))
+# Transactions per sync response; clients follow "next" for the rest.
+FINANCE_SYNC_PAGE_SIZE = int(os.environ.get("FINANCE_SYNC_PAGE_SIZE", "1000"))
+
+
+# Analytics (POST api/analytics/): most rows one answer may hold, and how long
+# answers stay cached (only with FINANCE_RESPONSE_CACHE; a write retires them).
+
+FINANCE_ANALYTICS_MAX_ROWS = int(os.environ.get("FINANCE_ANALYTICS_MAX_ROWS", "5000"))
+FINANCE_ANALYTICS_CACHE_SECONDS = int(os.environ.get("FINANCE_ANALYTICS_CACHE_SECONDS", "300"))
+
+# Cash-flow forecast (api/accounts/forecast/, manage.py forecast_all): days
+# projected ahead, and days of history read to fit the projection.
+
+FINANCE_FORECAST_DAYS = int(os.environ.get("FINANCE_FORECAST_DAYS", "90"))
+FINANCE_FORECAST_HISTORY_DAYS = int(os.environ.get("FINANCE_FORECAST_HISTORY_DAYS", "730"))
+
+
+# Response compression (finance.middleware.CompressionMiddleware): brotli or
+# gzip per Accept-Encoding for bodies of at least FINANCE_COMPRESS_MIN_BYTES.
+# Brotli quality 4 keeps per-request CPU close to gzip's.
+
+FINANCE_COMPRESS_MIN_BYTES = int(os.environ.get("FINANCE_COMPRESS_MIN_BYTES", "1024"))
+FINANCE_BROTLI_QUALITY = int(os.environ.get("FINANCE_BROTLI_QUALITY", "4"))
+
+
+# Password hashing
+# PASSWORD_HASHER_PROFILE picks the preferred hasher; the others stay listed so
+# existing hashes keep verifying and are upgraded on the next login.
+# "fast" is for test runs only.
+
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',  # needs argon2-cffi
+    'fast': 'django.contrib.auth.hashers.MD5PasswordHasher',
+}
+
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "pbkdf2")
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for name, hasher in PASSWORD_HASHER_PROFILES.items()
+    if name not in (PASSWORD_HASHER_PROFILE, 'fast', 'argon2')
+]
+
+# At most PASSWORD_HASH_WORKERS hashes run at once and PASSWORD_HASH_QUEUE more
+# requests wait (blocking their worker); the rest get a 429.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "32"))
+
+# Serve authenticated users from the cache and honour logout revocation. Only
+# safe when every worker sees the same cache, like FINANCE_RESPONSE_CACHE.
+FINANCE_AUTH_CACHE = os.environ.get("FINANCE_AUTH_CACHE", "1" if CACHES['default']['BACKEND'].endswith("RedisCache") else "") == "1"
+
+# Seconds an authenticated user is served from the cache instead of the database.
+FINANCE_AUTH_USER_TTL = int(os.environ.get("FINANCE_AUTH_USER_TTL", "60"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -54,29 +54,8 @@ function getHeaders() {
   return headers;
 }
 
-async function fetchAccounts() {
-  const data = await apiFetch("api/accounts/", {
-    headers: getHeaders(),
-  });
-  return data;
-}
-
-async function fetchTransactions() {
-  const data = await apiFetch("api/transactions/", {
-    headers: getHeaders(),
-  });
-  return data;
-}
-
-async function fetchBudgets() {
-  const data = await apiFetch("api/budgets/", {
-    headers: getHeaders(),
-  });
-  return data;
-}
-
-async function fetchSavingsGoals() {
-  const data = await apiFetch("api/savings-goals/", {
+async function fetchSummary() {
+  const data = await apiFetch("api/dashboard/summary/", {
     headers: getHeaders(),
   });
   return data;
@@ -84,10 +63,7 @@ async function fetchSavingsGoals() {
 
 export default function DashboardPage() {
   const router = useRouter();
-  const [accounts, setAccounts] = useState([]);
-  const [transactions, setTransactions] = useState([]);
-  const [budgets, setBudgets] = useState([]);
-  const [savings, setSavings] = useState([]);
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(false);
   const [showLogoutConfirm, setShowLogoutConfirm] = useState(false);
   const [userName, setUserName] = useState("");
@@ -114,90 +90,38 @@ export default function DashboardPage() {
   async function loadAll() {
     setLoading(true);
     try {
-      const [accData, txData, bdData, svData] = await Promise.all([
-        fetchAccounts(),
-        fetchTransactions(),
-        fetchBudgets(),
-        fetchSavingsGoals(),
-      ]);
-      setAccounts(accData || []);
-      setTransactions((txData || []).sort((a, b) => (a.date < b.date ? 1 : -1)));
-      setBudgets(bdData || []);
-      setSavings(svData || []);
+      setSummary(await fetchSummary());
     } catch (err) {
       console.warn("Dashboard load failed, using empty data", err);
-      setAccounts([]);
-      setTransactions([]);
-      setBudgets([]);
-      setSavings([]);
+      setSummary(null);
     } finally {
       setLoading(false);
     }
   }
 
-  const totalBalance = useMemo(() => accounts.reduce((s, a) => s + Number(a.balance || 0), 0), [accounts]);
-
-  function lastNMonths(n = 6) {
-    const res = [];
-    const now = new Date();
-    for (let i = n - 1; i >= 0; i--) {
-      const d = new Date(now.getFullYear(), now.getMonth() - i, 1);
-      res.push(d.toISOString().slice(0, 7));
-    }
-    return res;
-  }
-
-  const months = useMemo(() => lastNMonths(6), []);
-
-  const monthlySeries = useMemo(() => {
-    const m = months.map((mon) => ({ month: mon, income: 0, expense: 0 }));
-    (transactions || []).forEach((t) => {
-      if (!t.date) return;
-      const key = t.date.slice(0, 7);
-      const idx = m.findIndex((x) => x.month === key);
-      if (idx === -1) return;
-      if (t.category?.type === "income") m[idx].income += Number(t.amount || 0);
-      else m[idx].expense += Math.abs(Number(t.amount || 0));
-    });
-    return m;
-  }, [transactions, months]);
-
-  const expenseByCategory = useMemo(() => {
-    const map = {};
-    (transactions || []).forEach((t) => {
-      if (t.category?.type === "expense") {
-        const name = t.category?.name || "Unknown";
-        map[name] = (map[name] || 0) + Math.abs(Number(t.amount || 0));
-      }
-    });
-    return Object.entries(map).map(([name, value]) => ({ name, value }));
-  }, [transactions]);
-
-  const totalIncomeThisMonth = useMemo(() => {
-    const month = new Date().toISOString().slice(0, 7);
-    return transactions.filter((t) => t.date?.slice(0, 7) === month && t.category?.type === "income").reduce((s, t) => s + Number(t.amount || 0), 0);
-  }, [transactions]);
-
-  const totalExpenseThisMonth = useMemo(() => {
-    const month = new Date().toISOString().slice(0, 7);
-    return transactions.filter((t) => t.date?.slice(0, 7) === month && t.category?.type === "expense").reduce((s, t) => s + Math.abs(Number(t.amount || 0)), 0);
-  }, [transactions]);
-
-  const totalRemainingBudget = useMemo(() => (budgets || []).reduce((s, b) => s + Number(b.remaining_amount || 0), 0), [budgets]);
-
-  const top3 = transactions.slice(0, 3);
+  const totalBalance = Number(summary?.total_balance || 0);
+  const monthlySeries = useMemo(
+    () => (summary?.monthly_series || []).map((m) => ({ month: m.month, income: Number(m.income), expense: Number(m.expense) })),
+    [summary]
+  );
+  const expenseByCategory = useMemo(
+    () => (summary?.expense_by_category || []).map((c) => ({ name: c.name || "Unknown", value: Number(c.value) })),
+    [summary]
+  );
+  const totalIncomeThisMonth = Number(summary?.income_this_month || 0);
+  const totalExpenseThisMonth = Number(summary?.expense_this_month || 0);
+  const totalRemainingBudget = Number(summary?.budgets?.remaining || 0);
+  const alertBudgetPct = Number(summary?.budgets?.spent_pct || 0);
 
-  const savingsTotal = useMemo(() => (savings || []).reduce((s, g) => s + Number(g.current_amount || 0), 0), [savings]);
-  const savingsTargetTotal = useMemo(() => (savings || []).reduce((s, g) => s + Number(g.target_amount || 0), 0), [savings]);
+  const top3 = summary?.recent_transactions || [];
 
-  const alertBudgetPct = useMemo(() => {
-    const totalBudgeted = (budgets || []).reduce((s, b) => s + Number(b.allocated_amount || 0), 0);
-    const totalRemaining = (budgets || []).reduce((s, b) => s + Number(b.remaining_amount || 0), 0);
-    const spent = totalBudgeted - totalRemaining;
-    return totalBudgeted ? (spent / totalBudgeted) * 100 : 0;
-  }, [budgets]);
+  const savingsTotal = Number(summary?.savings?.saved || 0);
+  const savingsTargetTotal = Number(summary?.savings?.target || 0);
+  const nextGoal = summary?.savings?.next_goal || null;
 
   function doLogout() {
+    // Revoke the tokens server-side; the local session is cleared either way.
+    apiFetch("api/logout/", { method: "POST", headers: getHeaders() }).catch(() => {});
     try {
       if (typeof window !== "undefined") localStorage.clear();
     } catch (e) {
@@ -282,19 +206,19 @@ export default function DashboardPage() {
                   <div className="text-sm font-medium">Next savings goal</div>
                   <div className="text-xs text-gray-500">Almost there</div>
                 </div>
-                {savings.length === 0 ? (
+                {!nextGoal ? (
                   <div className="text-sm text-gray-500">No savings goals</div>
                 ) : (
                   (() => {
-                    const next = savings.map((s) => ({ ...s, pct: s.target_amount ? (s.current_amount / s.target_amount) * 100 : 0 })).sort((a, b) => b.pct - a.pct)[0];
+                    const pct = Number(nextGoal.target_amount) ? (Number(nextGoal.current_amount) / Number(nextGoal.target_amount)) * 100 : 0;
                     return (
                       <div>
-                        <div className="text-sm font-semibold">{next.name}</div>
-                        <div className="text-xs text-gray-500">{next.description}</div>
+                        <div className="text-sm font-semibold">{nextGoal.name}</div>
+                        <div className="text-xs text-gray-500">{nextGoal.description}</div>
                         <div className="w-full bg-gray-100 rounded-full h-3 overflow-hidden mt-3">
-                          <div className="h-3 bg-indigo-400 rounded-full" style={{ width: `${Math.min(100, next.pct)}%` }} />
+                          <div className="h-3 bg-indigo-400 rounded-full" style={{ width: `${Math.min(100, pct)}%` }} />
                         </div>
-                        <div className="text-sm mt-2">{Math.round(next.pct)}% — ${Number(next.current_amount).toFixed(2)} of ${Number(next.target_amount).toFixed(2)}</div>
+                        <div className="text-sm mt-2">{Math.round(pct)}% — ${Number(nextGoal.current_amount).toFixed(2)} of ${Number(nextGoal.target_amount).toFixed(2)}</div>
                       </div>
                     );
                   })()
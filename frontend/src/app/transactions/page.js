@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { apiFetch } from "@/utils/api";
 
 function getHeaders() {
@@ -14,13 +14,6 @@ function getHeaders() {
   return headers;
 }
 
-async function fetchAccounts() {
-  const data = await apiFetch("api/accounts/", {
-    headers: getHeaders(),
-  });
-  return data;
-}
-
 async function fetchCategories() {
   const data = await apiFetch("api/categories/", {
     headers: getHeaders(),
@@ -28,18 +21,36 @@ async function fetchCategories() {
   return data;
 }
 
-async function fetchTransactions() {
-  const data = await apiFetch("api/transactions/", {
+// Accounts, transactions, budgets and goals changed since `since`; everything when it is null.
+// Transactions come in pages: pass the previous response's `next` as `cursor` for the rest.
+async function fetchChanges(since, cursor) {
+  const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : since ? `?since=${encodeURIComponent(since)}` : "";
+  const data = await apiFetch(`api/sync/${query}`, {
     headers: getHeaders(),
   });
   return data;
 }
 
-async function fetchBudgets() {
-  const data = await apiFetch("api/budgets/", {
-    headers: getHeaders(),
-  });
-  return data;
+// Fold one feed of a sync response into a list; a full snapshot replaces the list.
+function applyFeed(list, feed, full) {
+  if (full) return feed.changed;
+  const replaced = new Set([...feed.deleted, ...feed.changed.map((row) => row.id)]);
+  return [...feed.changed, ...(list || []).filter((row) => !replaced.has(row.id))];
+}
+
+// Same order as the API list: newest date first, then newest entry.
+function sortTransactions(list) {
+  return [...list].sort((a, b) => b.date.localeCompare(a.date) || b.created_at.localeCompare(a.created_at) || b.id - a.id);
+}
+
+// Transaction responses carry the linked budget's server-side totals; fold them into local state.
+function mergeBudget(budgets, txBudget) {
+  if (!txBudget) return budgets;
+  return (budgets || []).map((b) =>
+    b.id === txBudget.id
+      ? { ...b, allocated_amount: txBudget.allocated_amount, remaining_amount: txBudget.remaining_amount, spent_amount: txBudget.spent_amount }
+      : b
+  );
 }
 
 async function createTransaction(payload) {
@@ -374,6 +385,7 @@ export default function TransactionsPage() {
   const [editing, setEditing] = useState(null);
   const [page, setPage] = useState(1);
   const [allTransactions, setAllTransactions] = useState([]);
+  const syncToken = useRef(null);
 
   const itemsPerPage = 5;
   const paginated = transactions.slice((page - 1) * itemsPerPage, page * itemsPerPage);
@@ -389,10 +401,7 @@ export default function TransactionsPage() {
 
   async function loadMeta() {
     try {
-      const [accs, cats, buds] = await Promise.all([fetchAccounts(), fetchCategories(), fetchBudgets()]);
-      setAccounts(accs);
-      setCategories(cats);
-      setBudgets(buds || []);
+      setCategories(await fetchCategories());
     } catch (err) {
       console.error(err);
     }
@@ -434,9 +443,7 @@ export default function TransactionsPage() {
   async function loadTransactions() {
     setLoading(true);
     try {
-      const data = await fetchTransactions();
-      setAllTransactions(data || []);
-      setTransactions(doFilter(data || [], filters));
+      await syncChanges();
     } catch (err) {
       console.error(err);
     } finally {
@@ -444,6 +451,24 @@ export default function TransactionsPage() {
     }
   }
 
+  // The first call loads everything; later calls only fetch what changed since the last one.
+  // Each page is applied as it arrives; the token is only kept once the last page is in.
+  async function syncChanges() {
+    let cursor = null;
+    do {
+      const data = await fetchChanges(syncToken.current, cursor);
+      setAllTransactions((prev) => {
+        const next = sortTransactions(applyFeed(prev, data.transactions, data.full));
+        setTransactions(doFilter(next, filters));
+        return next;
+      });
+      setAccounts((prev) => applyFeed(prev, data.accounts, data.full));
+      setBudgets((prev) => applyFeed(prev, data.budgets, data.full));
+      cursor = data.next;
+      if (!cursor) syncToken.current = data.token;
+    } while (cursor);
+  }
+
   const handleCreate = async (payload) => {
     const body = {
       account_id: payload.account,
@@ -460,12 +485,7 @@ export default function TransactionsPage() {
         setTransactions(doFilter(next, filters));
         return next;
       });
-      try {
-        const newB = await fetchBudgets();
-        setBudgets(newB || []);
-      } catch (err) {
-        console.warn("Failed to refresh budgets", err);
-      }
+      setBudgets((prev) => mergeBudget(prev, created.budget));
       setIsOpen(false);
       setPage(1);
       try {
@@ -487,8 +507,7 @@ export default function TransactionsPage() {
         return next;
       });
       try {
-        const newB = await fetchBudgets();
-        setBudgets(newB || []);
+        await syncChanges();
       } catch (err) {
         console.warn("Failed to refresh budgets", err);
       }
@@ -521,11 +540,15 @@ export default function TransactionsPage() {
         setTransactions(doFilter(next, filters));
         return next;
       });
-      try {
-        const newB = await fetchBudgets();
-        setBudgets(newB || []);
-      } catch (err) {
-        console.warn("Failed to refresh budgets", err);
+      if ((editing.budget?.id ?? null) === (updated.budget?.id ?? null)) {
+        setBudgets((prev) => mergeBudget(prev, updated.budget));
+      } else {
+        // The old budget's figures changed too; the response only carries the new one.
+        try {
+          await syncChanges();
+        } catch (err) {
+          console.warn("Failed to refresh budgets", err);
+        }
       }
       setEditing(null);
       setIsOpen(false);